@@ -19,6 +19,7 @@ from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
 import game.routing
+from game.game_engine.housekeeping import start_housekeeping
 
 # Initialize Django ASGI application early to ensure the app is loaded
 django_asgi_app = get_asgi_application()
@@ -29,3 +30,6 @@ application = ProtocolTypeRouter({
         URLRouter(game.routing.websocket_urlpatterns)  # connect WS routes
     ),
 })
+
+# Empty lobbies and orphaned lobby players are swept up in the background
+start_housekeeping()
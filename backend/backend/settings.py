@@ -63,6 +63,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "game.middleware.QueryAuditMiddleware",
 ]
 
 ROOT_URLCONF = "backend.urls"
@@ -149,4 +150,99 @@ CORS_ALLOW_HEADERS = [
     "user-agent",
     "x-csrftoken",
     "x-requested-with",
-]
\ No newline at end of file
+]
+# ---------------------------------------------------------------------------
+# Game engine
+# ---------------------------------------------------------------------------
+
+# Hallway occupancy is held in memory per game; set to True to also mirror it
+# onto Game.hallway_occupancy.
+GAME_PERSIST_HALLWAY_OCCUPANCY = False
+
+# How GameManager writes state changes back to the database:
+#   "immediate"  - every change is written as it happens (safest, slowest)
+#   "per_action" - changes are flushed in one transaction when an action ends
+#   "periodic"   - changes are flushed every GAME_PERSISTENCE_FLUSH_INTERVAL
+#                  seconds; a crash can lose up to one interval of changes
+GAME_PERSISTENCE_DURABILITY = "per_action"
+GAME_PERSISTENCE_FLUSH_INTERVAL = 1.0
+
+# JSON encoder for websocket frames: "json" (stdlib) or "orjson", which is
+# faster but optional; without it installed frames fall back to "json".
+GAME_JSON_BACKEND = "json"
+
+# Commands a game's actor will queue before rejecting new ones as busy.
+GAME_ACTOR_QUEUE_SIZE = 64
+
+# Live games idle for this many seconds are checkpointed to
+# GAME_CHECKPOINT_DIR and dropped from memory; the next access rehydrates
+# them. Optionally also cap the number of live games or their approximate
+# size in bytes, evicting the least recently used first (None = no cap).
+GAME_SESSION_IDLE_TTL = 30 * 60
+GAME_SESSION_MAX_SESSIONS = None
+GAME_SESSION_MAX_BYTES = None
+GAME_CHECKPOINT_DIR = BASE_DIR / "checkpoints"
+
+# Seconds between checkpoints a game's actor writes while the game is played.
+GAME_SNAPSHOT_INTERVAL = 30
+
+# Every game's actions are appended to a log file in this directory, which
+# can rebuild the game by replay (manage.py replay_game). Checkpoints record
+# how much of the log they cover, so a crash loses nothing that was logged.
+# A game's log is deleted when its session is removed. None disables the logs
+# (as game/tests.py does for every test but its event log tests).
+GAME_EVENT_LOG_DIR = BASE_DIR / "game_logs"
+
+# Most bot-only games one POST to /api/games/simulate/ may play, and to the
+# streaming /api/games/simulate/batch/, which shards them across
+# GAME_SIMULATION_WORKERS processes (None = one per CPU). Both endpoints are
+# open to anonymous callers, so keep the caps to seconds of work.
+GAME_SIMULATION_MAX_GAMES = 2000
+GAME_SIMULATION_MAX_BATCH_GAMES = 10_000
+GAME_SIMULATION_WORKERS = None
+
+# Players may ask for a hint over the game websocket ({"type": "request_hint"}):
+# each card's chance of being in the envelope given what they have seen,
+# estimated from GAME_HINT_SAMPLES sampled deals (needs numpy to beat a
+# uniform guess over the remaining candidates).
+GAME_HINTS_ENABLED = False
+GAME_HINT_SAMPLES = 2000
+
+# Lobby seats can be filled with server-side bots ("random", "deducer" or
+# "estimator"). Bot decisions for every game share GAME_BOT_WORKERS threads.
+# Each bot step waits GAME_BOT_DELAY seconds first, so people can follow
+# along. Estimator bots sample GAME_BOT_ESTIMATOR_SAMPLES deals per decision.
+GAME_BOT_WORKERS = 4
+GAME_BOT_DELAY = 0.75
+GAME_BOT_ESTIMATOR_SAMPLES = 1000
+
+# Live games time each action's queue wait, execution, state serialization
+# and fan-out, and count its database queries, into in-process histograms
+# (game_engine/metrics.py) served in the Prometheus text format at
+# /api/metrics/. Recording costs about a microsecond per value.
+GAME_METRICS_ENABLED = True
+
+# Queries are counted per HTTP view, per game actor command and per
+# GameManager method (also served at /api/metrics/). A query run this many
+# times in one of them, differing only in its parameters, is printed as a
+# likely N+1 (None disables the warning). `manage.py benchmark queries`
+# reports each endpoint against its budget in game/benchmarks/queries.py.
+GAME_QUERY_REPEAT_THRESHOLD = 3
+
+# Lobby housekeeping runs in a background thread of the ASGI server every
+# GAME_HOUSEKEEPING_INTERVAL seconds (None disables it): lobbies without a
+# person in them are closed, and lobby players whose lobby closed, bots
+# without a lobby, and players without a lobby for GAME_LOBBY_PLAYER_TTL
+# seconds since they were created (None keeps them) are deleted.
+GAME_HOUSEKEEPING_INTERVAL = 30
+GAME_LOBBY_PLAYER_TTL = 24 * 60 * 60
+
+# SQLite concurrency mode (game_engine/writer.py), for a SQLite file
+# database: connections open with WAL and the pragmas below (merged over
+# writer.SQLITE_PRAGMAS), and every game and lobby write of the process runs
+# on one writer thread. Write-behind flushes queued together are committed
+# in one transaction, up to GAME_WRITER_BATCH_SIZE at a time. Reads run
+# concurrently on their own threads.
+GAME_SQLITE_CONCURRENCY = True
+GAME_SQLITE_PRAGMAS = {"busy_timeout": 5000}
+GAME_WRITER_BATCH_SIZE = 200
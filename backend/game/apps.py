@@ -8,3 +8,4 @@ class GameConfig(AppConfig):
     def ready(self):
         """Import and register signals when Django starts"""
         import game.signals  # noqa
+        import game.game_engine.writer  # noqa: tunes SQLite connections as they open
@@ -0,0 +1,132 @@
+"""Engine micro-benchmarks, run with ``python manage.py benchmark``.
+
+Each scenario module registers its functions with :func:`scenario`. Scenarios
+that need the ORM run against a throwaway test database created by the
+management command, never against the development database. Scenarios
+registered with ``file_db=True`` get that database in a temporary SQLite
+file instead of in memory.
+"""
+
+import random
+import time
+from importlib import import_module
+from typing import Callable, Dict, List, NamedTuple
+
+SCENARIO_MODULES = [
+    "game.benchmarks.board",
+    "game.benchmarks.cards",
+    "game.benchmarks.broadcast",
+    "game.benchmarks.actors",
+    "game.benchmarks.sessions",
+    "game.benchmarks.simulation",
+    "game.benchmarks.queries",
+    "game.benchmarks.conditional",
+    "game.benchmarks.writes",
+]
+
+
+class Scenario(NamedTuple):
+    name: str
+    func: Callable
+    needs_db: bool
+    description: str
+    file_db: bool = False
+
+
+SCENARIOS: Dict[str, Scenario] = {}
+
+
+def scenario(name: str, needs_db: bool = False, file_db: bool = False):
+    """Register a benchmark. The function returns ``[(label, value), ...]`` rows."""
+
+    def decorator(func):
+        SCENARIOS[name] = Scenario(
+            name, func, needs_db or file_db, (func.__doc__ or "").strip(), file_db
+        )
+        return func
+
+    return decorator
+
+
+def load_scenarios() -> Dict[str, Scenario]:
+    for module in SCENARIO_MODULES:
+        import_module(module)
+    return SCENARIOS
+
+
+def rate(func: Callable, iterations: int) -> float:
+    """Call ``func`` ``iterations`` times and return calls per second."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed if elapsed else float("inf")
+
+
+def create_lobby_players(count: int, lobby_name: str) -> List:
+    """Create a lobby with ``count`` players who have each picked a character."""
+    from game.game_engine.constants import SUSPECTS
+    from game.models import Card, Lobby, LobbyPlayer
+
+    lobby = Lobby.objects.create(name=lobby_name)
+    players = []
+    for name in SUSPECTS[:count]:
+        card, _ = Card.objects.get_or_create(name=name, defaults={"card_type": "CHAR"})
+        players.append(LobbyPlayer.objects.create(lobby=lobby, character_card=card))
+    return players
+
+
+def create_game(count: int, game_name: str):
+    """Start a ``GameManager`` for ``count`` players, as ``start_game`` does."""
+    from game.game_engine.game_manager import GameManager
+
+    lobby_players = create_lobby_players(count, f"bench-{game_name}")
+    return GameManager(game_name=game_name, lobby_players=lobby_players)
+
+
+def turn_actions(manager, rng: random.Random):
+    """
+    The current player's turn as public GameManager actions: move, suggest
+    when in a room, let the disprover show a card, end the turn. Yields
+    ``(action, kwargs)`` and expects each result to be sent back in, so the
+    same turn can be driven synchronously or through a game actor.
+    """
+    from game.game_engine.constants import SUSPECTS, WEAPONS
+
+    entry = manager.get_current_player()
+    player_id = entry["player_obj"].id
+
+    result = yield "move_player", {"player_id": player_id}
+    if result.get("requires_choice"):
+        yield "move_player", {
+            "player_id": player_id,
+            "destination_name": rng.choice(result["options"]),
+        }
+
+    if manager.serialize_public_state()["players"][entry["seat"]]["location_type"] == "room":
+        result = yield "make_suggestion_action", {
+            "player_id": player_id,
+            "suspect": rng.choice(SUSPECTS),
+            "weapon": rng.choice(WEAPONS),
+        }
+        if result.get("awaiting_disproof"):
+            yield "choose_disproving_card", {
+                "player_id": result["disprover_id"],
+                "card_name": result["matching_cards"][0],
+            }
+
+    yield "end_turn", {"player_id": player_id}
+
+
+def play_turn(manager, rng: random.Random, after_action: Callable = None):
+    """Play the current player's turn; ``after_action`` is called after each action."""
+    after_action = after_action or (lambda: None)
+    turn = turn_actions(manager, rng)
+    result = None
+    try:
+        while True:
+            action, kwargs = turn.send(result)
+            result = getattr(manager, action)(**kwargs)
+            after_action()
+    except StopIteration:
+        pass
@@ -0,0 +1,217 @@
+"""Per-action latency and throughput with many games in one process."""
+
+import asyncio
+import random
+import time
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.test import override_settings
+
+from game.benchmarks import create_game, rate, scenario, turn_actions
+from game.game_engine import metrics
+from game.game_engine.actor import GameActor
+from game.game_engine.constants import SUSPECTS, WEAPONS
+from game.game_engine.persistence import PERSISTENCE_EXECUTOR
+from game.models import Room
+
+GAME_COUNTS = (10, 50, 200)
+TURNS = 20
+BOT_GAME_COUNTS = (20, 100)
+BOT_RUN_SECONDS = 5
+METRICS_GAME_COUNT = 50
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+async def _drive(manager, call, rng, latencies):
+    """Play TURNS turns of one game through ``call(action, **kwargs)``."""
+    for _ in range(TURNS):
+        if manager.is_over:
+            return
+        turn = turn_actions(manager, rng)
+        result = None
+        try:
+            while True:
+                action, kwargs = turn.send(result)
+                start = time.perf_counter()
+                result = await call(action, **kwargs)
+                latencies.append(time.perf_counter() - start)
+        except StopIteration:
+            pass
+
+
+async def _via_thread(managers):
+    """The previous path: every action hops to the shared sync thread."""
+
+    def caller(manager):
+        async def call(action, **kwargs):
+            return await sync_to_async(getattr(manager, action))(**kwargs)
+
+        return call
+
+    latencies = []
+    await asyncio.gather(
+        *(_drive(m, caller(m), random.Random(i), latencies) for i, m in enumerate(managers))
+    )
+    return latencies
+
+
+async def _via_actors(managers):
+    actors = [GameActor(manager, maxsize=len(managers)) for manager in managers]
+
+    def caller(actor):
+        async def call(action, **kwargs):
+            result, _ = await actor.call(action, **kwargs)
+            return result
+
+        return call
+
+    latencies = []
+    await asyncio.gather(
+        *(_drive(a.manager, caller(a), random.Random(i), latencies) for i, a in enumerate(actors))
+    )
+    for actor in actors:
+        await actor.stop()
+    return latencies
+
+
+def _release_connections():
+    """
+    Wait for pending writes and close the worker threads' connections; the
+    shared-cache in-memory test database otherwise reports tables as locked.
+    """
+    PERSISTENCE_EXECUTOR.submit(connections.close_all).result()
+    asyncio.run(sync_to_async(connections.close_all)())
+
+
+@scenario("actors", needs_db=True)
+def actors():
+    """Per-action latency and actions/s with N concurrent 6-player games."""
+    rows = []
+    created = 0
+    for count in GAME_COUNTS:
+        for label, runner in (("thread hop", _via_thread), ("actor", _via_actors)):
+            managers = [create_game(6, f"bench_actor_{created + i}") for i in range(count)]
+            created += count
+            with mock.patch("game.game_engine.notifier.Notifier.broadcast"):
+                start = time.perf_counter()
+                latencies = asyncio.run(runner(managers))
+                elapsed = time.perf_counter() - start
+            _release_connections()
+            rows += [
+                (f"{count} games, {label}: actions/s", f"{len(latencies) / elapsed:,.0f}"),
+                (
+                    f"{count} games, {label}: latency p50/p99 ms",
+                    f"{_percentile(latencies, 0.5) * 1e3:.2f} / {_percentile(latencies, 0.99) * 1e3:.2f}",
+                ),
+            ]
+    return rows
+
+
+async def _human(actor, player_id, latencies, deadline):
+    """One person in a bot game: plays their turns and disproofs as they come up."""
+    manager = actor.manager
+    rng = random.Random(player_id)
+    while not manager.is_over and time.perf_counter() < deadline:
+        pending = manager.pending_disproof
+        entry = manager.get_current_player()
+        if pending.get("disprover_id") == player_id:
+            action = "choose_disproving_card"
+            kwargs = {"player_id": player_id, "card_name": pending["matching_cards"][0]}
+        elif entry is not None and entry["player_obj"].id == player_id and "disprover_id" not in pending:
+            kwargs = {"player_id": player_id}
+            if not manager.turn_state["has_moved"]:
+                action = "move_player"
+                options = manager.get_available_moves(entry)
+                kwargs["destination_name"] = rng.choice(options)["name"] if options else None
+            elif isinstance(entry["location"], Room) and not manager.turn_state["made_suggestion"]:
+                action = "make_suggestion_action"
+                kwargs.update(suspect=rng.choice(SUSPECTS), weapon=rng.choice(WEAPONS))
+            else:
+                action = "end_turn"
+        else:
+            await asyncio.sleep(0.005)
+            continue
+        start = time.perf_counter()
+        await actor.call(action, **kwargs)
+        latencies.append(time.perf_counter() - start)
+
+
+async def _bot_games(managers):
+    actors = [GameActor(manager) for manager in managers]
+    human_latencies = []
+    deadline = time.perf_counter() + BOT_RUN_SECONDS
+    await asyncio.gather(
+        *(
+            _human(actor, actor.manager.players[0]["player_obj"].id, human_latencies, deadline)
+            for actor in actors
+        ),
+        asyncio.sleep(BOT_RUN_SECONDS),
+    )
+    for actor in actors:
+        await actor.stop()
+    bot_latencies = [latency for actor in actors for latency in actor.bot_latencies]
+    return bot_latencies, human_latencies
+
+
+@scenario("bots", needs_db=True)
+def bots():
+    """Bot decision and human action latency with N games of 1 person and 5 bots."""
+    rows = []
+    for count in BOT_GAME_COUNTS:
+        managers = [create_game(6, f"bench_bots_{count}_{i}") for i in range(count)]
+        for manager in managers:
+            for entry in manager.players[1:]:
+                entry["bot"] = "estimator" if entry["seat"] % 2 else "deducer"
+        with mock.patch("game.game_engine.notifier.Notifier.broadcast"), override_settings(
+            GAME_BOT_DELAY=0
+        ):
+            bot_latencies, human_latencies = asyncio.run(_bot_games(managers))
+        _release_connections()
+        finished = sum(manager.is_over for manager in managers)
+        rows += [
+            (f"{count} games: bot steps/s", f"{len(bot_latencies) / BOT_RUN_SECONDS:,.0f}"),
+            (
+                f"{count} games: bot decision p50/p95/p99 ms",
+                " / ".join(f"{_percentile(bot_latencies, q) * 1e3:.1f}" for q in (0.5, 0.95, 0.99)),
+            ),
+            (
+                f"{count} games: human action p50/p95/p99 ms",
+                " / ".join(f"{_percentile(human_latencies, q) * 1e3:.1f}" for q in (0.5, 0.95, 0.99)),
+            ),
+            (f"{count} games: finished in {BOT_RUN_SECONDS}s", f"{finished}"),
+        ]
+    return rows
+
+
+@scenario("metrics", needs_db=True)
+def metrics_overhead():
+    """Cost of the live-game metrics: one recorded value, and actor throughput with them on and off."""
+    metric = metrics.ACTION_EXECUTION
+    rows = [
+        ("observe() ns", f"{1e9 / rate(lambda: metric.observe('bench', 0.0003), 200_000):,.0f}"),
+        ("render_prometheus() ms", f"{1e3 / rate(metrics.render_prometheus, 200):.3f}"),
+    ]
+    for enabled in (False, True):
+        managers = [
+            create_game(6, f"bench_metrics_{enabled}_{i}") for i in range(METRICS_GAME_COUNT)
+        ]
+        with mock.patch("game.game_engine.notifier.Notifier.broadcast"), override_settings(
+            GAME_METRICS_ENABLED=enabled
+        ):
+            start = time.perf_counter()
+            latencies = asyncio.run(_via_actors(managers))
+            elapsed = time.perf_counter() - start
+        _release_connections()
+        label = f"{METRICS_GAME_COUNT} games, metrics {'on' if enabled else 'off'}"
+        rows += [
+            (f"{label}: actions/s", f"{len(latencies) / elapsed:,.0f}"),
+            (f"{label}: latency p50 ms", f"{_percentile(latencies, 0.5) * 1e3:.3f}"),
+        ]
+    metrics.reset()
+    return rows
@@ -0,0 +1,58 @@
+"""Move generation: ORM queries per move versus the in-memory board graph."""
+
+from django.db import connection, models
+from django.test.utils import CaptureQueriesContext
+
+from game.benchmarks import create_game, rate, scenario
+from game.models import Hallway
+
+ITERATIONS = 2000
+
+
+def _orm_available_moves(manager, player_entry):
+    """Move generation as it worked before the board graph (two queries per room)."""
+    location = player_entry["location"]
+    options = []
+    if isinstance(location, Hallway):
+        for room in (location.room1, location.room2):
+            options.append({"name": room.name, "type": "room", "target": room})
+        return options
+    hallways = Hallway.objects.filter(
+        models.Q(room1=location) | models.Q(room2=location),
+    ).select_related("room1", "room2")
+    for hallway in hallways:
+        occupied = any(
+            not entry["eliminated"]
+            and isinstance(entry["location"], Hallway)
+            and entry["location"].id == hallway.id
+            for entry in manager.players
+        )
+        if not occupied:
+            options.append({"name": hallway.name, "type": "hallway", "target": hallway})
+    for connected_room in location.connected_rooms.all():
+        options.append({"name": connected_room.name, "type": "room", "target": connected_room})
+    return options
+
+
+@scenario("moves", needs_db=True)
+def move_generation():
+    """Move generations per second from a room, ORM lookups vs board graph."""
+    manager = create_game(6, "bench_moves")
+    entry = manager.players[0]
+    # The Kitchen has two hallways and a secret passage: the worst case for the ORM path.
+    entry["location"] = manager.board_nodes[0]
+
+    with CaptureQueriesContext(connection) as orm_queries:
+        _orm_available_moves(manager, entry)
+    with CaptureQueriesContext(connection) as graph_queries:
+        manager.get_available_moves(entry)
+
+    orm_rate = rate(lambda: _orm_available_moves(manager, entry), ITERATIONS)
+    graph_rate = rate(lambda: manager.get_available_moves(entry), ITERATIONS)
+    return [
+        ("queries per move (ORM)", len(orm_queries)),
+        ("queries per move (board graph)", len(graph_queries)),
+        ("moves/s (ORM)", f"{orm_rate:,.0f}"),
+        ("moves/s (board graph)", f"{graph_rate:,.0f}"),
+        ("speed-up", f"{graph_rate / orm_rate:.1f}x"),
+    ]
@@ -0,0 +1,144 @@
+"""Bytes and encode time per action: full snapshots versus per-viewer versioned deltas."""
+
+import json
+import random
+import time
+from unittest import mock
+
+from game.benchmarks import create_game, play_turn, scenario
+from game.game_engine.frames import JSON_BACKENDS, get_encoder
+from game.game_engine.game_manager import STATE_SECTIONS
+
+TURNS = 200
+
+
+@scenario("broadcast", needs_db=True)
+def broadcast():
+    """Game-state bytes per socket and encode time per action, full snapshot vs delta (6 players)."""
+    manager = create_game(6, "bench_broadcast")
+    manager.publish_state()
+    sockets = len(manager.players)
+    totals = {"full_bytes": 0, "full_time": 0.0, "delta_bytes": 0, "delta_time": 0.0}
+    actions = 0
+
+    def measure():
+        nonlocal actions
+        actions += 1
+        start = time.perf_counter()
+        full = json.dumps({"type": "game_state", "game_state": manager.serialize_state()})
+        totals["full_time"] += time.perf_counter() - start
+        totals["full_bytes"] += len(full.encode())
+
+        start = time.perf_counter()
+        frame = manager.publish_state()
+        delta = json.dumps(
+            {"type": "game_state_delta", "version": frame["version"], "changes": frame["changes"]}
+        )
+        private = [
+            json.dumps({"type": "private_state", "version": frame["version"], "private": payload})
+            for payload in frame["private"].values()
+        ]
+        totals["delta_time"] += time.perf_counter() - start
+        # Every socket gets the public delta; each private frame goes to one player
+        totals["delta_bytes"] += len(delta.encode()) + sum(len(p.encode()) for p in private) / sockets
+
+    rng = random.Random(7)
+    with mock.patch("game.game_engine.notifier.Notifier.broadcast"):
+        for _ in range(TURNS):
+            play_turn(manager, rng, measure)
+
+    return [
+        ("actions", actions),
+        ("bytes/socket/action (full snapshot)", f"{totals['full_bytes'] / actions:,.0f}"),
+        ("bytes/socket/action (public delta + own private)", f"{totals['delta_bytes'] / actions:,.0f}"),
+        ("encode us/action (full snapshot)", f"{totals['full_time'] / actions * 1e6:,.1f}"),
+        ("encode us/action (diff + deltas)", f"{totals['delta_time'] / actions * 1e6:,.1f}"),
+    ]
+
+
+def _serialize_all(manager):
+    manager.serialize_public_state()
+    for entry in manager.players:
+        manager.serialize_private_state(entry)
+
+
+@scenario("serialize", needs_db=True)
+def serialize():
+    """Public + private serialization per action: full rebuild vs dirty sections (6 players)."""
+    manager = create_game(6, "bench_serialize")
+    totals = {"rebuild": 0.0, "dirty": 0.0, "repeat": 0.0}
+    actions = 0
+
+    def measure():
+        nonlocal actions
+        actions += 1
+        start = time.perf_counter()
+        _serialize_all(manager)
+        totals["dirty"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        _serialize_all(manager)
+        totals["repeat"] += time.perf_counter() - start
+
+        # What every call cost before sections were cached
+        start = time.perf_counter()
+        manager._mark_dirty(*STATE_SECTIONS)
+        manager._mark_knowledge_dirty(*manager.players)
+        _serialize_all(manager)
+        totals["rebuild"] += time.perf_counter() - start
+
+    rng = random.Random(7)
+    with mock.patch("game.game_engine.notifier.Notifier.broadcast"):
+        for _ in range(TURNS):
+            play_turn(manager, rng, measure)
+
+    return [
+        ("actions", actions),
+        ("serialize us/action (full rebuild)", f"{totals['rebuild'] / actions * 1e6:,.1f}"),
+        ("serialize us/action (dirty sections)", f"{totals['dirty'] / actions * 1e6:,.1f}"),
+        ("serialize us/call (repeat, nothing dirty)", f"{totals['repeat'] / actions * 1e6:,.2f}"),
+    ]
+
+
+ROOM_SIZES = (6, 12, 24, 48)
+
+
+@scenario("fanout", needs_db=True)
+def fanout():
+    """Encode CPU per action as room size grows: encode per consumer vs encode once."""
+    manager = create_game(6, "bench_fanout")
+    manager.publish_state()
+    payloads = []
+
+    def record():
+        frame = manager.publish_state()
+        if frame["changes"]:
+            payloads.append(
+                {"type": "game_state_delta", "version": frame["version"], "changes": frame["changes"]}
+            )
+
+    rng = random.Random(7)
+    with mock.patch("game.game_engine.notifier.Notifier.broadcast"):
+        for _ in range(TURNS):
+            play_turn(manager, rng, record)
+    # Keep the snapshot's share realistic: one full state per ten deltas
+    payloads += [{"type": "game_state", "game_state": manager.serialize_public_state()}] * (
+        len(payloads) // 10
+    )
+
+    def encode_us(encode, copies):
+        start = time.perf_counter()
+        for payload in payloads:
+            for _ in range(copies):
+                encode(payload)
+        return (time.perf_counter() - start) / len(payloads) * 1e6
+
+    rows = [("frames", len(payloads))]
+    for sockets in ROOM_SIZES:
+        per_consumer = encode_us(json.dumps, sockets)
+        rows.append((f"encode us/action, {sockets} sockets (per consumer)", f"{per_consumer:,.1f}"))
+    # Encoding once before group_send costs the same for any room size
+    for backend in JSON_BACKENDS:
+        once = encode_us(get_encoder(backend), 1)
+        rows.append((f"encode us/action, any size (once, {backend})", f"{once:,.1f}"))
+    return rows
@@ -0,0 +1,166 @@
+"""Disproof matching (card-name strings versus bit masks), deduction and estimator cost."""
+
+import itertools
+import random
+import time
+from unittest import mock
+
+from game.benchmarks import create_game, rate, scenario
+from game.game_engine.constants import ROOMS, WEAPONS
+from game.game_engine.deck import CARD_CATALOG, deal_hands
+from game.game_engine.deduction import Deduction
+from game.game_engine.estimator import np, sample_envelope, uniform_estimate
+from game.game_engine.suggestion import NO_HOLDER, build_holder_index, find_first_disprover
+
+ITERATIONS = 50000
+
+
+def _string_disproof(players, suggester, suspect, weapon, room_name):
+    """First-disprover search as it worked with string hands."""
+    idx = players.index(suggester)
+    for p in players[idx + 1:] + players[:idx]:
+        matching_cards = [card for card in p["hand"] if card in {suspect, weapon, room_name}]
+        if matching_cards:
+            return p, matching_cards
+    return None, []
+
+
+def _mask_disproof(players, suggester, suspect, weapon, room_name):
+    """The same rotating search over CARD_CATALOG bit masks."""
+    idx = players.index(suggester)
+    suggested = CARD_CATALOG.mask((suspect, weapon, room_name))
+    for p in players[idx + 1:] + players[:idx]:
+        matching = p["hand"] & suggested
+        if matching:
+            return p, CARD_CATALOG.names_of(matching)
+    return None, []
+
+
+@scenario("suggestions", needs_db=True)
+def suggestions():
+    """Suggestions per second at 6 players (broadcasts stubbed out)."""
+    manager = create_game(6, "bench_suggestions")
+    engine = manager.suggestion_engine
+    suggester = manager.players[0]
+    # Suggest the suggester's own character so nobody is moved between rooms
+    combos = itertools.cycle(
+        [(suggester["name"], weapon, room) for weapon in WEAPONS for room in ROOMS]
+    )
+    string_players = [
+        dict(entry, hand=CARD_CATALOG.names_of(entry["hand"])) for entry in manager.players
+    ]
+
+    with mock.patch("game.game_engine.suggestion.Notifier.broadcast"):
+        mask_rate = rate(lambda: engine.handle_suggestion(suggester, *next(combos)), ITERATIONS)
+    string_rate = rate(
+        lambda: _string_disproof(string_players, string_players[0], *next(combos)),
+        ITERATIONS,
+    )
+    bitmask_rate = rate(
+        lambda: _mask_disproof(manager.players, suggester, *next(combos)),
+        ITERATIONS,
+    )
+    holders, index = engine.holders, CARD_CATALOG.index
+
+    def indexed():
+        suspect, weapon, room = next(combos)
+        return find_first_disprover(
+            holders, 0, 6, (index[suspect], index[weapon], index[room])
+        )
+
+    indexed_rate = rate(indexed, ITERATIONS)
+    return [
+        ("disproof searches/s (string hands)", f"{string_rate:,.0f}"),
+        ("disproof searches/s (bit masks)", f"{bitmask_rate:,.0f}"),
+        ("disproof searches/s (holder index)", f"{indexed_rate:,.0f}"),
+        ("handle_suggestion/s", f"{mask_rate:,.0f}"),
+    ]
+
+
+@scenario("deduction")
+def deduction():
+    """Incremental deduction update cost in 6-player games of 60 suggestions."""
+    rng = random.Random(3)
+    card_count = len(CARD_CATALOG.names)
+    updates = 0
+    elapsed = 0.0
+    candidates = naive = 0
+    games = 300
+    for _ in range(games):
+        solution = (rng.randrange(6), rng.randrange(6, 12), rng.randrange(12, card_count))
+        hands = deal_hands([card for card in range(card_count) if card not in solution], 6, rng)
+        holders = build_holder_index(hands)
+        players = [Deduction(seat, hands) for seat in range(6)]
+        known = list(hands)
+        for _ in range(60):
+            suggester = rng.randrange(6)
+            cards = (rng.randrange(6), rng.randrange(6, 12), rng.randrange(12, card_count))
+            mask = (1 << cards[0]) | (1 << cards[1]) | (1 << cards[2])
+            disprover = find_first_disprover(holders, suggester, 6, cards)
+            start = time.perf_counter()
+            if disprover == NO_HOLDER:
+                for player in players:
+                    player.observe_suggestion(suggester, mask, None)
+            else:
+                for player in players:
+                    player.observe_suggestion(suggester, mask, disprover)
+                shown = next(card for card in cards if hands[disprover] >> card & 1)
+                players[suggester].observe_card(disprover, shown)
+                known[suggester] |= 1 << shown
+            elapsed += time.perf_counter() - start
+            updates += 1
+        for seat, player in enumerate(players):
+            candidates += player.candidates.bit_count()
+            naive += card_count - known[seat].bit_count()
+
+    return [
+        ("update, one player (us)", f"{elapsed / updates / 6 * 1e6:,.2f}"),
+        ("update, all 6 players per suggestion (us)", f"{elapsed / updates * 1e6:,.2f}"),
+        ("candidate cards after 60 suggestions", f"{candidates / games / 6:.2f}"),
+        ("  hand + shown cards only", f"{naive / games / 6:.2f}"),
+    ]
+
+
+
+@scenario("estimator")
+def estimator():
+    """Monte Carlo envelope estimates for one player after 0, 10 and 30 suggestions."""
+    if np is None:
+        return [("numpy", "not installed; estimates are uniform")]
+    rng = random.Random(5)
+    card_count = len(CARD_CATALOG.names)
+    samples = 2000
+    rows = []
+    for suggestions in (0, 10, 30):
+        elapsed = 0.0
+        sampled = uniform = 0.0
+        accepted = drawn = 0
+        games = 20
+        for game in range(games):
+            solution = (rng.randrange(6), rng.randrange(6, 12), rng.randrange(12, card_count))
+            hands = deal_hands([card for card in range(card_count) if card not in solution], 6, rng)
+            holders = build_holder_index(hands)
+            player = Deduction(0, hands)
+            for _ in range(suggestions):
+                suggester = rng.randrange(6)
+                cards = (rng.randrange(6), rng.randrange(6, 12), rng.randrange(12, card_count))
+                mask = (1 << cards[0]) | (1 << cards[1]) | (1 << cards[2])
+                disprover = find_first_disprover(holders, suggester, 6, cards)
+                player.observe_suggestion(suggester, mask, None if disprover == NO_HOLDER else disprover)
+                if suggester == 0 and disprover != NO_HOLDER:
+                    player.observe_card(disprover, next(c for c in cards if hands[disprover] >> c & 1))
+            start = time.perf_counter()
+            odds, kept, draws = sample_envelope(player, samples, seed=game)
+            elapsed += time.perf_counter() - start
+            accepted += kept
+            drawn += draws
+            sampled += sum(odds[card] for card in solution) / 3
+            uniform += sum(uniform_estimate(player)[card] for card in solution) / 3
+        rows += [
+            (f"after {suggestions} suggestions: estimate (ms)", f"{elapsed / games * 1000:,.2f}"),
+            ("  deals drawn/sec", f"{drawn / elapsed:,.0f}"),
+            ("  accepted (consistent) samples/sec", f"{accepted / elapsed:,.0f}"),
+            ("  odds given to the solution cards", f"{sampled / games:.3f}"),
+            ("  uniform over candidates", f"{uniform / games:.3f}"),
+        ]
+    return rows
@@ -0,0 +1,39 @@
+"""Requests/s for polled REST endpoints, full responses against 304s by ETag."""
+
+from unittest import mock
+
+from django.test import Client
+
+from game.benchmarks import create_game, create_lobby_players, rate, scenario
+
+LOBBIES = 4
+PLAYERS_PER_LOBBY = 3
+REQUESTS = 300
+
+
+@scenario("conditional_get", needs_db=True)
+def conditional_get():
+    """Requests/s for unchanged lobbies and game state: full GET vs If-None-Match 304."""
+    client = Client(HTTP_HOST="localhost")
+    players = []
+    for index in range(LOBBIES):
+        players += create_lobby_players(PLAYERS_PER_LOBBY, f"bench-conditional-{index}")
+    with mock.patch("game.game_engine.notifier.Notifier.broadcast"):
+        create_game(PLAYERS_PER_LOBBY, "bench_conditional")
+
+    paths = {
+        "get_lobby": f"/api/lobbies/{players[0].lobby_id}/",
+        "list_lobbies": "/api/lobbies/",
+        "get_player_lobby": f"/api/player/{players[0].id}/lobby/",
+        "game_state": "/api/games/state/?game_name=bench_conditional",
+    }
+    rows = []
+    for name, path in paths.items():
+        etag = client.get(path)["ETag"]
+        full = rate(lambda: client.get(path), REQUESTS)
+        unchanged = rate(lambda: client.get(path, HTTP_IF_NONE_MATCH=etag), REQUESTS)
+        if client.get(path, HTTP_IF_NONE_MATCH=etag).status_code != 304:
+            raise AssertionError(f"{name} did not answer its own ETag with a 304")
+        rows.append((f"{name}: 200 requests/s", f"{full:,.0f}"))
+        rows.append((f"{name}: 304 requests/s", f"{unchanged:,.0f} ({unchanged / full:.1f}x)"))
+    return rows
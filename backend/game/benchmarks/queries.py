@@ -0,0 +1,149 @@
+"""Queries per request for the lobby and game endpoints, against their budgets."""
+
+from typing import Dict, List, NamedTuple
+
+from django.test import Client
+
+from game.benchmarks import scenario
+from game.game_engine.constants import SUSPECTS
+from game.game_engine.query_audit import QueryAudit
+from game.game_engine.session_registry import remove_session
+
+# Lobbies already open when the endpoints are measured, each with this many
+# players who have picked characters
+OTHER_LOBBIES = 3
+PLAYERS_PER_LOBBY = 3
+
+
+class Budget(NamedTuple):
+    queries: int
+    # Whether a query may repeat per row (a known N+1)
+    repeats: bool = False
+
+
+# Today's counts with the fixture above; lower them as endpoints improve.
+# Known N+1s: the lobby serializer loads each player's card on its own, and
+# starting a game seats each player with queries of its own.
+ENDPOINT_BUDGETS: Dict[str, Budget] = {
+    "create_player": Budget(2),
+    "create_new_lobby": Budget(8),
+    "join_lobby": Budget(9),
+    "select_character": Budget(10),
+    "add_bot": Budget(11, repeats=True),
+    "remove_bot": Budget(8),
+    "get_lobby": Budget(5, repeats=True),
+    "list_lobbies": Budget(2),
+    "get_player_lobby": Budget(7, repeats=True),
+    "start_game": Budget(33, repeats=True),
+    "game_state": Budget(2),
+    "return_to_character_select": Budget(3),
+    "leave_lobby": Budget(9),
+}
+
+
+def measure_endpoints() -> Dict[str, QueryAudit]:
+    """
+    Walk one lobby from creation to a started game and back through the HTTP
+    API, auditing each request. Returns the last audit of each endpoint, by
+    name, in the order first called.
+    """
+    client = Client(HTTP_HOST="localhost")
+    audits: Dict[str, QueryAudit] = {}
+
+    def call(name, method, path, data=None):
+        with QueryAudit(name) as audit:
+            if method == "get":
+                response = client.get(path)
+            else:
+                response = client.post(path, data or {}, content_type="application/json")
+        if response.status_code != 200:
+            raise AssertionError(f"{name} returned {response.status_code}: {response.content[:200]!r}")
+        audits[name] = audit
+        return response.json()
+
+    def new_player():
+        return client.post("/api/player/create/", {}, content_type="application/json").json()["id"]
+
+    other_ids = []
+    for index in range(OTHER_LOBBIES):
+        owner = new_player()
+        lobby = client.post(
+            "/api/lobbies/create/",
+            {"name": f"queries-other-{index}", "player_id": owner},
+            content_type="application/json",
+        ).json()
+        other_ids.append(lobby["id"])
+        for seat, name in enumerate(SUSPECTS[:PLAYERS_PER_LOBBY]):
+            player = owner if not seat else new_player()
+            if seat:
+                client.post(
+                    f"/api/lobbies/{lobby['id']}/join/",
+                    {"player_id": player},
+                    content_type="application/json",
+                )
+            client.post(
+                f"/api/lobbies/{lobby['id']}/select-character/",
+                {"player_id": player, "character_name": name},
+                content_type="application/json",
+            )
+
+    # The first game in a database also creates the board and cards
+    client.post(f"/api/lobbies/{other_ids[0]}/start/", {}, content_type="application/json")
+
+    host = call("create_player", "post", "/api/player/create/")["id"]
+    lobby_id = call(
+        "create_new_lobby", "post", "/api/lobbies/create/", {"name": "queries", "player_id": host}
+    )["id"]
+    guest = new_player()
+    call("join_lobby", "post", f"/api/lobbies/{lobby_id}/join/", {"player_id": guest})
+    for player, name in ((host, SUSPECTS[0]), (guest, SUSPECTS[1])):
+        call(
+            "select_character",
+            "post",
+            f"/api/lobbies/{lobby_id}/select-character/",
+            {"player_id": player, "character_name": name},
+        )
+    bot = call("add_bot", "post", f"/api/lobbies/{lobby_id}/bots/add/", {})["players"][-1]["id"]
+    call("remove_bot", "post", f"/api/lobbies/{lobby_id}/bots/remove/", {"player_id": bot})
+    call("add_bot", "post", f"/api/lobbies/{lobby_id}/bots/add/", {})
+    call("get_lobby", "get", f"/api/lobbies/{lobby_id}/")
+    call("list_lobbies", "get", "/api/lobbies/")
+    call("get_player_lobby", "get", f"/api/player/{guest}/lobby/")
+    call("start_game", "post", f"/api/lobbies/{lobby_id}/start/")
+    call("game_state", "get", f"/api/games/state/?game_name=lobby_{lobby_id}")
+    call(
+        "return_to_character_select",
+        "post",
+        f"/api/lobbies/{lobby_id}/return-to-character-select/",
+    )
+    call("leave_lobby", "post", f"/api/lobbies/{lobby_id}/leave/", {"player_id": guest})
+    for name in (lobby_id, other_ids[0]):
+        remove_session(f"lobby_{name}")
+    return audits
+
+
+def over_budget(audits: Dict[str, QueryAudit]) -> List[str]:
+    """A line for every endpoint over its budget, or repeating queries when it may not."""
+    problems = []
+    for name, audit in audits.items():
+        budget = ENDPOINT_BUDGETS.get(name)
+        if budget is None:
+            problems.append(f"{name} has no query budget ({audit.count} queries)")
+            continue
+        if audit.count > budget.queries:
+            problems.append(f"{name}: {audit.count} queries, budget {budget.queries}\n{audit.report()}")
+        elif not budget.repeats and audit.repeated():
+            problems.append(f"{name} repeats queries (N+1)\n{audit.report()}")
+    return problems
+
+
+@scenario("queries", needs_db=True)
+def queries():
+    """Queries per request for each lobby and game endpoint, with repeated (N+1) shapes."""
+    rows = []
+    for name, audit in measure_endpoints().items():
+        budget = ENDPOINT_BUDGETS.get(name)
+        rows.append((f"{name}: queries / budget", f"{audit.count} / {budget.queries if budget else '-'}"))
+        for shape, count in audit.repeated().items():
+            rows.append((f"  repeated {count}x", shape[:100]))
+    return rows
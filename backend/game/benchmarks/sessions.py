@@ -0,0 +1,91 @@
+"""Checkpoint size, snapshot/restore speed and event log replay speed."""
+
+import json
+import random
+import tempfile
+import time
+from unittest import mock
+
+from django.test import override_settings
+
+from game.benchmarks import create_game, play_turn, scenario
+from game.game_engine.checkpoints import dump_manager, load_manager, save_checkpoint
+from game.game_engine.event_log import read_log, replay
+from game.game_engine.session_registry import list_sessions, remove_session, restore_all
+
+GAMES = 10000
+
+
+@scenario("restore", needs_db=True)
+def restore():
+    """Snapshot and restore of 10k 6-player games from checkpoint files."""
+    manager = create_game(6, "bench_restore")
+    rng = random.Random(7)
+    with mock.patch("game.game_engine.notifier.Notifier.broadcast"):
+        for _ in range(30):
+            play_turn(manager, rng)
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        data = dump_manager(manager)
+    snapshot_us = (time.perf_counter() - start) / 1000 * 1e6
+    start = time.perf_counter()
+    for _ in range(1000):
+        load_manager(data)
+    load_us = (time.perf_counter() - start) / 1000 * 1e6
+
+    snapshot = json.loads(data)
+    with tempfile.TemporaryDirectory() as directory, override_settings(
+        GAME_CHECKPOINT_DIR=directory
+    ):
+        for index in range(GAMES):
+            snapshot["name"] = f"bench_restore_{index}"
+            save_checkpoint(snapshot["name"], json.dumps(snapshot, separators=(",", ":")).encode())
+
+        start = time.perf_counter()
+        restored = restore_all()
+        elapsed = time.perf_counter() - start
+        for name in list(list_sessions()):
+            remove_session(name)
+
+    return [
+        ("checkpoint bytes/game", f"{len(data):,}"),
+        ("snapshot + encode us/game", f"{snapshot_us:,.1f}"),
+        ("decode + from_snapshot us/game", f"{load_us:,.1f}"),
+        (f"restore_all, {restored:,} games from disk (s)", f"{elapsed:.2f}"),
+    ]
+
+
+@scenario("replay", needs_db=True)
+def replay_speed():
+    """Event log size and replay speed of a 6-player game of 60 turns."""
+    with tempfile.TemporaryDirectory() as directory, override_settings(
+        GAME_EVENT_LOG_DIR=directory
+    ):
+        manager = create_game(6, "bench_replay")
+        rng = random.Random(7)
+        start = time.perf_counter()
+        with mock.patch("game.game_engine.notifier.Notifier.broadcast"):
+            for _ in range(60):
+                play_turn(manager, rng)
+            # The benchmark players never accuse; end with a correct accusation
+            manager.make_accusation_action(
+                manager.get_current_player()["player_obj"].id, **manager.solution
+            )
+        played = time.perf_counter() - start
+        log_bytes = manager.events.size
+        start_snapshot, events = read_log(manager.events.path)
+
+    runs = 200
+    start = time.perf_counter()
+    for _ in range(runs):
+        replay(start_snapshot, events)
+    replayed = (time.perf_counter() - start) / runs
+
+    return [
+        ("events / log bytes", f"{len(events):,} / {log_bytes:,}"),
+        ("play through GameManager (ms)", f"{played * 1000:,.2f}"),
+        ("replay (ms)", f"{replayed * 1000:,.2f}"),
+        ("replay events/s", f"{len(events) / replayed:,.0f}"),
+    ]
+
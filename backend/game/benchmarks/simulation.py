@@ -0,0 +1,41 @@
+"""Headless simulation throughput, on one core and across a process pool."""
+
+import os
+import time
+
+from game.benchmarks import scenario
+from game.game_engine.simulation import simulate_games
+from game.game_engine.simulation_pool import run_batch
+
+GAMES = 2000
+
+
+@scenario("simulate")
+def simulate():
+    """Full 6-player bot games per minute with the database-free simulator."""
+    rows = []
+    for bots in ("deducer", "random"):
+        start = time.perf_counter()
+        summary = simulate_games(GAMES, seed=1, bots=bots)
+        elapsed = time.perf_counter() - start
+        rows += [
+            (f"{bots}: games/min", f"{GAMES / elapsed * 60:,.0f}"),
+            (
+                f"{bots}: average turns / completed",
+                f"{summary['average_turns']} / {summary['completed']:,}",
+            ),
+        ]
+    return rows
+
+
+@scenario("simulate_pool")
+def simulate_pool():
+    """Batch throughput with 1, 2 and one-per-CPU worker processes."""
+    games = 20000
+    rows = []
+    for workers in sorted({1, 2, os.cpu_count() or 1}):
+        start = time.perf_counter()
+        run_batch(games, seed=1, workers=workers)
+        elapsed = time.perf_counter() - start
+        rows.append((f"{workers} worker(s): games/min", f"{games / elapsed * 60:,.0f}"))
+    return rows
@@ -0,0 +1,87 @@
+"""Committed write throughput with many games on a SQLite file."""
+
+import asyncio
+import time
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.db import connection, connections
+from django.test import override_settings
+
+from game.benchmarks import create_game, scenario
+from game.benchmarks.actors import _percentile, _via_actors
+from game.game_engine.writer import WRITER
+from game.models import Player
+
+GAME_COUNT = 100
+UPDATE_ROUNDS = 20
+
+
+def _close_connections():
+    """Reopen every connection, so the next run's pragmas apply to all of them."""
+    WRITER.submit(connections.close_all).result()
+    asyncio.run(sync_to_async(connections.close_all)())
+    connections.close_all()
+
+
+def _plain_sqlite():
+    """Leave WAL, which persists in the file, for SQLite's default rollback journal."""
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode = delete")
+
+
+def _set_active_turn(player_ids, value):
+    Player.objects.filter(id__in=player_ids).update(is_active_turn=value)
+
+
+def _write_rounds(managers):
+    """
+    Every game queues one UPDATE of its players per round, UPDATE_ROUNDS
+    times, with no game logic in between: the database is the bottleneck.
+    Returns the number of writes.
+    """
+    futures = []
+    for round_number in range(UPDATE_ROUNDS):
+        for manager in managers:
+            player_ids = [entry["player_obj"].id for entry in manager.players]
+            futures.append(WRITER.submit(_set_active_turn, player_ids, bool(round_number % 2)))
+    for future in futures:
+        future.result()
+    return len(futures)
+
+
+@scenario("writes", needs_db=True, file_db=True)
+def writes():
+    """Committed actions and UPDATEs/s with 100 concurrent games: plain SQLite vs WAL and the batching writer."""
+    rows = []
+    for enabled in (False, True):
+        label = f"{GAME_COUNT} games, concurrency mode {'on' if enabled else 'off'}"
+        with override_settings(GAME_SQLITE_CONCURRENCY=enabled):
+            _close_connections()
+            if not enabled:
+                _plain_sqlite()
+            managers = [create_game(6, f"bench_writes_{enabled}_{i}") for i in range(GAME_COUNT)]
+            jobs, batches = WRITER.stats["jobs"], WRITER.stats["batches"]
+            with mock.patch("game.game_engine.notifier.Notifier.broadcast"):
+                start = time.perf_counter()
+                latencies = asyncio.run(_via_actors(managers))
+                # Every queued flush has committed once a later job has run
+                WRITER.submit(lambda: None).result()
+                elapsed = time.perf_counter() - start
+            jobs = WRITER.stats["jobs"] - jobs
+            batches = WRITER.stats["batches"] - batches
+
+            start = time.perf_counter()
+            updates = _write_rounds(managers)
+            update_elapsed = time.perf_counter() - start
+            _close_connections()
+        rows += [
+            (f"{label}: committed actions/s", f"{len(latencies) / elapsed:,.0f}"),
+            (
+                f"{label}: latency p50/p99 ms",
+                f"{_percentile(latencies, 0.5) * 1e3:.2f} / {_percentile(latencies, 0.99) * 1e3:.2f}",
+            ),
+            (f"{label}: writes per transaction", f"{jobs / batches:.1f}" if batches else "-"),
+            (f"{label}: queued UPDATEs committed/s", f"{updates / update_elapsed:,.0f}"),
+        ]
+    return rows
@@ -1,26 +1,43 @@
+import asyncio
 import json
+import time
 import uuid
 
 from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 
-from game.game_engine.session_registry import get_session, remove_session
-from game.models import Game, LobbyPlayer
+from game.game_engine.actor import get_actor, stop_actor
+from game.game_engine.broadcasts import (
+    player_group,
+    send_action_frames,
+    send_outbox,
+    send_state_frame,
+)
+from game.game_engine.frames import encode_frame
+from game.game_engine.lobby_directory import LOBBY_DIRECTORY, LOBBY_GROUP, apublish
+from game.game_engine.metrics import THREAD_POOL, current_action
+from game.game_engine.player_tokens import issue_player_token, read_player_token
+from game.game_engine.session_registry import aget_session, remove_session
+from game.game_engine.writer import serialized_write
+from game.models import Game, LobbyPlayer, Player
 
 
 class GameConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.room_name = self.scope["url_route"]["kwargs"]["room_name"]
         self.room_group_name = f"game_{self.room_name}"
+        # Set once the client identifies which game player it is viewing as
+        self.player_id = None
         await self.channel_layer.group_add(self.room_group_name, self.channel_name)
         await self.accept()
-
-        state = await self.get_game_state()
-        if state:
-            await self.send_json({"type": "game_state", "game_state": state})
+        await self._send_snapshot()
 
     async def disconnect(self, close_code):
         await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+        if self.player_id is not None:
+            await self.channel_layer.group_discard(
+                self._player_group(self.player_id), self.channel_name
+            )
 
     async def receive(self, text_data):
         data = json.loads(text_data)
@@ -36,11 +53,65 @@ class GameConsumer(AsyncWebsocketConsumer):
             await self._handle_make_accusation(data)
         elif msg_type == "end_turn":
             await self._handle_end_turn(data)
+        elif msg_type == "identify":
+            await self._handle_identify(data)
+        elif msg_type == "request_hint":
+            await self._handle_request_hint()
+        elif msg_type == "sync_state":
+            # Client saw a version gap in the deltas and needs a full snapshot
+            await self._send_snapshot()
         else:
             await self.send_json(
                 {"type": "error", "message": f"Unsupported action: {msg_type}"}
             )
 
+    async def _handle_identify(self, data):
+        """Subscribe this socket to one player's private state and events."""
+        player_id = data.get("player_id")
+        if player_id is None:
+            await self._send_error("Player ID is required to identify.")
+            return
+        player_id = int(player_id)
+        lobby_player_id = read_player_token(data.get("token"))
+        if lobby_player_id is None:
+            await self._send_error("A valid player token is required to identify.")
+            return
+        if not await self._owns_game_player(player_id, lobby_player_id):
+            await self._send_error("Player is not yours in this game.")
+            return
+
+        if self.player_id is not None and self.player_id != player_id:
+            await self.channel_layer.group_discard(
+                self._player_group(self.player_id), self.channel_name
+            )
+        self.player_id = player_id
+        await self.channel_layer.group_add(self._player_group(player_id), self.channel_name)
+        await self._send_snapshot()
+
+    async def _handle_request_hint(self):
+        """Send this socket's player their envelope odds; nobody else sees them."""
+        if self.player_id is None:
+            await self._send_error("Identify as a player before asking for a hint.")
+            return
+        actor = await get_actor(f"lobby_{self.room_name}")
+        if actor is None:
+            await self._send_error("Game session is not initialized.")
+            return
+        result = await actor.hint(self.player_id)
+        if not result.get("success"):
+            await self._send_error(result.get("error", "Unable to get a hint."))
+            return
+        await self.send_json(
+            {
+                "type": "hint",
+                "player_id": self.player_id,
+                "probabilities": result["probabilities"],
+            }
+        )
+
+    def _player_group(self, player_id):
+        return player_group(self.room_group_name, player_id)
+
     async def _handle_make_move(self, data):
         player_id = data.get("player_id")
         if player_id is None:
@@ -86,29 +157,11 @@ class GameConsumer(AsyncWebsocketConsumer):
             await self._send_error(result.get("error", "Suggestion failed."))
             return
 
-        # If awaiting_disproof, send disprove_prompt to the disprover
-        if result.get("awaiting_disproof"):
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    "type": "disprove_prompt",
-                    "disprover_id": result.get("disprover_id"),
-                    "disprover_name": result.get("disprover_name"),
-                    "suggester_name": result.get("suggester_name"),
-                    "matching_cards": result.get("matching_cards", []),
-                },
-            )
-            await self._broadcast_game_state()
-        else:
-            # No one can disprove - send message to clear disproof state BEFORE game state
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    "type": "suggestion_not_disproved",
-                    "suggester_name": result.get("suggester_name"),
-                },
-            )
-            await self._broadcast_game_state()
+        # Disprove prompt (cards for the disprover only) or "not disproved"
+        await send_action_frames(
+            self.channel_layer, self.room_group_name, "make_suggestion_action", result
+        )
+        await self._broadcast_game_state()
 
     async def _handle_choose_disproving_card(self, data):
         player_id = data.get("player_id")
@@ -131,18 +184,9 @@ class GameConsumer(AsyncWebsocketConsumer):
             return
 
         # Send private card reveal to the suggester
-        suggester_id = result.get("suggester_id")
-        if suggester_id:
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    "type": "disproof_result",
-                    "suggester_id": suggester_id,
-                    "card": result.get("card"),
-                    "disprover_name": result.get("disprover_name"),
-                    "suggester_name": result.get("suggester_name"),
-                },
-            )
+        await send_action_frames(
+            self.channel_layer, self.room_group_name, "choose_disproving_card", result
+        )
 
         # Broadcast the result to all players
         await self._broadcast_game_state()
@@ -169,7 +213,6 @@ class GameConsumer(AsyncWebsocketConsumer):
         await self._broadcast_game_state()
         if result.get("game_over"):
             # Give a small delay to ensure the broadcast is sent before removing session
-            import asyncio
             await asyncio.sleep(0.1)
             await self._remove_session()
 
@@ -189,24 +232,40 @@ class GameConsumer(AsyncWebsocketConsumer):
         await self._broadcast_game_state()
         if result.get("game_over"):
             # Give a small delay to ensure the broadcast is sent before removing session
-            import asyncio
             await asyncio.sleep(0.1)
             await self._remove_session()
 
-    async def _broadcast_game_state(self):
-        state = await self.get_game_state()
-        if not state:
+    async def _send_snapshot(self):
+        """Send this socket a full, versioned snapshot of the game state."""
+        current_action.set("snapshot")
+        frame = await self._publish_state()
+        if not frame:
             return
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                "type": "forward_game_state",
-                "game_state": state,
-            },
+        await self.send_json(
+            {"type": "game_state", "version": frame["version"], "game_state": frame["state"]}
         )
+        if self.player_id is not None and frame.get("viewer_private"):
+            await self.send_json(
+                {
+                    "type": "private_state",
+                    "version": frame["version"],
+                    "private": frame["viewer_private"],
+                }
+            )
+        # Publishing may have moved the version on; bring the rest of the room along
+        await self._group_send_frame(frame)
+
+    async def _broadcast_game_state(self):
+        frame = await self._publish_state()
+        if frame:
+            await self._group_send_frame(frame)
+
+    async def _group_send_frame(self, frame):
+        await send_state_frame(self.channel_layer, self.room_group_name, frame)
 
-    async def forward_game_state(self, event):
-        await self.send_json({"type": "game_state", "game_state": event["game_state"]})
+    async def forward_frame(self, event):
+        """Forward a message that was encoded once for the whole group."""
+        await self.send(text_data=event["text"])
 
     async def return_to_character_select(self, event):
         """Notify clients to return to character select screen."""
@@ -215,55 +274,6 @@ class GameConsumer(AsyncWebsocketConsumer):
             "message": event.get("message", "Returning to character select")
         })
 
-    async def game_message(self, event):
-        message = event.get("message")
-        if message is None:
-            return
-        await self.send_json(
-            {
-                "type": "game_message",
-                "message": message,
-            }
-        )
-
-    async def disprove_prompt(self, event):
-        """Send disprove prompt to the disprover."""
-        disprover_id = event.get("disprover_id")
-        disprover_name = event.get("disprover_name")
-        suggester_name = event.get("suggester_name")
-        matching_cards = event.get("matching_cards", [])
-        
-        await self.send_json({
-            "type": "disprove_prompt",
-            "disprover_id": disprover_id,
-            "disprover_name": disprover_name,
-            "suggester_name": suggester_name,
-            "matching_cards": matching_cards,
-        })
-
-    async def disproof_result(self, event):
-        """Send private card reveal to the suggester."""
-        suggester_id = event.get("suggester_id")
-        card = event.get("card")
-        disprover_name = event.get("disprover_name")
-        suggester_name = event.get("suggester_name")
-        
-        # Only send to suggester (client checks if this is their ID)
-        await self.send_json({
-            "type": "disproof_result",
-            "suggester_id": suggester_id,
-            "card": card,
-            "disprover_name": disprover_name,
-            "suggester_name": suggester_name,
-        })
-
-    async def suggestion_not_disproved(self, event):
-        """Notify all clients that the suggestion could not be disproved."""
-        await self.send_json({
-            "type": "suggestion_not_disproved",
-            "suggester_name": event.get("suggester_name"),
-        })
-
     async def clear_log(self, event):
         """Notify all clients to clear their game log."""
         await self.send_json({
@@ -274,30 +284,80 @@ class GameConsumer(AsyncWebsocketConsumer):
         await self.send_json({"type": "error", "message": message})
 
     async def send_json(self, payload):
-        await self.send(text_data=json.dumps(payload))
+        await self.send(text_data=encode_frame(payload))
 
-    @database_sync_to_async
-    def _manager_call(self, action: str, **kwargs):
-        game_name = f"lobby_{self.room_name}"
-        manager = get_session(game_name)
-        if manager is None:
+    async def _manager_call(self, action: str, **kwargs):
+        """Run a GameManager action on the game's actor, then send its log messages as one frame."""
+        actor = await get_actor(f"lobby_{self.room_name}")
+        if actor is None:
             return {"success": False, "error": "Game session is not initialized."}
-        handler = getattr(manager, action, None)
-        if handler is None:
-            return {"success": False, "error": f"Unsupported action '{action}'."}
-        return handler(**kwargs)
-
-    @database_sync_to_async
-    def _remove_session(self):
-        remove_session(f"lobby_{self.room_name}")
+        # The frames this handler sends next count as the action's fan-out
+        current_action.set(action)
+        result, outbox = await actor.call(action, **kwargs)
+        await send_outbox(self.channel_layer, outbox)
+        return result
 
-    @database_sync_to_async
-    def get_game_state(self):
+    async def _remove_session(self):
         game_name = f"lobby_{self.room_name}"
-        manager = get_session(game_name)
+        await stop_actor(game_name)
+        await self._in_thread("remove_session", remove_session, game_name)
+
+    async def _publish_state(self):
+        actor = await get_actor(f"lobby_{self.room_name}")
+        if actor is not None:
+            try:
+                frame, _ = await actor.run(self._publish_with_viewer)
+            except asyncio.QueueFull:
+                return None
+            return frame
+        state = await self._in_thread("get_persisted_state", self._get_persisted_state)
+        if state is None:
+            return None
+        # Without a live session there is nothing to diff against
+        return {"version": 0, "state": state, "changes": None, "private": {}}
+
+    def _publish_with_viewer(self, manager):
+        frame = manager.publish_state()
+        if self.player_id is not None:
+            frame["viewer_private"] = manager.published_private_state(self.player_id)
+        return frame
+
+    async def _owns_game_player(self, player_id, lobby_player_id):
+        """Whether ``lobby_player_id`` sits in this lobby as game player ``player_id``."""
+        if not self.room_name.isdigit():
+            return False
+        manager = await aget_session(f"lobby_{self.room_name}")
         if manager:
-            return manager.serialize_state()
+            entry = manager.get_player_entry(player_id)
+            character = entry["name"] if entry else None
+        else:
+            character = await self._in_thread(
+                "game_player_character",
+                Player.objects.filter(id=player_id, game__name=f"lobby_{self.room_name}")
+                .values_list("character_name", flat=True)
+                .first,
+            )
+        if character is None:
+            return False
+        return await self._in_thread(
+            "owns_game_player",
+            LobbyPlayer.objects.filter(
+                id=lobby_player_id,
+                lobby_id=self.room_name,
+                character_card__name=character,
+            ).exists,
+        )
 
+    async def _in_thread(self, name, func, *args):
+        """``database_sync_to_async(func)(*args)``, timed as ``name``."""
+        started = time.perf_counter()
+        try:
+            return await database_sync_to_async(func)(*args)
+        finally:
+            THREAD_POOL.since(name, started)
+
+    def _get_persisted_state(self):
+        game_name = f"lobby_{self.room_name}"
         game = Game.objects.filter(name=game_name).first()
         if not game:
             return None
@@ -351,18 +411,64 @@ class GameConsumer(AsyncWebsocketConsumer):
         }
 
 
+class LobbyConsumer(AsyncWebsocketConsumer):
+    """Pushes the open lobbies: the whole list on connect, then each change."""
+
+    async def connect(self):
+        # Join first: changes made while the list is loading arrive after it
+        await self.channel_layer.group_add(LOBBY_GROUP, self.channel_name)
+        await self.accept()
+        await self._send_lobbies()
+
+    async def disconnect(self, close_code):
+        await self.channel_layer.group_discard(LOBBY_GROUP, self.channel_name)
+
+    async def receive(self, text_data):
+        try:
+            payload = json.loads(text_data)
+        except json.JSONDecodeError:
+            return
+        if payload.get("type") == "get_lobbies":
+            # The client missed a change
+            await self._send_lobbies()
+        else:
+            await self.send_json(
+                {"type": "error", "message": f"Unsupported action: {payload.get('type')}"}
+            )
+
+    async def _send_lobbies(self):
+        if LOBBY_DIRECTORY.loaded:
+            snapshot = LOBBY_DIRECTORY.snapshot()
+        else:
+            snapshot = await database_sync_to_async(LOBBY_DIRECTORY.snapshot)()
+        await self.send_json(snapshot)
+
+    async def forward_frame(self, event):
+        """Forward a directory change encoded once for every subscriber."""
+        await self.send(text_data=event["text"])
+
+    async def send_json(self, payload):
+        await self.send(text_data=encode_frame(payload))
+
+
 class PlayerConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         await self.accept()
         player = await self._create_player()
         self.player_id = player.id
         await self.send_json(
-            {"type": "player_created", "player_id": self.player_id, "name": player.name}
+            {
+                "type": "player_created",
+                "player_id": self.player_id,
+                "name": player.name,
+                "token": issue_player_token(self.player_id),
+            }
         )
 
     async def disconnect(self, close_code):
         if hasattr(self, "player_id"):
-            await self._delete_player()
+            await self._detach_player()
+            await apublish(LOBBY_DIRECTORY.remove_player(self.player_id))
 
     async def receive(self, text_data):
         try:
@@ -373,12 +479,15 @@ class PlayerConsumer(AsyncWebsocketConsumer):
             await self.send_json({"type": "pong"})
 
     async def send_json(self, payload):
-        await self.send(text_data=json.dumps(payload))
+        await self.send(text_data=encode_frame(payload))
 
     @database_sync_to_async
+    @serialized_write
     def _create_player(self):
         return LobbyPlayer.objects.create()
 
     @database_sync_to_async
-    def _delete_player(self):
-        LobbyPlayer.objects.filter(id=self.player_id).delete()
\ No newline at end of file
+    @serialized_write
+    def _detach_player(self):
+        # Housekeeping closes a lobby left empty and purges the row later
+        LobbyPlayer.objects.filter(id=self.player_id).update(lobby=None, character_card=None)
\ No newline at end of file
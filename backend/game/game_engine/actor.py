@@ -0,0 +1,307 @@
+"""Per-game actors.
+
+Every live game is driven by one :class:`GameActor`: an asyncio task that
+owns the game's ``GameManager`` and applies commands from a bounded queue
+one at a time, on the event loop. Commands from two sockets of the same game
+can no longer interleave, and actions do not hop to a worker thread; the
+manager's blocking database writes go to ``PERSISTENCE_EXECUTOR`` and its
+event log appends to ``FILE_EXECUTOR`` instead. Between commands the actor
+also checkpoints its game every ``GAME_SNAPSHOT_INTERVAL`` seconds. Each command's queue wait, run time and
+database queries are recorded in ``game_engine/metrics.py``, labelled with
+its action (or, for ``run``, the function's name).
+
+Games with bot seats also get a bot task. It wakes after every command and
+plays each bot step that is due (see ``game_engine/bots.py``). Each step's
+decision runs on the shared ``BOT_EXECUTOR``, and its action is queued here
+like a socket command.
+"""
+
+import asyncio
+import collections
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+from game.game_engine.bots import BOT_EXECUTOR, decide, next_bot_step
+from game.game_engine.broadcasts import send_action_frames, send_outbox, send_state_frame
+from game.game_engine.checkpoints import FILE_EXECUTOR, dump_manager, save_checkpoint
+from game.game_engine.game_manager import estimate_hint
+from game.game_engine.metrics import (
+    ACTION_EXECUTION,
+    ACTION_QUERIES,
+    ACTION_QUEUE_WAIT,
+    THREAD_POOL,
+    current_action,
+)
+from game.game_engine.notifier import collect_messages, room_group
+from game.game_engine.persistence import PERSISTENCE_EXECUTOR
+from game.game_engine.query_audit import QueryAudit, record
+from game.game_engine.session_registry import aget_session, evict_session, is_live, remove_session
+
+BUSY_ERROR = "The game is busy; please try again."
+# Wakes an idle actor that has been asked to retire
+_RETIRE = object()
+# Seconds a bot waits before trying again when its game's queue is full
+BOT_BUSY_RETRY = 0.05
+
+
+class GameActor:
+    """Applies commands to one GameManager in the order they arrive."""
+
+    def __init__(self, manager, maxsize: Optional[int] = None):
+        self.manager = manager
+        # Actions must not block the loop on the database or the disk
+        manager.persistence.executor = PERSISTENCE_EXECUTOR
+        if manager.events is not None:
+            manager.events.executor = FILE_EXECUTOR
+        self.queue: asyncio.Queue = asyncio.Queue(
+            maxsize=maxsize if maxsize is not None else getattr(settings, "GAME_ACTOR_QUEUE_SIZE", 64)
+        )
+        self.commands = 0
+        self.rejected = 0
+        self._snapshot_at = time.monotonic()
+        self.loop = asyncio.get_running_loop()
+        self._task = self.loop.create_task(self._run())
+        # Seconds from a bot step being due to its action being applied
+        self.bot_latencies: collections.deque = collections.deque(maxlen=1000)
+        self.has_bots = any(entry.get("bot") for entry in manager.players)
+        self._bots_due = False
+        self._bots_task: Optional[asyncio.Task] = None
+        # Set when the registry evicts the game; see retire_actor
+        self._retiring = False
+        self._wake_bots()
+
+    async def run(self, func: Callable, *args, **kwargs) -> Tuple[object, Dict]:
+        """
+        Queue ``func(manager, *args, **kwargs)`` and wait for it to be applied.
+
+        Returns the result and the messages broadcast while it ran, grouped by
+        channel group. Raises ``asyncio.QueueFull`` when the queue is full.
+        """
+        return await self._submit(func.__name__.lstrip("_"), func, args, kwargs)
+
+    async def call(self, action: str, **kwargs) -> Tuple[Dict, Dict]:
+        """Run a public GameManager action; errors come back as result dicts."""
+        if getattr(self.manager, action, None) is None:
+            return {"success": False, "error": f"Unsupported action '{action}'."}, {}
+        try:
+            return await self._submit(action, _call_action, (action,), kwargs)
+        except asyncio.QueueFull:
+            return {"success": False, "error": BUSY_ERROR}, {}
+
+    async def hint(self, player_id: int) -> Dict:
+        """
+        ``GameManager.get_hint`` with the estimate run on ``BOT_EXECUTOR``:
+        sampling takes tens of milliseconds, too long to hold the loop.
+        """
+        try:
+            request, _ = await self._submit("hint_request", _hint_request, (player_id,), {})
+        except asyncio.QueueFull:
+            return {"success": False, "error": BUSY_ERROR}
+        if not request["success"]:
+            return request
+        started = time.perf_counter()
+        result = await self.loop.run_in_executor(BOT_EXECUTOR, estimate_hint, request["deduction"])
+        THREAD_POOL.since("hint", started)
+        return result
+
+    async def _submit(self, label: str, func: Callable, args, kwargs) -> Tuple[object, Dict]:
+        future = asyncio.get_running_loop().create_future()
+        if self._task.done():
+            # Retired or stopped: nothing would apply the command
+            raise asyncio.QueueFull
+        try:
+            self.queue.put_nowait((label, func, args, kwargs, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise
+        return await future
+
+    async def stop(self) -> None:
+        """Finish the queued commands, then end the task."""
+        bots = self._bots_task
+        if bots is not None and bots is not asyncio.current_task():
+            bots.cancel()
+        await self.queue.put(None)
+        await self._task
+
+    async def _run(self):
+        while True:
+            if self._retiring and self.queue.empty():
+                self._retire()
+                return
+            command = await self.queue.get()
+            if command is None:
+                return
+            if command is _RETIRE:
+                continue
+            label, func, args, kwargs, future, queued = command
+            if future.cancelled():
+                continue
+            started = time.perf_counter()
+            ACTION_QUEUE_WAIT.observe(label, started - queued)
+            # Database writes the command hands to the persistence thread carry its label
+            token = current_action.set(label)
+            queries = QueryAudit(label)
+            try:
+                with collect_messages() as outbox, queries:
+                    result = func(self.manager, *args, **kwargs)
+            except Exception as exc:
+                future.set_exception(exc)
+            else:
+                future.set_result((result, outbox.drain()))
+            finally:
+                current_action.reset(token)
+            ACTION_EXECUTION.since(label, started)
+            record(ACTION_QUERIES, queries)
+            self.commands += 1
+            self._snapshot_if_due()
+            if func is not next_bot_step:
+                self._wake_bots()
+
+    def _request_retire(self):
+        self._retiring = True
+        if self.queue.empty():
+            self.queue.put_nowait(_RETIRE)
+
+    def _retire(self):
+        """Hand the game back to the registry for eviction; the actor ends."""
+        if self._bots_task is not None:
+            # Between commands a bot can only be deciding, which changes nothing
+            self._bots_task.cancel()
+        name = self.manager.room_name
+        if _actors.get(name) is self:
+            del _actors[name]
+        evict_session(name, self.manager)
+
+    def _snapshot_if_due(self):
+        interval = getattr(settings, "GAME_SNAPSHOT_INTERVAL", None)
+        now = time.monotonic()
+        if not interval or now - self._snapshot_at < interval:
+            return
+        self._snapshot_at = now
+        name = self.manager.room_name
+        # Finished or replaced games must not be written back
+        if self.manager.is_over or not is_live(name, self.manager):
+            return
+        # Snapshot here, between commands; only the file write leaves the loop
+        FILE_EXECUTOR.submit(save_checkpoint, name, dump_manager(self.manager))
+
+    # ------------------------------------------------------------------
+    # Bots
+    # ------------------------------------------------------------------
+    def _wake_bots(self):
+        """After every command: make sure a bot that may now be due gets to act."""
+        if not self.has_bots or self.manager.is_over:
+            return
+        self._bots_due = True
+        if self._bots_task is None or self._bots_task.done():
+            self._bots_task = self.loop.create_task(self._drive_bots())
+
+    async def _drive_bots(self):
+        layer = get_channel_layer()
+        group = room_group(self.manager.room_name)
+        while True:
+            self._bots_due = False
+            try:
+                view, _ = await self.run(next_bot_step)
+            except asyncio.QueueFull:
+                await asyncio.sleep(BOT_BUSY_RETRY)
+                continue
+            if view is None:
+                # A command may have made a bot due after that check
+                if self._bots_due:
+                    continue
+                return
+            delay = getattr(settings, "GAME_BOT_DELAY", 0)
+            if delay:
+                await asyncio.sleep(delay)
+
+            started = time.perf_counter()
+            action, kwargs = await self.loop.run_in_executor(BOT_EXECUTOR, decide, view)
+            THREAD_POOL.since("bot_decide", started)
+            result, outbox = await self.call(action, **kwargs)
+            if result.get("error") == BUSY_ERROR:
+                await asyncio.sleep(BOT_BUSY_RETRY)
+                continue
+            self.bot_latencies.append(time.perf_counter() - started)
+            # The frames sent below count as this action's fan-out
+            current_action.set(action)
+            if layer is not None:
+                await send_outbox(layer, outbox)
+            if not result.get("success"):
+                # Stay put until the next command rather than retry in a loop
+                print(f"[Bot error] {view['kind']} bot {view['player_id']} {action}: {result.get('error')}")
+                return
+            if layer is not None:
+                await send_action_frames(layer, group, action, result)
+                frame, _ = await self.run(_publish_state)
+                await send_state_frame(layer, group, frame)
+            if result.get("game_over"):
+                # As the consumer does once a person ends the game
+                name = self.manager.room_name
+                await asyncio.sleep(0.1)
+                await stop_actor(name)
+                await database_sync_to_async(remove_session)(name)
+                return
+
+
+def _call_action(manager, action, **kwargs):
+    return getattr(manager, action)(**kwargs)
+
+
+def _hint_request(manager, player_id):
+    return manager.hint_request(player_id)
+
+
+def _publish_state(manager):
+    return manager.publish_state()
+
+
+_actors: Dict[str, GameActor] = {}
+
+
+async def get_actor(game_name: str) -> Optional[GameActor]:
+    """
+    The actor for the game registered under ``game_name``, started on first
+    use. Returns None when there is no session. An evicted game is
+    rehydrated on a worker thread.
+    """
+    manager = await aget_session(game_name)
+    actor = _actors.get(game_name)
+    if actor is not None and actor.loop is not asyncio.get_running_loop():
+        # Left behind by an event loop that has since closed
+        del _actors[game_name]
+        actor = None
+    if actor is not None and actor.manager is not manager:
+        # The session was replaced or removed; retire the old actor
+        _actors.pop(game_name)
+        asyncio.get_running_loop().create_task(actor.stop())
+        actor = None
+    if actor is None and manager is not None:
+        actor = _actors[game_name] = GameActor(manager)
+    return actor
+
+
+def retire_actor(game_name: str, manager) -> bool:
+    """
+    Ask the actor running ``manager`` to evict it once the commands already
+    queued are applied. Safe from any thread; False when no actor runs it.
+    """
+    actor = _actors.get(game_name)
+    if actor is None or actor.manager is not manager or actor._task.done():
+        return False
+    try:
+        actor.loop.call_soon_threadsafe(actor._request_retire)
+    except RuntimeError:
+        return False  # Its event loop has closed
+    return True
+
+
+async def stop_actor(game_name: str) -> None:
+    actor = _actors.pop(game_name, None)
+    if actor is not None:
+        await actor.stop()
@@ -0,0 +1,94 @@
+"""Immutable, process-wide board graph built from the static board definitions.
+
+Rooms and hallways never change at runtime, so movement rules are answered from
+plain tuples indexed by integer node ids instead of querying the ORM.
+Rooms occupy node ids ``0..8`` (in ``ROOM_DEFINITIONS`` order) and hallways
+``9..20`` (in ``HALLWAY_DEFINITIONS`` order).
+"""
+
+from typing import Dict, Optional, Tuple
+
+from game.game_engine.constants import HALLWAY_DEFINITIONS, ROOM_DEFINITIONS
+
+NO_NODE = -1
+
+
+class BoardGraph:
+    """Adjacency arrays and secret-passage edges for the Clue-Less board."""
+
+    __slots__ = (
+        "codes",
+        "names",
+        "is_room",
+        "adjacency",
+        "secret_passage",
+        "room_count",
+        "hallway_count",
+        "_index_by_name",
+        "_index_by_code",
+    )
+
+    def __init__(self, room_definitions: Dict, hallway_definitions: Dict):
+        codes = list(room_definitions) + list(hallway_definitions)
+        index_by_code = {code: node for node, code in enumerate(codes)}
+
+        names = [definition["name"] for definition in room_definitions.values()]
+        names += [definition["name"] for definition in hallway_definitions.values()]
+
+        adjacency = []
+        secret_passage = []
+        for definition in room_definitions.values():
+            adjacency.append(
+                tuple(index_by_code[code] for code in definition["hallways"])
+            )
+            secret = definition.get("secret_passage")
+            secret_passage.append(index_by_code[secret] if secret else NO_NODE)
+        for definition in hallway_definitions.values():
+            adjacency.append(
+                (index_by_code[definition["room1"]], index_by_code[definition["room2"]])
+            )
+            secret_passage.append(NO_NODE)
+
+        self.codes: Tuple[str, ...] = tuple(codes)
+        self.names: Tuple[str, ...] = tuple(names)
+        self.room_count = len(room_definitions)
+        self.hallway_count = len(hallway_definitions)
+        self.is_room: Tuple[bool, ...] = tuple(
+            node < self.room_count for node in range(len(codes))
+        )
+        self.adjacency: Tuple[Tuple[int, ...], ...] = tuple(adjacency)
+        self.secret_passage: Tuple[int, ...] = tuple(secret_passage)
+        self._index_by_name = {name: node for node, name in enumerate(names)}
+        self._index_by_code = index_by_code
+
+    def __setattr__(self, key, value):
+        if hasattr(self, "_index_by_code"):
+            raise AttributeError("BoardGraph is immutable.")
+        object.__setattr__(self, key, value)
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+    @property
+    def node_count(self) -> int:
+        return len(self.codes)
+
+    def node_id(self, name: str) -> int:
+        """Return the node id for a room or hallway display name."""
+        return self._index_by_name[name]
+
+    def node_for_code(self, code: str) -> int:
+        """Return the node id for a board code such as ``R00`` or ``H11``."""
+        return self._index_by_code[code]
+
+    def find_node(self, name: Optional[str]) -> int:
+        if name is None:
+            return NO_NODE
+        return self._index_by_name.get(name, NO_NODE)
+
+    def hallway_index(self, node: int) -> int:
+        """Return the 0-based hallway index (bit position) for a hallway node."""
+        return node - self.room_count
+
+
+BOARD_GRAPH = BoardGraph(ROOM_DEFINITIONS, HALLWAY_DEFINITIONS)
@@ -0,0 +1,168 @@
+"""Server-side bot players for live games.
+
+A lobby seat can be played by a bot instead of a person
+(``LobbyPlayer.bot_kind``). Bots act only through the same ``GameManager``
+actions as people: ``move_player``, ``make_suggestion_action``,
+``choose_disproving_card``, ``make_accusation_action`` and ``end_turn``.
+
+Each bot step has three parts, so a game's actor never waits on a bot:
+
+* :func:`next_bot_step` runs on the actor, between commands. It copies what
+  the bot due to act may see into a plain view, or returns None when no bot
+  is due.
+* :func:`decide` turns a view into an action. It only reads the view, so it
+  runs on ``BOT_EXECUTOR``, one small thread pool shared by every game in
+  the process, whatever the number of bots.
+* The action is queued on the actor like any socket command, so human
+  commands are never stuck behind a bot that is thinking.
+
+The strategies match the simulation bots of the same names. ``"random"``
+plays at random. ``"deducer"`` plays among the cards its ``Deduction`` has
+not ruled out. ``"estimator"`` plays the Monte Carlo envelope odds.
+"""
+
+import random
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+from game.game_engine.constants import ROOMS, SUSPECTS, WEAPONS
+from game.game_engine.deck import CARD_CATALOG
+from game.game_engine.deduction import Deduction
+from game.game_engine.estimator import DEFAULT_SAMPLES, estimate_envelope, uniform_estimate
+from game.models import Room
+
+BOT_RANDOM = "random"
+BOT_DEDUCER = "deducer"
+BOT_ESTIMATOR = "estimator"
+BOT_KINDS = (BOT_RANDOM, BOT_DEDUCER, BOT_ESTIMATOR)
+
+# Bots accuse once the likeliest suspect, weapon and room together are at
+# least this likely; with uniform odds that only happens once they are certain
+ACCUSE_CONFIDENCE = 0.9
+
+# Decisions for every bot in the process share these threads
+BOT_EXECUTOR = ThreadPoolExecutor(
+    max_workers=getattr(settings, "GAME_BOT_WORKERS", 4), thread_name_prefix="game-bots"
+)
+
+
+def next_bot_step(manager) -> Optional[Dict]:
+    """
+    What the bot that must act next may see, or None if a person (or nobody)
+    is due. A pending disproof comes before the current player's turn.
+    """
+    if manager.is_over:
+        return None
+    pending = manager.pending_disproof
+    if pending.get("disprover_id") is not None:
+        entry = manager.get_player_entry(pending["disprover_id"])
+        if entry is None or not entry.get("bot"):
+            return None
+        suggester = pending["suggester_name"]
+        return {
+            "step": "disprove",
+            "kind": entry["bot"],
+            "player_id": entry["player_obj"].id,
+            "matching": list(pending.get("matching_cards", [])),
+            # Showing a card the suggester has already seen gives nothing away
+            "shown": [card for card, names in entry["revealed_to"].items() if suggester in names],
+            "seed": random.getrandbits(32),
+        }
+
+    entry = manager.get_current_player()
+    if entry is None or not entry.get("bot"):
+        return None
+    turn = manager.turn_state
+    hands = [player["hand"] for player in manager.players]
+    view = {
+        "kind": entry["bot"],
+        "player_id": entry["player_obj"].id,
+        # A copy: the manager keeps updating its own while the bot decides
+        "deduction": Deduction.from_row(entry["seat"], hands, entry["deduction"].to_row()),
+        "seed": random.getrandbits(32),
+    }
+    location = entry["location"]
+    if not turn["has_moved"]:
+        view["step"] = "move"
+        view["options"] = [
+            [option["name"], option["target"].name if option["type"] != "stay" else location.name]
+            for option in manager.get_available_moves(entry)
+        ]
+    elif isinstance(location, Room) and not turn["made_suggestion"]:
+        view["step"] = "suggest"
+    else:
+        view["step"] = "end"
+    return view
+
+
+def decide(view: Dict) -> Tuple[str, Dict]:
+    """The ``GameManager`` action, and its keyword arguments, for a bot view."""
+    rng = random.Random(view["seed"])
+    player_id = view["player_id"]
+    if view["step"] == "disprove":
+        matching = view["matching"]
+        if view["kind"] == BOT_RANDOM:
+            card = rng.choice(matching)
+        else:
+            card = rng.choice([card for card in matching if card in view["shown"]] or matching)
+        return "choose_disproving_card", {"player_id": player_id, "card_name": card}
+
+    odds = _odds(view)
+    step = view["step"]
+    if step in ("move", "end"):
+        accusation = _accusation(odds)
+        if accusation is not None:
+            suspect, weapon, room = accusation
+            return "make_accusation_action", {
+                "player_id": player_id,
+                "suspect": suspect,
+                "weapon": weapon,
+                "room": room,
+            }
+    if step == "move":
+        if not view["options"]:
+            return "move_player", {"player_id": player_id}
+        if view["kind"] == BOT_RANDOM:
+            name = rng.choice(view["options"])[0]
+        else:
+            rooms = [option for option in view["options"] if option[1] in ROOMS]
+            best = _likeliest([room for _, room in rooms], odds, rng)
+            if best is None or not odds[CARD_CATALOG.index[best]]:
+                name = rng.choice(view["options"])[0]
+            else:
+                name = next(name for name, room in rooms if room == best)
+        return "move_player", {"player_id": player_id, "destination_name": name}
+    if step == "suggest":
+        if view["kind"] == BOT_RANDOM:
+            suspect, weapon = rng.choice(SUSPECTS), rng.choice(WEAPONS)
+        else:
+            suspect, weapon = _likeliest(SUSPECTS, odds, rng), _likeliest(WEAPONS, odds, rng)
+        return "make_suggestion_action", {"player_id": player_id, "suspect": suspect, "weapon": weapon}
+    return "end_turn", {"player_id": player_id}
+
+
+def _odds(view: Dict) -> List[float]:
+    if view["kind"] == BOT_ESTIMATOR:
+        samples = getattr(settings, "GAME_BOT_ESTIMATOR_SAMPLES", DEFAULT_SAMPLES)
+        return estimate_envelope(view["deduction"], samples, seed=view["seed"])
+    return uniform_estimate(view["deduction"])
+
+
+def _likeliest(names: List[str], odds: List[float], rng: random.Random) -> Optional[str]:
+    """One of the likeliest ``names``, ties broken at random."""
+    if not names:
+        return None
+    best = max(odds[CARD_CATALOG.index[name]] for name in names)
+    return rng.choice([name for name in names if odds[CARD_CATALOG.index[name]] == best])
+
+
+def _accusation(odds: List[float]) -> Optional[Tuple[str, str, str]]:
+    picks = []
+    confidence = 1.0
+    for names in (SUSPECTS, WEAPONS, ROOMS):
+        name = max(names, key=lambda name: odds[CARD_CATALOG.index[name]])
+        confidence *= odds[CARD_CATALOG.index[name]]
+        picks.append(name)
+    return tuple(picks) if confidence >= ACCUSE_CONFIDENCE else None
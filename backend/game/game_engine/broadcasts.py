@@ -0,0 +1,122 @@
+"""Channel-layer messages that follow a game action.
+
+People act through their sockets and bots through the game's actor, and
+both send the same messages afterwards: the prompts and card reveals the
+action triggers, then the versioned state frame. Each send is timed into
+``game_fanout_seconds`` under the caller's ``current_action``.
+"""
+
+import functools
+import time
+from typing import Dict, List
+
+from game.game_engine.frames import frame_event
+from game.game_engine.metrics import FANOUT, current_action
+from game.game_engine.notifier import batch_payload
+
+
+def _timed_fanout(func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            FANOUT.since(current_action.get(), started)
+
+    return wrapper
+
+
+def player_group(room_group_name: str, player_id) -> str:
+    """Channel group of the sockets viewing the game as ``player_id``."""
+    return f"{room_group_name}_player_{player_id}"
+
+
+@_timed_fanout
+async def send_outbox(layer, outbox: Dict[str, List[Dict]]) -> None:
+    """Send the log messages an action broadcast, one frame per group."""
+    for group, messages in outbox.items():
+        await layer.group_send(group, frame_event(batch_payload(messages)))
+
+
+@_timed_fanout
+async def send_action_frames(layer, room_group_name: str, action: str, result: Dict) -> None:
+    """The prompts and private reveals that follow a successful action."""
+    if action == "make_suggestion_action":
+        if result.get("awaiting_disproof"):
+            # The room learns who must disprove; only the disprover is sent
+            # the cards they can choose from
+            prompt = {
+                "type": "disprove_prompt",
+                "disprover_id": result.get("disprover_id"),
+                "disprover_name": result.get("disprover_name"),
+                "suggester_name": result.get("suggester_name"),
+                "matching_cards": [],
+            }
+            await layer.group_send(room_group_name, frame_event(prompt))
+            await layer.group_send(
+                player_group(room_group_name, result.get("disprover_id")),
+                frame_event({**prompt, "matching_cards": result.get("matching_cards", [])}),
+            )
+        else:
+            # No one can disprove - clear the disproof state before the game state
+            await layer.group_send(
+                room_group_name,
+                frame_event(
+                    {
+                        "type": "suggestion_not_disproved",
+                        "suggester_name": result.get("suggester_name"),
+                    }
+                ),
+            )
+    elif action == "choose_disproving_card":
+        # Only the suggester sees the card
+        suggester_id = result.get("suggester_id")
+        if suggester_id:
+            await layer.group_send(
+                player_group(room_group_name, suggester_id),
+                frame_event(
+                    {
+                        "type": "disproof_result",
+                        "suggester_id": suggester_id,
+                        "card": result.get("card"),
+                        "disprover_name": result.get("disprover_name"),
+                        "suggester_name": result.get("suggester_name"),
+                    }
+                ),
+            )
+
+
+@_timed_fanout
+async def send_state_frame(layer, room_group_name: str, frame: Dict) -> None:
+    """
+    Send the public delta to the room and private changes to each player.
+
+    Each message is encoded once here; consumers forward the text as is.
+    """
+    for player_id, private in frame.get("private", {}).items():
+        await layer.group_send(
+            player_group(room_group_name, player_id),
+            frame_event(
+                {
+                    "type": "private_state",
+                    "version": frame["version"],
+                    "private": private,
+                }
+            ),
+        )
+    if frame["changes"] == {}:
+        return
+    if frame["changes"] is None:
+        payload = {
+            "type": "game_state",
+            "version": frame["version"],
+            "game_state": frame["state"],
+        }
+    else:
+        payload = {
+            "type": "game_state_delta",
+            "version": frame["version"],
+            "changes": frame["changes"],
+        }
+    await layer.group_send(room_group_name, frame_event(payload))
@@ -0,0 +1,88 @@
+"""On-disk checkpoints of GameManager sessions.
+
+A checkpoint is the game's ``GameManager.to_snapshot`` encoded as compact
+JSON. The session registry writes one when it evicts a game, game actors
+write them periodically, and every live game is written at shutdown; the
+next ``get_session`` rehydrates the game from it, replaying any events
+logged after the checkpoint was taken. Each game is one file in
+``GAME_CHECKPOINT_DIR``, replaced atomically on every write.
+
+Checkpoint and event log files written off the event loop go through
+``FILE_EXECUTOR``, so the database writer never waits on the disk.
+"""
+
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from django.conf import settings
+
+# One thread keeps each game's file writes and deletes in the order they were made
+FILE_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="game-files")
+
+
+def checkpoint_dir() -> Path:
+    return Path(getattr(settings, "GAME_CHECKPOINT_DIR", Path(settings.BASE_DIR) / "checkpoints"))
+
+
+def safe_file_name(game_name: str) -> str:
+    # Game names come from lobby ids, but keep them safe as file names anyway
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", game_name)
+
+
+def _path(game_name: str) -> Path:
+    return checkpoint_dir() / f"{safe_file_name(game_name)}.ckpt"
+
+
+def dump_manager(manager) -> bytes:
+    """Serialize a GameManager for a checkpoint."""
+    return json.dumps(manager.to_snapshot(), separators=(",", ":")).encode()
+
+
+def load_manager(data: bytes):
+    return restore_manager(json.loads(data))
+
+
+def restore_manager(snapshot: Dict):
+    """Rebuild a game from a checkpoint snapshot plus any events logged since."""
+    from game.game_engine.event_log import catch_up
+    from game.game_engine.game_manager import GameManager
+
+    manager = GameManager.from_snapshot(snapshot)
+    catch_up(manager)
+    return manager
+
+
+def save_checkpoint(game_name: str, data: bytes) -> None:
+    path = _path(game_name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def load_checkpoint(game_name: str) -> Optional[bytes]:
+    try:
+        return _path(game_name).read_bytes()
+    except FileNotFoundError:
+        return None
+
+
+def delete_checkpoint(game_name: str) -> None:
+    try:
+        _path(game_name).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def iter_checkpoints() -> Iterator[Tuple[Dict, int]]:
+    """Every stored checkpoint as ``(snapshot, size in bytes)``."""
+    directory = checkpoint_dir()
+    if not directory.is_dir():
+        return
+    for path in directory.glob("*.ckpt"):
+        data = path.read_bytes()
+        yield json.loads(data), len(data)
@@ -1,20 +1,72 @@
 import random
+from typing import Dict, Iterable, List, Tuple
 
 from game.game_engine.constants import ROOMS, SUSPECTS, WEAPONS
 from game.models import Card, Game, Solution
 
 
+class CardCatalog:
+    """
+    Interned card catalog mapping each card name to a bit index.
+
+    There are only 21 cards, so a hand, a player's known cards or a suggestion
+    fits in a single int bit mask. Names are only needed at the serialization
+    boundary.
+    """
+
+    def __init__(self, suspects: Iterable[str], weapons: Iterable[str], rooms: Iterable[str]):
+        suspects, weapons, rooms = list(suspects), list(weapons), list(rooms)
+        self.names: Tuple[str, ...] = tuple(suspects + weapons + rooms)
+        self.index: Dict[str, int] = {name: bit for bit, name in enumerate(self.names)}
+        self.suspects_mask = self.mask(suspects)
+        self.weapons_mask = self.mask(weapons)
+        self.rooms_mask = self.mask(rooms)
+        self.all_mask = (1 << len(self.names)) - 1
+        # Bit indices in alphabetical order, for sorted serialization
+        self._alphabetical = tuple(
+            self.index[name] for name in sorted(self.names)
+        )
+
+    def bit(self, name: str) -> int:
+        return 1 << self.index[name]
+
+    def mask(self, names: Iterable[str]) -> int:
+        mask = 0
+        for name in names:
+            mask |= 1 << self.index[name]
+        return mask
+
+    def names_of(self, mask: int) -> List[str]:
+        """Card names in ``mask``, in catalog (suspect, weapon, room) order."""
+        names = []
+        while mask:
+            low = mask & -mask
+            names.append(self.names[low.bit_length() - 1])
+            mask ^= low
+        return names
+
+    def sorted_names(self, mask: int) -> List[str]:
+        """Card names in ``mask``, sorted alphabetically."""
+        return [self.names[bit] for bit in self._alphabetical if mask >> bit & 1]
+
+
+CARD_CATALOG = CardCatalog(SUSPECTS, WEAPONS, ROOMS)
+
+
 class Deck:
     """Handles loading cards, creating the mystery solution, and dealing hands."""
 
     def __init__(self):
         """Initialize deck by ensuring all required cards exist and loading them."""
         self._ensure_cards_exist()
-        
-        # Load cards grouped by type
-        self.characters = list(Card.objects.filter(card_type="CHAR"))
-        self.weapons = list(Card.objects.filter(card_type="WEAP"))
-        self.rooms = list(Card.objects.filter(card_type="ROOM"))
+
+        # Load cards grouped by type, in one query
+        by_type = {"CHAR": [], "WEAP": [], "ROOM": []}
+        for card in Card.objects.all():
+            by_type.setdefault(card.card_type, []).append(card)
+        self.characters = by_type["CHAR"]
+        self.weapons = by_type["WEAP"]
+        self.rooms = by_type["ROOM"]
 
         # Verify card counts
         expected_counts = {
@@ -42,11 +94,11 @@ class Deck:
             + [(name, "ROOM") for name in ROOMS]
         )
 
-        for name, card_type in card_data:
-            Card.objects.get_or_create(
-                name=name,
-                defaults={"card_type": card_type},
-            )
+        # Cards that already exist are skipped by their unique name
+        Card.objects.bulk_create(
+            [Card(name=name, card_type=card_type) for name, card_type in card_data],
+            ignore_conflicts=True,
+        )
 
     def create_solution(self):
         """Randomly select one character, weapon, and room for the mystery."""
@@ -63,6 +115,9 @@ class Deck:
         Args:
             num_players: Number of players to deal to
             solution: Solution object containing the cards to exclude from dealing
+
+        Returns:
+            One ``CARD_CATALOG`` bit mask per player.
         """
         cards_to_deal = self.all_cards.copy()
         if solution:
@@ -73,8 +128,14 @@ class Deck:
             }
             cards_to_deal = [card for card in cards_to_deal if card.id not in excluded]
 
-        random.shuffle(cards_to_deal)
-        hands = [[] for _ in range(num_players)]
-        for index, card in enumerate(cards_to_deal):
-            hands[index % num_players].append(card.name)
-        return hands
+        return deal_hands([CARD_CATALOG.index[card.name] for card in cards_to_deal], num_players)
+
+
+def deal_hands(card_indices: List[int], num_players: int, rng=random) -> List[int]:
+    """Shuffle ``card_indices`` and deal them round-robin; one bit mask per player."""
+    cards = list(card_indices)
+    rng.shuffle(cards)
+    hands = [0] * num_players
+    for index, card in enumerate(cards):
+        hands[index % num_players] |= 1 << card
+    return hands
@@ -0,0 +1,165 @@
+"""Incremental card deduction for one player.
+
+Every player sees the public outcome of every suggestion: who could not
+disprove it, and who did. Only the suggester sees which card was shown.
+:class:`Deduction` keeps what one player can conclude from that as
+``CARD_CATALOG`` bit masks, one per seat:
+
+* ``has[seat]`` - cards the seat is known to hold
+* ``lacks[seat]`` - cards the seat is known not to hold
+* ``clauses[seat]`` - masks the seat holds at least one card of (it
+  disproved a suggestion, but this player did not see the card)
+
+Each observation adds a fact and propagates it until nothing changes. The
+rules are: a held card is lacked by everyone else, a full hand lacks every
+other card, a clause with one card left becomes a held card, a card every
+seat lacks is in the envelope, and a category with only one possible card
+left has that card in the envelope. Updates touch a handful of ints, so each
+costs microseconds.
+"""
+
+from typing import List, Optional, Sequence
+
+from game.game_engine.deck import CARD_CATALOG
+
+ALL_CARDS = CARD_CATALOG.all_mask
+CATEGORY_MASKS = (CARD_CATALOG.suspects_mask, CARD_CATALOG.weapons_mask, CARD_CATALOG.rooms_mask)
+
+
+class Deduction:
+    """What the player in ``seat`` knows about every hand and the envelope."""
+
+    __slots__ = ("seat", "sizes", "has", "lacks", "clauses", "envelope", "candidates")
+
+    def __init__(self, seat: int, hands: Sequence[int]):
+        # Hand sizes are public: the deal is round-robin
+        self.seat = seat
+        self.sizes = tuple(hand.bit_count() for hand in hands)
+        count = len(hands)
+        self.has: List[int] = [0] * count
+        self.lacks: List[int] = [0] * count
+        self.clauses: List[List[int]] = [[] for _ in range(count)]
+        self.envelope = 0  # cards known to be in the envelope
+        self.candidates = ALL_CARDS
+        self.has[seat] = hands[seat]
+        self.lacks[seat] = ALL_CARDS & ~hands[seat]
+        self._propagate()
+
+    # ------------------------------------------------------------------
+    # Observations; each returns whether ``candidates`` changed
+    # ------------------------------------------------------------------
+    def observe_suggestion(self, suggester: int, cards: int, disprover: Optional[int]) -> bool:
+        """
+        ``suggester`` suggested the three ``cards``. Everyone clockwise before
+        ``disprover`` (or everyone else, if None) holds none of them, and the
+        disprover holds at least one.
+        """
+        count = len(self.has)
+        seat = (suggester + 1) % count
+        while seat != suggester and seat != disprover:
+            self.lacks[seat] |= cards
+            seat = (seat + 1) % count
+        if disprover is not None and disprover != self.seat:
+            self.clauses[disprover].append(cards)
+        return self._propagate()
+
+    def observe_card(self, seat: int, card: int) -> bool:
+        """``seat`` showed this player the card with bit index ``card``."""
+        self.has[seat] |= 1 << card
+        return self._propagate()
+
+    # ------------------------------------------------------------------
+    # Propagation
+    # ------------------------------------------------------------------
+    def _propagate(self) -> bool:
+        has, lacks, clauses, sizes = self.has, self.lacks, self.clauses, self.sizes
+        seats = range(len(has))
+        changed = True
+        while changed:
+            changed = False
+            held = 0
+            for seat in seats:
+                held |= has[seat]
+            for seat in seats:
+                # Held elsewhere, or not in a hand that is already full
+                lacked = lacks[seat] | held & ~has[seat]
+                if has[seat].bit_count() == sizes[seat]:
+                    lacked = ALL_CARDS & ~has[seat]
+                if lacked != lacks[seat]:
+                    lacks[seat] = lacked
+                    changed = True
+                # Only as many cards left as the hand holds
+                possible = ALL_CARDS & ~lacked
+                if possible != has[seat] and possible.bit_count() == sizes[seat]:
+                    has[seat] = possible
+                    changed = True
+                if clauses[seat]:
+                    remaining = []
+                    for clause in clauses[seat]:
+                        if clause & has[seat]:
+                            continue
+                        clause &= ~lacked
+                        if clause & (clause - 1):
+                            remaining.append(clause)
+                        elif clause:
+                            has[seat] |= clause
+                            changed = True
+                    clauses[seat] = remaining
+
+            # Cards nobody holds are in the envelope, one per category
+            nobody = ALL_CARDS
+            for seat in seats:
+                nobody &= lacks[seat]
+            envelope = self.envelope | nobody
+            for category in CATEGORY_MASKS:
+                left = category & ~held
+                if not envelope & category and left and not left & (left - 1):
+                    envelope |= left
+                if envelope & category:
+                    # Every other card of the category is in some hand; if
+                    # only one seat may hold it, that seat does
+                    for card in _bits(category & ~envelope & ~held):
+                        owners = [seat for seat in seats if not lacks[seat] >> card & 1]
+                        if len(owners) == 1:
+                            has[owners[0]] |= 1 << card
+                            changed = True
+            self.envelope = envelope
+
+        candidates = 0
+        held = 0
+        for seat in seats:
+            held |= has[seat]
+        for category in CATEGORY_MASKS:
+            candidates |= self.envelope & category or category & ~held
+        previous, self.candidates = self.candidates, candidates
+        return candidates != previous
+
+    # ------------------------------------------------------------------
+    # Snapshots
+    # ------------------------------------------------------------------
+    def to_row(self) -> List:
+        return [self.has, self.lacks, self.clauses, self.envelope]
+
+    @classmethod
+    def from_row(cls, seat: int, hands: Sequence[int], row: List) -> "Deduction":
+        deduction = cls.__new__(cls)
+        deduction.seat = seat
+        deduction.sizes = tuple(hand.bit_count() for hand in hands)
+        deduction.has, deduction.lacks, deduction.clauses, deduction.envelope = (
+            list(row[0]),
+            list(row[1]),
+            [list(clauses) for clauses in row[2]],
+            row[3],
+        )
+        deduction.candidates = ALL_CARDS
+        deduction._propagate()
+        return deduction
+
+
+def _bits(mask: int) -> List[int]:
+    bits = []
+    while mask:
+        low = mask & -mask
+        bits.append(low.bit_length() - 1)
+        mask ^= low
+    return bits
@@ -0,0 +1,170 @@
+"""Monte Carlo estimate of how likely each card is to be in the envelope.
+
+:class:`~game.game_engine.deduction.Deduction` keeps what a player can
+prove. That often leaves several candidates in a category, and some are
+likelier than others. For example, a card that a seat with many unresolved
+clauses may hold is less likely to be in the envelope than one nobody has
+been asked about. :func:`estimate_envelope` samples whole deals that agree
+with everything the player has seen, and counts how often each card ends up
+in the envelope.
+
+Sampling runs in batches of NumPy arrays, with no Python loop over samples.
+Each sample gives every unplaced card a random key:
+
+* the highest key in each open category goes to the envelope
+* the rest are dealt out in key order to fill each seat's remaining hand
+
+Samples that break a known ``lacks`` or an unresolved clause are rejected.
+Suggestion outcomes follow from the deal, so every consistent deal is
+equally likely, and the accepted samples are a uniform draw from them.
+
+NumPy is in requirements.txt. If it is missing anyway, importing this module
+warns, and the estimate spreads each category evenly over
+``Deduction.candidates``.
+"""
+
+import warnings
+from typing import Dict, List, Optional, Tuple
+
+from game.game_engine.deck import CARD_CATALOG
+from game.game_engine.deduction import ALL_CARDS, CATEGORY_MASKS, Deduction, _bits
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+    warnings.warn(
+        "numpy is not installed; envelope estimates fall back to uniform candidate odds",
+        RuntimeWarning,
+    )
+
+DEFAULT_SAMPLES = 2000
+BATCH_SIZE = 2048
+# Give up after drawing this many times the requested samples (every
+# observation so far is rare under a uniform deal)
+MAX_DRAWS_PER_SAMPLE = 50
+
+CARD_COUNT = len(CARD_CATALOG.names)
+CATEGORY_OF_CARD = tuple(
+    next(index for index, mask in enumerate(CATEGORY_MASKS) if mask >> card & 1)
+    for card in range(CARD_COUNT)
+)
+
+
+def estimate_envelope(
+    deduction: Deduction,
+    samples: int = DEFAULT_SAMPLES,
+    seed: Optional[int] = None,
+) -> List[float]:
+    """
+    Probability that each card, by ``CARD_CATALOG`` index, is in the envelope.
+
+    Draws batches until ``samples`` deals have been accepted. If too few are
+    accepted in the draw budget, the estimate uses the ones accepted so far.
+    It falls back to :func:`uniform_estimate` if none are accepted or NumPy
+    is missing.
+    """
+    if np is None:
+        return uniform_estimate(deduction)
+    probabilities, _, _ = sample_envelope(deduction, samples, seed)
+    return probabilities or uniform_estimate(deduction)
+
+
+def sample_envelope(
+    deduction: Deduction, samples: int, seed: Optional[int] = None
+) -> Tuple[Optional[List[float]], int, int]:
+    """
+    The sampling behind :func:`estimate_envelope`: ``(probabilities or None
+    when nothing was accepted, samples accepted, deals drawn)``. Needs NumPy.
+    """
+    envelope = deduction.envelope
+    held = 0
+    for hand in deduction.has:
+        held |= hand
+    free_cards = _bits(ALL_CARDS & ~held & ~envelope)
+    open_categories = [
+        category for category, mask in enumerate(CATEGORY_MASKS) if not envelope & mask
+    ]
+    free = np.array(free_cards, dtype=np.int64)
+    category_of = np.array([CATEGORY_OF_CARD[card] for card in free_cards], dtype=np.int64)
+    # Dealt in key order, each seat takes positions ``start:end``: as many
+    # cards as its hand still has room for. The envelope cards sort last.
+    ranges = {}
+    end = 0
+    for seat, size in enumerate(deduction.sizes):
+        start, end = end, end + size - deduction.has[seat].bit_count()
+        ranges[seat] = (start, end)
+    if end + len(open_categories) != len(free_cards):
+        return None, 0, 0
+    # Seats whose sampled hands could break a lacks fact or a clause
+    checks = [
+        (*ranges[seat], deduction.has[seat], deduction.lacks[seat], deduction.clauses[seat])
+        for seat in range(len(deduction.has))
+        if deduction.lacks[seat] & ~held & ~envelope or deduction.clauses[seat]
+    ]
+
+    rng = np.random.default_rng(seed)
+    bits = np.left_shift(1, free)
+    counts = np.zeros(len(free_cards), dtype=np.int64)
+    accepted = drawn = 0
+    while accepted < samples and drawn < samples * MAX_DRAWS_PER_SAMPLE:
+        batch = min(BATCH_SIZE, samples * MAX_DRAWS_PER_SAMPLE - drawn)
+        drawn += batch
+        picked, dealt = _sample_deals(rng, batch, category_of, open_categories)
+        # Running OR (a sum, as the bits are distinct) of the dealt cards
+        totals = np.zeros((batch, len(free_cards) + 1), dtype=np.int64)
+        np.cumsum(bits[dealt], axis=1, out=totals[:, 1:])
+        valid = np.ones(batch, dtype=bool)
+        for start, end, has, lacks, clauses in checks:
+            hand = totals[:, end] - totals[:, start] | has
+            valid &= (hand & lacks) == 0
+            for clause in clauses:
+                valid &= (hand & clause) != 0
+        counts += picked[valid].sum(axis=0)
+        accepted += int(valid.sum())
+    if not accepted:
+        return None, 0, drawn
+
+    probabilities = [0.0] * CARD_COUNT
+    for card in _bits(envelope):
+        probabilities[card] = 1.0
+    for card, count in zip(free_cards, (counts / accepted).tolist()):
+        probabilities[card] = count
+    return probabilities, accepted, drawn
+
+
+def _sample_deals(rng, batch, category_of, open_categories):
+    """
+    ``batch`` random deals of the free cards: a bool ``(batch, cards)``
+    array of the cards picked for the envelope, and each row's card order
+    (column indices), envelope cards last.
+    """
+    rows = np.arange(batch)
+    keys = rng.random((batch, len(category_of)))
+    picked = np.zeros(keys.shape, dtype=bool)
+    for category in open_categories:
+        columns = np.flatnonzero(category_of == category)
+        picked[rows, columns[keys[:, columns].argmax(axis=1)]] = True
+    # Keys are below 1, so the envelope cards sort last; the rest stay in a
+    # uniformly random order
+    keys[picked] = 2.0
+    return picked, np.argsort(keys, axis=1)
+
+
+def uniform_estimate(deduction: Deduction) -> List[float]:
+    """Each category's odds spread evenly over its remaining candidates."""
+    probabilities = [0.0] * CARD_COUNT
+    for mask in CATEGORY_MASKS:
+        cards = _bits(deduction.candidates & mask)
+        for card in cards:
+            probabilities[card] = 1 / len(cards)
+    return probabilities
+
+
+def probabilities_by_category(probabilities: List[float]) -> Dict[str, Dict[str, float]]:
+    """``{"suspects"|"weapons"|"rooms": {card name: probability}}``, rounded for display."""
+    names = CARD_CATALOG.names
+    return {
+        key: {names[card]: round(probabilities[card], 3) for card in _bits(mask)}
+        for key, mask in zip(("suspects", "weapons", "rooms"), CATEGORY_MASKS)
+    }
@@ -0,0 +1,80 @@
+"""Version ETags for the lobby and game-state REST endpoints.
+
+Clients that poll ``get_lobby``, ``list_lobbies``, ``get_player_lobby`` or
+``GameStateView`` send back the ``ETag`` of their last response in
+``If-None-Match``. If the resource has not changed since, they get an empty
+``304 Not Modified`` without any query or serialization. The check reads
+in-memory version counters, never the database:
+
+* lobbies: ``LOBBY_DIRECTORY.versions``, bumped by every published lobby
+  change
+* games: :data:`GAME_VERSIONS`, bumped when a ``GameManager`` is created and
+  whenever its write-behind buffer has written an action's changes
+
+A counter is bumped once its change is committed, and the views read it
+before they query. So a response may carry an older tag than its body (the
+next poll gets a 200), but never a newer one. Counters start again with the
+process; the boot token in every tag keeps old tags from matching.
+"""
+
+import functools
+import os
+import threading
+import time
+from typing import Dict, Hashable, Optional
+
+from django.db import transaction
+from django.views.decorators.http import condition
+
+BOOT = f"{os.getpid():x}{time.time_ns():x}"
+
+
+class VersionCounters:
+    """
+    Versions of keyed resources from one shared counter. A change that cannot
+    be pinned to a key (``bump()``) moves every key on.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = 0
+        self._versions: Dict[Hashable, int] = {}
+        self._floor = 0
+
+    def bump(self, key: Optional[Hashable] = None) -> int:
+        with self._lock:
+            self.version += 1
+            if key is None:
+                self._floor = self.version
+            else:
+                self._versions[key] = self.version
+            return self.version
+
+    def get(self, key: Hashable) -> int:
+        with self._lock:
+            return max(self._versions.get(key, 0), self._floor)
+
+
+GAME_VERSIONS = VersionCounters()
+
+
+def bump_on_commit(counters: VersionCounters, key: Optional[Hashable] = None) -> None:
+    """Bump ``key`` once the current transaction commits (straight away outside one)."""
+    transaction.on_commit(functools.partial(counters.bump, key))
+
+
+def version_etag(kind: str, version: int) -> str:
+    return f'W/"{kind}-{BOOT}-{version}"'
+
+
+def etag_condition(kind: str, version_func):
+    """
+    ``condition`` decorator for a view whose ETag is ``version_func(request,
+    *args, **kwargs)``: a matching ``If-None-Match`` gets a 304, and every
+    GET response carries the tag.
+    """
+    return condition(
+        etag_func=lambda request, *args, **kwargs: version_etag(
+            kind, version_func(request, *args, **kwargs)
+        )
+    )
@@ -0,0 +1,220 @@
+"""Append-only event log of every game, and deterministic replay.
+
+Each game writes one file in ``GAME_EVENT_LOG_DIR`` as JSON lines. The first
+line holds the starting ``GameManager.to_snapshot``, taken once the cards are
+dealt. Every action that changed the game then adds one compact row::
+
+    [action code, seat, *arguments]
+
+Arguments are ``CARD_CATALOG`` indices and ``BOARD_GRAPH`` node ids. All of
+the game's randomness is in the starting snapshot, so applying the rows to it
+in order rebuilds the game exactly. Checkpoints record how many bytes of the
+log they include; rehydrating a game replays whatever was logged after that.
+A game's log is deleted with its session (``session_registry.remove_session``).
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+from game.game_engine.board_graph import BOARD_GRAPH
+from game.game_engine.checkpoints import safe_file_name
+from game.game_engine.deck import CARD_CATALOG
+from game.game_engine.notifier import suppress_messages
+from game.game_engine.persistence import NullPersistence
+
+EVENT_LOG_VERSION = 1
+
+# Logged GameManager actions; the codes are stored in the log, so only append
+ACTIONS = (
+    "move_player",
+    "make_suggestion_action",
+    "choose_disproving_card",
+    "make_accusation_action",
+    "end_turn",
+)
+ACTION_CODES = {action: code for code, action in enumerate(ACTIONS)}
+
+
+def log_dir() -> Optional[Path]:
+    directory = getattr(settings, "GAME_EVENT_LOG_DIR", None)
+    return Path(directory) if directory else None
+
+
+def log_path(game_name: str) -> Path:
+    return log_dir() / f"{safe_file_name(game_name)}.log"
+
+
+def delete_log(game_name: str) -> None:
+    if log_dir() is None:
+        return
+    try:
+        log_path(game_name).unlink()
+    except FileNotFoundError:
+        pass
+
+
+class EventLog:
+    """Appends the events of one game to its log file."""
+
+    def __init__(self, game_name: str, size: int = 0):
+        self.path = log_path(game_name)
+        # Bytes written so far, including writes still queued on the executor
+        self.size = size
+        # Where file writes run; None writes on the calling thread
+        self.executor = None
+
+    @classmethod
+    def start(cls, manager) -> Optional["EventLog"]:
+        """Begin a new log for ``manager``, replacing any earlier game of that name."""
+        if log_dir() is None:
+            return None
+        events = cls(manager.room_name)
+        header = {"v": EVENT_LOG_VERSION, "name": manager.room_name, "start": manager.to_snapshot()}
+        events._append(_encode(header), "wb")
+        return events
+
+    def record(self, manager, action: str, params: Dict) -> None:
+        """Log a successful ``action`` called with ``params`` (after it ran)."""
+        self._append(_encode(encode_event(manager, action, params)), "ab")
+
+    def _append(self, line: bytes, mode: str) -> None:
+        self.size = len(line) if mode == "wb" else self.size + len(line)
+        if self.executor is None:
+            _write_line(self.path, line, mode)
+        else:
+            self.executor.submit(_write_line, self.path, line, mode)
+
+
+def encode_event(manager, action: str, params: Dict) -> List[int]:
+    index = CARD_CATALOG.index
+    entry = manager.get_player_entry(params["player_id"])
+    row = [ACTION_CODES[action], entry["seat"]]
+    if action == "move_player":
+        # Where the player ended up; staying put or having no moves logs the same node
+        row.append(BOARD_GRAPH.node_id(entry["location"].name))
+    elif action == "make_suggestion_action":
+        row += [index[params["suspect"]], index[params["weapon"]]]
+    elif action == "choose_disproving_card":
+        row.append(index[params["card_name"]])
+    elif action == "make_accusation_action":
+        # Accusations are not validated, so unknown names are kept as -1
+        row += [index.get(params[key], -1) for key in ("suspect", "weapon", "room")]
+    return row
+
+
+def apply_event(manager, row: List[int]) -> Dict:
+    """Apply one logged event to ``manager``; raises ValueError if it is rejected."""
+    names = CARD_CATALOG.names
+    code, seat, *args = row
+    entry = manager.players[seat]
+    player_id = entry["player_obj"].pk
+    action = ACTIONS[code]
+    if action == "move_player":
+        (node,) = args
+        location = entry["location"].name
+        if BOARD_GRAPH.names[node] == location:
+            destination = f"Stay in {location}"
+        else:
+            destination = BOARD_GRAPH.names[node]
+        result = manager.move_player(player_id, destination)
+    elif action == "make_suggestion_action":
+        result = manager.make_suggestion_action(player_id, names[args[0]], names[args[1]])
+    elif action == "choose_disproving_card":
+        result = manager.choose_disproving_card(player_id, names[args[0]])
+    elif action == "make_accusation_action":
+        result = manager.make_accusation_action(
+            player_id, *(names[card] if card >= 0 else "" for card in args)
+        )
+    else:
+        result = manager.end_turn(player_id)
+    if not result.get("success"):
+        raise ValueError(f"Event {row} could not be replayed: {result.get('error')}")
+    return result
+
+
+def read_log(path) -> Tuple[Dict, List[List[int]]]:
+    """The starting snapshot and the events of a log file."""
+    with open(path, "rb") as handle:
+        header = json.loads(handle.readline())
+        if header.get("v") != EVENT_LOG_VERSION:
+            raise ValueError(f"Unsupported event log version {header.get('v')!r}.")
+        return header["start"], [json.loads(line) for line in handle]
+
+
+def replay(start: Dict, events, until: Optional[int] = None):
+    """
+    Rebuild a game from its starting snapshot and events, without the
+    database or broadcasts. ``until`` stops after that many events.
+    """
+    from game.game_engine.game_manager import GameManager
+
+    manager = GameManager.from_snapshot(start)
+    manager.persistence = manager.suggestion_engine.persistence = NullPersistence()
+    manager.occupancy.on_change = None
+    manager.events = None
+    with suppress_messages():
+        for count, row in enumerate(events):
+            if until is not None and count >= until:
+                break
+            apply_event(manager, row)
+    return manager
+
+
+def replay_log(path, until: Optional[int] = None):
+    """Replay the game stored in the log file at ``path``."""
+    return replay(*read_log(path), until=until)
+
+
+def catch_up(manager) -> int:
+    """
+    Apply events logged after ``manager``'s checkpoint was taken, e.g. after a
+    crash; returns how many were applied.
+    """
+    events = manager.events
+    if events is None:
+        return 0
+    try:
+        handle = open(events.path, "rb")
+    except FileNotFoundError:
+        return 0
+    with handle:
+        handle.seek(events.size)
+        tail = handle.read()
+    complete = tail.rfind(b"\n") + 1
+    if complete < len(tail):
+        # Drop a write cut short by the crash so new events start on a fresh line
+        tail = tail[:complete]
+        os.truncate(events.path, events.size + complete)
+
+    applied = 0
+    # The events are in the log already; don't write them again
+    manager.events = None
+    try:
+        with suppress_messages():
+            for line in tail.splitlines():
+                apply_event(manager, json.loads(line))
+                applied += 1
+    except ValueError as exc:
+        # E.g. the log was restarted by a new game after this checkpoint
+        print(f"[Event log error] {events.path.name}: {exc}")
+    finally:
+        manager.events = events
+        events.size += len(tail)
+    return applied
+
+
+def _encode(value) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode() + b"\n"
+
+
+def _write_line(path: Path, line: bytes, mode: str) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, mode) as handle:
+            handle.write(line)
+    except OSError as exc:
+        print(f"[Event log error] {path.name}: {exc}")
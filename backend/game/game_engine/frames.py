@@ -0,0 +1,47 @@
+"""Encoding of outgoing websocket frames.
+
+Frames meant for a whole room are encoded to text once, before
+``group_send``, and every consumer forwards that text untouched through its
+``forward_frame`` handler. The JSON backend is picked by the
+``GAME_JSON_BACKEND`` setting; ``"orjson"`` is used when it is installed and
+stdlib ``json`` otherwise.
+"""
+
+import functools
+import json
+from typing import Callable, Dict
+
+from django.conf import settings
+
+JSON_BACKEND_STDLIB = "json"
+JSON_BACKEND_ORJSON = "orjson"
+JSON_BACKENDS = (JSON_BACKEND_STDLIB, JSON_BACKEND_ORJSON)
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoder(backend: str) -> Callable[[Dict], str]:
+    """Return a ``dict -> str`` encoder for ``backend``."""
+    if backend not in JSON_BACKENDS:
+        raise ValueError(
+            f"Unknown JSON backend {backend!r}; expected one of {', '.join(JSON_BACKENDS)}."
+        )
+    if backend == JSON_BACKEND_ORJSON:
+        try:
+            import orjson
+        except ImportError:
+            print("[Frames] orjson is not installed; falling back to json")
+        else:
+            # Card names are the only dict keys, but player ids may appear too
+            option = orjson.OPT_NON_STR_KEYS
+            return lambda payload: orjson.dumps(payload, option=option).decode()
+    return json.dumps
+
+
+def encode_frame(payload: Dict) -> str:
+    """Encode one outgoing message with the configured JSON backend."""
+    return get_encoder(getattr(settings, "GAME_JSON_BACKEND", JSON_BACKEND_STDLIB))(payload)
+
+
+def frame_event(payload: Dict) -> Dict:
+    """Channel-layer event that delivers ``payload`` to every member pre-encoded."""
+    return {"type": "forward_frame", "text": encode_frame(payload)}
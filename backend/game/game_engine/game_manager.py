@@ -1,24 +1,80 @@
+import functools
+import inspect
 import uuid
 import random
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set
 
-from django.db import models
+from django.conf import settings
 
+from game.game_engine.board_graph import BOARD_GRAPH, NO_NODE
 from game.game_engine.constants import (
     HALLWAY_DEFINITIONS,
     ROOM_DEFINITIONS,
     STARTING_POSITIONS,
+    SUSPECTS,
+    WEAPONS,
 )
-from game.game_engine.deck import Deck
+from game.game_engine.deck import CARD_CATALOG, Deck
+from game.game_engine.deduction import Deduction
+from game.game_engine.estimator import DEFAULT_SAMPLES, estimate_envelope, probabilities_by_category
+from game.game_engine.etags import GAME_VERSIONS, bump_on_commit
+from game.game_engine.event_log import EventLog, log_dir as event_log_dir
+from game.game_engine.metrics import STATE_SERIALIZATION, timed
 from game.game_engine.notifier import Notifier
+from game.game_engine.occupancy import HallwayOccupancy
+from game.game_engine.persistence import WriteBehindBuffer
+from game.game_engine.query_audit import MANAGER_QUERIES, QueryAudit, audited, record
+from game.game_engine.state_delta import diff_states
 from game.game_engine.suggestion import SuggestionEngine
 from game.game_engine.accusation import AccusationEngine
 from game.models import Card, Game, Hallway, Player, Room, StartingPosition
 
 
+# Sections of the public state that are cached and rebuilt independently
+STATE_SECTIONS = ("players", "turn_state", "last_suggestion")
+
+# Bumped whenever the layout produced by GameManager.to_snapshot changes
+SNAPSHOT_VERSION = 1
+TURN_STATE_FLAGS = ("has_moved", "made_suggestion", "has_accused", "entered_room")
+
+# Board models rebuilt from snapshots, keyed by their primary keys, so
+# restored games share one set of instances
+_snapshot_boards: Dict[tuple, List] = {}
+
+
+def game_action(method):
+    """
+    Run a public GameManager action as one unit of persistence work, and add
+    it to the game's event log when it changed the game. Queries it runs on
+    the calling thread are counted in ``game_manager_db_queries``.
+    """
+    params = tuple(inspect.signature(method).parameters)[1:]
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        audit = QueryAudit(method.__name__)
+        self.persistence.begin_action()
+        try:
+            with audit:
+                result = method(self, *args, **kwargs)
+                if (
+                    self.events is not None
+                    and result.get("success")
+                    and not result.get("requires_choice")
+                ):
+                    self.events.record(self, method.__name__, {**dict(zip(params, args)), **kwargs})
+            return result
+        finally:
+            self.persistence.end_action()
+            record(MANAGER_QUERIES, audit)
+
+    return wrapper
+
+
 class GameManager:
     """Runtime coordinator for a single interactive Clue-Less game."""
 
+    @audited(MANAGER_QUERIES, "__init__")
     def __init__(self, game_name: str = "default", lobby_players=None):
         self.room_name = game_name
         self.players: List[Dict] = []
@@ -31,8 +87,13 @@ class GameManager:
         }
         self.is_over = False
         self.winner: Optional[str] = None
-        self.last_suggestion_result: Optional[Dict] = None
+        self._last_suggestion_result: Optional[Dict] = None
         self.pending_disproof: Dict = {}
+        self.events: Optional[EventLog] = None
+        self._init_state_cache()
+        # Model writes made during an action are collected and flushed together
+        self.persistence = WriteBehindBuffer(on_write=functools.partial(GAME_VERSIONS.bump, game_name))
+        self.persistence.begin_action()
 
         # Ensure we have a database record for the game
         self.game, _ = Game.objects.get_or_create(name=game_name)
@@ -40,15 +101,20 @@ class GameManager:
             is_completed=False,
             is_active=True,
             current_player=None,
+            hallway_occupancy=0,
         )
         self.game.refresh_from_db()
 
+        # Hallway occupancy belongs to this game only; persisting it is optional
+        self.occupancy = self._create_occupancy()
+
         # Clear any lingering players from a previous run of the same game
         Player.objects.filter(game=self.game).delete()
 
         # Build the board layout and starting slots
         self._initialize_board()
         self._initialize_starting_positions()
+        self.board_nodes = self._load_board_nodes()
 
         # Prepare the deck (creates cards if they do not exist) and mystery solution
         # Delete any existing solution for this game before creating a new one
@@ -71,84 +137,460 @@ class GameManager:
         self._deal_cards()
 
         # Engines that manage suggestion / accusation side effects
-        self.suggestion_engine = SuggestionEngine(self.players, room_name=self.room_name)
+        self.suggestion_engine = SuggestionEngine(
+            self.players,
+            room_name=self.room_name,
+            board_nodes=self.board_nodes,
+            occupancy=self.occupancy,
+            persistence=self.persistence,
+        )
         self.accusation_engine = AccusationEngine(self.solution, room_name=self.room_name)
 
-        # Choose the first player (Miss Scarlet goes first if present, otherwise random)
-        first_index = None
-        for idx, entry in enumerate(self.players):
-            if entry["name"] == "Miss Scarlet":
-                first_index = idx
-                break
-        
-        # If Miss Scarlet is not in the game, choose a random starting player
-        if first_index is None:
-            first_index = random.randint(0, len(self.players) - 1)
-        
-        self._switch_to_player(first_index)
+        self._switch_to_player(first_seat([entry["name"] for entry in self.players]))
+        self.persistence.end_action()
+        # The game's rows were rewritten above; its GameStateView ETag moves on
+        bump_on_commit(GAME_VERSIONS, game_name)
+        # Everything random is settled now; the log starts from here
+        self.events = EventLog.start(self)
         Notifier.broadcast("✅ Game initialized successfully!", room=self.room_name)
 
+    def _init_state_cache(self, state_version: int = 0):
+        # Serialized state is cached by section; changes mark their section dirty
+        self._state_sections: Dict[str, object] = {}
+        self._dirty_sections: Set[str] = set(STATE_SECTIONS)
+        self._public_state: Optional[Dict] = None
+        self._private_states: Dict[int, Dict] = {}  # seat -> private payload
+        # Version of the last state sent to clients; bumped whenever it changes
+        self.state_version = state_version
+        self._published_state: Optional[Dict] = None
+        self._published_private: Dict[int, Dict] = {}
+
+    def _create_occupancy(self, mask: int = 0) -> HallwayOccupancy:
+        return HallwayOccupancy(
+            mask,
+            on_change=(
+                self._persist_hallway_occupancy
+                if getattr(settings, "GAME_PERSIST_HALLWAY_OCCUPANCY", False)
+                else None
+            ),
+        )
+
     # ------------------------------------------------------------------
-    # Public API used by websocket consumer
+    # Snapshots
     # ------------------------------------------------------------------
-    def serialize_state(self) -> Dict:
-        current_entry = (
-            self.players[self.current_index]
-            if self.players and not self.is_over
-            else None
+    def to_snapshot(self) -> Dict:
+        """
+        Compact, JSON-safe snapshot of the whole game for checkpoints.
+
+        Everything is stored as integers: model primary keys, ``BOARD_GRAPH``
+        node ids, ``CARD_CATALOG`` indices and masks, and seats.
+        """
+        index = CARD_CATALOG.index
+        seat_of = {entry["name"]: entry["seat"] for entry in self.players}
+        return {
+            "v": SNAPSHOT_VERSION,
+            "name": self.room_name,
+            "game": [
+                self.game.pk,
+                self.game.solution_id,
+                self.game.is_active,
+                self.game.is_completed,
+            ],
+            "solution": [index[self.solution[key]] for key in ("suspect", "weapon", "room")],
+            "board": [location.pk for location in self.board_nodes],
+            "players": [
+                [
+                    entry["player_obj"].pk,
+                    entry["player_obj"].starting_position_id,
+                    index[entry["name"]],
+                    BOARD_GRAPH.node_id(entry["location"].name),
+                    entry["hand"],
+                    entry["known_cards"],
+                    entry["eliminated"]
+                    | entry.get("arrived_via_suggestion", False) << 1
+                    | entry["player_obj"].is_active_turn << 2,
+                    [[index[card], seat_of[name]] for card, name in entry["revealed_by"].items()],
+                    [
+                        [index[card], [seat_of[name] for name in names]]
+                        for card, names in entry["revealed_to"].items()
+                    ],
+                ]
+                for entry in self.players
+            ],
+            "turn": [
+                self.current_index,
+                sum(bool(self.turn_state.get(flag)) << bit for bit, flag in enumerate(TURN_STATE_FLAGS)),
+                self.is_over,
+                seat_of.get(self.winner, -1),
+                self.state_version,
+            ],
+            "occupancy": self.occupancy.mask,
+            "last_suggestion": self._snapshot_suggestion(self.last_suggestion_result, seat_of),
+            "pending_disproof": self._snapshot_disproof(self.pending_disproof, seat_of),
+            "deduction": [entry["deduction"].to_row() for entry in self.players],
+            "bots": [entry.get("bot") for entry in self.players],
+            # Bytes of the event log this snapshot already includes
+            "log": self.events.size if self.events is not None else None,
+        }
+
+    @staticmethod
+    def _snapshot_suggestion(result: Optional[Dict], seat_of: Dict) -> Optional[List]:
+        if result is None:
+            return None
+        index = CARD_CATALOG.index
+        return [
+            index[result["suspect"]],
+            index[result["weapon"]],
+            index[result["room"]],
+            seat_of[result["suggester"]],
+            index[result["card"]] if result.get("card") else -1,
+            seat_of[result["disprover"]] if "disprover" in result else -1,
+        ]
+
+    @staticmethod
+    def _snapshot_disproof(pending: Dict, seat_of: Dict) -> Optional[List]:
+        if not pending:
+            return None
+        index = CARD_CATALOG.index
+        return [
+            seat_of[pending["suggester_name"]],
+            index[pending["suspect"]],
+            index[pending["weapon"]],
+            index[pending["room"]],
+            seat_of[pending["disprover_name"]] if "disprover_name" in pending else -1,
+            CARD_CATALOG.mask(pending.get("matching_cards", ())),
+        ]
+
+    @classmethod
+    @audited(MANAGER_QUERIES, "from_snapshot")
+    def from_snapshot(cls, snapshot: Dict) -> "GameManager":
+        """
+        Rebuild a live game from :meth:`to_snapshot` output without touching
+        the database: no board setup, deck creation or player creation. Model
+        instances are constructed from the stored primary keys.
+        """
+        if snapshot.get("v") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {snapshot.get('v')!r}.")
+        names = CARD_CATALOG.names
+        manager = cls.__new__(cls)
+        manager.room_name = snapshot["name"]
+        manager.board_nodes = _board_nodes_from_snapshot(tuple(snapshot["board"]))
+
+        current_index, turn_bits, is_over, winner_seat, state_version = snapshot["turn"]
+        player_rows = snapshot["players"]
+        game_id, solution_id, is_active, is_completed = snapshot["game"]
+        manager.game = _existing(
+            Game(
+                pk=game_id,
+                name=manager.room_name,
+                solution_id=solution_id,
+                is_active=is_active,
+                is_completed=is_completed,
+                hallway_occupancy=snapshot["occupancy"],
+                current_player_id=None if is_over else player_rows[current_index][0],
+            )
         )
-        current_payload = (
-            {
-                "id": current_entry["player_obj"].id,
-                "name": current_entry["name"],
+
+        manager.players = []
+        for seat, row in enumerate(player_rows):
+            player_id, start_id, name, node, hand, known, flags, revealed_by, revealed_to = row
+            location = manager.board_nodes[node]
+            in_room = BOARD_GRAPH.is_room[node]
+            manager.players.append(
+                {
+                    "seat": seat,
+                    "name": names[name],
+                    "player_obj": _existing(
+                        Player(
+                            pk=player_id,
+                            game_id=game_id,
+                            character_name=names[name],
+                            starting_position_id=start_id,
+                            current_room_id=location.pk if in_room else None,
+                            current_hallway_id=None if in_room else location.pk,
+                            is_eliminated=bool(flags & 1),
+                            is_active_turn=bool(flags & 4),
+                        )
+                    ),
+                    "location": location,
+                    "hand": hand,
+                    "eliminated": bool(flags & 1),
+                    "known_cards": known,
+                    "revealed_by": {},
+                    "revealed_to": {},
+                    "arrived_via_suggestion": bool(flags & 2),
+                }
+            )
+        seat_names = [entry["name"] for entry in manager.players]
+        for entry, row in zip(manager.players, player_rows):
+            entry["revealed_by"] = {names[card]: seat_names[seat] for card, seat in row[7]}
+            entry["revealed_to"] = {
+                names[card]: [seat_names[seat] for seat in seats] for card, seats in row[8]
             }
-            if current_entry
+
+        for entry, bot in zip(manager.players, snapshot.get("bots") or [None] * len(player_rows)):
+            entry["bot"] = bot
+
+        hands = [entry["hand"] for entry in manager.players]
+        deduction_rows = snapshot.get("deduction")
+        for entry in manager.players:
+            if deduction_rows:
+                row = deduction_rows[entry["seat"]]
+                entry["deduction"] = Deduction.from_row(entry["seat"], hands, row)
+            else:
+                # Older snapshots: start again from the hand and the cards shown
+                entry["deduction"] = Deduction(entry["seat"], hands)
+                for card, name in entry["revealed_by"].items():
+                    entry["deduction"].observe_card(seat_names.index(name), CARD_CATALOG.index[card])
+
+        manager.current_index = current_index
+        manager.turn_state = {
+            flag: bool(turn_bits >> bit & 1) for bit, flag in enumerate(TURN_STATE_FLAGS)
+        }
+        manager.is_over = bool(is_over)
+        manager.winner = seat_names[winner_seat] if winner_seat >= 0 else None
+        manager._last_suggestion_result = _suggestion_from_snapshot(
+            snapshot["last_suggestion"], seat_names
+        )
+        manager.pending_disproof = _disproof_from_snapshot(
+            snapshot["pending_disproof"], manager.players
+        )
+        manager._init_state_cache(state_version)
+
+        manager.persistence = WriteBehindBuffer(
+            on_write=functools.partial(GAME_VERSIONS.bump, manager.room_name)
+        )
+        manager.occupancy = manager._create_occupancy(snapshot["occupancy"])
+        manager.deck = None  # Only needed to deal the opening hands
+        log_size = snapshot.get("log")
+        manager.events = (
+            EventLog(manager.room_name, log_size)
+            if log_size is not None and event_log_dir() is not None
             else None
         )
+        suspect, weapon, room = (names[card] for card in snapshot["solution"])
+        manager.solution = {"suspect": suspect, "weapon": weapon, "room": room}
+        manager.suggestion_engine = SuggestionEngine(
+            manager.players,
+            room_name=manager.room_name,
+            board_nodes=manager.board_nodes,
+            occupancy=manager.occupancy,
+            persistence=manager.persistence,
+        )
+        manager.accusation_engine = AccusationEngine(manager.solution, room_name=manager.room_name)
+        return manager
 
+    # ------------------------------------------------------------------
+    # Public API used by websocket consumer
+    # ------------------------------------------------------------------
+    @timed(STATE_SERIALIZATION, "serialize_state")
+    def serialize_state(self) -> Dict:
+        """
+        Full state including every player's private fields.
+
+        Only for server-side use; clients receive ``serialize_public_state``
+        plus their own ``serialize_private_state``.
+        """
+        state = dict(self.serialize_public_state())
+        state["players"] = [
+            {**payload, **self.serialize_private_state(entry)}
+            for payload, entry in zip(state["players"], self.players)
+        ]
+        for payload in state["players"]:
+            payload.pop("last_suggestion_card")
+        if self.last_suggestion_result is not None:
+            state["last_suggestion"] = dict(self.last_suggestion_result)
+        return state
+
+    def serialize_public_state(self) -> Dict:
+        """
+        State every viewer may see: no hands, knowledge or revealed cards.
+
+        Built from cached sections, so calls between changes are free. The
+        returned dict is shared; treat it as read-only.
+        """
+        if self._public_state is None:
+            sections = self._state_sections
+            for section in self._dirty_sections:
+                sections[section] = getattr(self, f"_serialize_{section}")()
+            self._dirty_sections.clear()
+            self._public_state = {
+                "players": sections["players"],
+                **sections["turn_state"],
+                "last_suggestion": sections["last_suggestion"],
+            }
+        return self._public_state
+
+    def _serialize_players(self) -> List[Dict]:
+        return [
+            {
+                "id": entry["player_obj"].id,
+                "name": entry["name"],
+                "location": self._format_location(entry["location"]),
+                "location_type": self._location_type(entry["location"]),
+                "eliminated": entry["eliminated"],
+                "arrived_via_suggestion": entry.get("arrived_via_suggestion", False),
+                "bot": entry.get("bot"),
+            }
+            for entry in self.players
+        ]
+
+    def _serialize_turn_state(self) -> Dict:
         return {
-            "players": [
-                {
-                    "id": entry["player_obj"].id,
-                    "name": entry["name"],
-                    "location": self._format_location(entry["location"]),
-                    "location_type": self._location_type(entry["location"]),
-                    "eliminated": entry["eliminated"],
-                    "arrived_via_suggestion": entry.get("arrived_via_suggestion", False),
-                    "hand": sorted(entry.get("hand", [])),  # Original cards dealt to player
-                    "known_cards": sorted(entry.get("known_cards", [])),  # All cards known (hand + revealed)
-                    "revealed_by": entry.get("revealed_by", {}),  # Dict mapping card_name -> disprover_name
-                    "revealed_to": entry.get("revealed_to", {}),  # Dict mapping card_name -> list of player names
-                    "possible_solution_cards": self._get_possible_solution_cards(entry),  # Cards that could be in solution
-                }
-                for entry in self.players
-            ],
-            "current_player": current_payload,
+            "current_player": self.current_player_payload(),
             "turn_state": dict(self.turn_state),
             "is_active": self.game.is_active,
             "is_completed": self.game.is_completed,
             "is_over": self.is_over,
             "winner": self.winner,
-            "last_suggestion": self.last_suggestion_result,
         }
 
+    def _serialize_last_suggestion(self) -> Optional[Dict]:
+        if self.last_suggestion_result is None:
+            return None
+        # Which card was shown is private to the suggester and the disprover
+        last_suggestion = {
+            key: value
+            for key, value in self.last_suggestion_result.items()
+            if key != "card"
+        }
+        last_suggestion["disproved"] = self.last_suggestion_result.get("card") is not None
+        return last_suggestion
+
+    def current_player_payload(self) -> Optional[Dict]:
+        """``{"id", "name"}`` of the player whose turn it is, or None once the game is over."""
+        if not self.players or self.is_over:
+            return None
+        entry = self.players[self.current_index]
+        return {"id": entry["player_obj"].id, "name": entry["name"]}
+
+    def serialize_private_state(self, entry: Dict) -> Dict:
+        """State only the given player may see (cached; treat as read-only)."""
+        payload = self._private_states.get(entry["seat"])
+        if payload is None:
+            payload = self._private_states[entry["seat"]] = self._build_private_state(entry)
+        return payload
+
+    def _build_private_state(self, entry: Dict) -> Dict:
+        last = self.last_suggestion_result
+        shown_card = None
+        if last is not None and entry["name"] in (last.get("suggester"), last.get("disprover")):
+            shown_card = last.get("card")
+        return {
+            "hand": CARD_CATALOG.sorted_names(entry["hand"]),  # Original cards dealt to player
+            "known_cards": CARD_CATALOG.sorted_names(entry["known_cards"]),  # All cards known (hand + revealed)
+            "revealed_by": dict(entry.get("revealed_by", {})),  # Dict mapping card_name -> disprover_name
+            "revealed_to": {  # Dict mapping card_name -> list of player names
+                card: list(names) for card, names in entry.get("revealed_to", {}).items()
+            },
+            "possible_solution_cards": self._get_possible_solution_cards(entry),  # Cards that could be in solution
+            "last_suggestion_card": shown_card,  # Card shown in the last suggestion, if involved
+        }
+
+    @timed(STATE_SERIALIZATION, "publish_state")
+    def publish_state(self) -> Dict:
+        """
+        Publish the current state, bumping ``state_version`` if it changed.
+
+        Returns ``{"version", "state", "changes", "private"}``. ``state`` is
+        the public state and ``changes`` its delta from the previously
+        published version: ``None`` on the first publish and empty when nothing
+        changed. ``private`` maps player ids to their private state, for the
+        players whose private state changed since it was last published.
+        """
+        state = self.serialize_public_state()
+        previous = self._published_state
+        if previous is None:
+            changes = None
+        elif state is previous:
+            changes = {}
+        else:
+            changes = diff_states(previous, state)
+        if previous is None or changes:
+            self.state_version += 1
+            self._published_state = state
+
+        private = {}
+        for entry in self.players:
+            player_id = entry["player_obj"].id
+            payload = self.serialize_private_state(entry)
+            published = self._published_private.get(player_id)
+            if payload is not published and payload != published:
+                self._published_private[player_id] = payload
+                private[player_id] = payload
+        return {
+            "version": self.state_version,
+            "state": self._published_state,
+            "changes": changes,
+            "private": private,
+        }
+
+    def published_private_state(self, player_id: int) -> Optional[Dict]:
+        """The private state last published to ``player_id``."""
+        return self._published_private.get(player_id)
+
+    @property
+    def last_suggestion_result(self) -> Optional[Dict]:
+        return self._last_suggestion_result
+
+    @last_suggestion_result.setter
+    def last_suggestion_result(self, result: Optional[Dict]):
+        # The suggester and disprover of the old and new result see the card
+        involved = set()
+        for last in (self._last_suggestion_result, result):
+            if last is not None:
+                involved.update((last.get("suggester"), last.get("disprover")))
+        self._last_suggestion_result = result
+        self._mark_dirty("last_suggestion")
+        self._mark_knowledge_dirty(*(p for p in self.players if p["name"] in involved))
+
+    def _mark_dirty(self, *sections: str):
+        """Rebuild ``sections`` of the public state on the next serialize."""
+        self._dirty_sections.update(sections)
+        self._public_state = None
+
+    def _mark_knowledge_dirty(self, *entries: Dict):
+        """Rebuild the private state of ``entries`` on the next serialize."""
+        for entry in entries:
+            self._private_states.pop(entry["seat"], None)
+
     def _get_possible_solution_cards(self, player_entry: Dict) -> Dict:
         """
-        Calculate which cards could still be in the solution from this player's perspective.
-        A card is NOT in the solution if:
-        - The player has it in their hand
-        - The player has seen it revealed by another player
+        Cards that could still be in the solution from this player's perspective,
+        as deduced from their hand, the cards shown to them and the public
+        outcome of every suggestion (see ``game_engine/deduction.py``).
         """
-        from game.game_engine.constants import SUSPECTS, WEAPONS, ROOMS
-        
-        known_cards = set(player_entry.get("known_cards", []))
-        
+        candidates = player_entry["deduction"].candidates
         return {
-            "suspects": [s for s in SUSPECTS if s not in known_cards],
-            "weapons": [w for w in WEAPONS if w not in known_cards],
-            "rooms": [r for r in ROOMS if r not in known_cards],
+            "suspects": CARD_CATALOG.names_of(candidates & CARD_CATALOG.suspects_mask),
+            "weapons": CARD_CATALOG.names_of(candidates & CARD_CATALOG.weapons_mask),
+            "rooms": CARD_CATALOG.names_of(candidates & CARD_CATALOG.rooms_mask),
         }
 
+    def get_hint(self, player_id: int):
+        """
+        How likely each card is to be in the envelope, from this player's
+        perspective (see ``game_engine/estimator.py``). Off unless the
+        ``GAME_HINTS_ENABLED`` setting is on. Estimates on the calling
+        thread; ``GameActor.hint`` runs the estimate off the event loop.
+        """
+        request = self.hint_request(player_id)
+        if not request["success"]:
+            return request
+        return estimate_hint(request["deduction"])
+
+    def hint_request(self, player_id: int) -> Dict:
+        """A copy of the player's ``Deduction`` to estimate a hint from, or an error result."""
+        if not getattr(settings, "GAME_HINTS_ENABLED", False):
+            return {"success": False, "error": "Hints are disabled for this game."}
+        entry = self.get_player_entry(player_id)
+        if not entry:
+            return {"success": False, "error": "Player not found."}
+        hands = [player["hand"] for player in self.players]
+        # A copy: the game moves on while the estimate runs
+        deduction = Deduction.from_row(entry["seat"], hands, entry["deduction"].to_row())
+        return {"success": True, "deduction": deduction}
+
     def get_player_entry(self, player_id: int) -> Optional[Dict]:
         for entry in self.players:
             if entry["player_obj"].id == player_id:
@@ -166,59 +608,23 @@ class GameManager:
     def get_available_moves(self, player_entry: Dict) -> List[Dict]:
         location = player_entry["location"]
         options: List[Dict] = []
-
-        if isinstance(location, Hallway):
-            # Hallways connect two rooms – the player must enter one of them
-            for room in (location.room1, location.room2):
-                options.append({"name": room.name, "type": "room", "target": room})
-        elif isinstance(location, Room):
-            # Get all hallways connected to this room
-            hallways = Hallway.objects.filter(
-                models.Q(room1=location) | models.Q(room2=location),
-            ).select_related("room1", "room2")
-            
-            # Filter out hallways that are occupied by active (non-eliminated) players
-            for hallway in hallways:
-                # Check if hallway is actually occupied by an active player
-                is_occupied_by_active = False
-                if hallway.is_occupied:
-                    # Check if any active player is in this hallway
-                    for entry in self.players:
-                        if (not entry["eliminated"] and 
-                            isinstance(entry["location"], Hallway) and
-                            entry["location"].id == hallway.id):
-                            is_occupied_by_active = True
-                            break
-                
-                if not is_occupied_by_active:
-                    # Free the hallway if it's marked occupied but no active player is there
-                    if hallway.is_occupied:
-                        self._set_hallway_occupied(hallway, False)
-                    options.append(
-                        {"name": hallway.name, "type": "hallway", "target": hallway}
-                    )
-
-            # Secret passage (if any)
-            for connected_room in location.connected_rooms.all():
-                options.append(
-                    {
-                        "name": connected_room.name,
-                        "type": "room",
-                        "target": connected_room,
-                    }
-                )
-
-            # Staying is only an option if the player was dragged into the room by suggestion
-            if player_entry.get("arrived_via_suggestion"):
-                options.append(
-                    {
-                        "name": f"Stay in {location.name}",
-                        "type": "stay",
-                        "target": location,
-                    }
-                )
+        node = BOARD_GRAPH.find_node(self._format_location(location))
+        if node == NO_NODE:
+            return options
+
+        for destination in movement_options(
+            node, self.occupancy.mask, player_entry.get("arrived_via_suggestion", False)
+        ):
+            target = self.board_nodes[destination]
+            if destination == node:
+                options.append({"name": f"Stay in {location.name}", "type": "stay", "target": target})
+            elif BOARD_GRAPH.is_room[destination]:
+                options.append({"name": target.name, "type": "room", "target": target})
+            else:
+                options.append({"name": target.name, "type": "hallway", "target": target})
         return options
 
+    @game_action
     def move_player(self, player_id: int, destination_name: Optional[str] = None):
         if self.is_over:
             return {"success": False, "error": "The game has already ended."}
@@ -244,6 +650,7 @@ class GameManager:
                 f"{self._format_location(entry['location'])}."
             )
             self.turn_state["has_moved"] = True
+            self._mark_dirty("turn_state")
             Notifier.broadcast(message, room=self.room_name)
             return {"success": True, "messages": [message]}
 
@@ -270,11 +677,13 @@ class GameManager:
 
         self._apply_movement(entry, selected)
         self.turn_state["has_moved"] = True
+        self._mark_dirty("players", "turn_state")
         # Don't reset arrived_via_suggestion here - it persists until turn ends
         message = f"🚶 {entry['name']} moves to {selected['name']}."
         Notifier.broadcast(message, room=self.room_name)
         return {"success": True, "messages": [message]}
 
+    @game_action
     def make_suggestion_action(self, player_id: int, suspect: str, weapon: str):
         if self.is_over:
             return {"success": False, "error": "The game has already ended."}
@@ -291,6 +700,9 @@ class GameManager:
         if not isinstance(location, Room):
             return {"success": False, "error": "Suggestions may only be made from a room."}
 
+        if suspect not in SUSPECTS or weapon not in WEAPONS:
+            return {"success": False, "error": "Unknown suspect or weapon."}
+
         # Check if player has confirmed their movement
         if not self.turn_state["has_moved"]:
             return {"success": False, "error": "You must confirm your movement before making a suggestion."}
@@ -305,6 +717,14 @@ class GameManager:
         disproof_result = self.suggestion_engine.handle_suggestion(
             entry, suspect, weapon, location.name
         )
+        # The suggested suspect may have been moved into the room
+        self._mark_dirty("players", "turn_state")
+        disprover = disproof_result["first_disprover"]
+        self._observe_suggestion(
+            entry,
+            CARD_CATALOG.mask((suspect, weapon, location.name)),
+            disprover["seat"] if disprover else None,
+        )
         
         # Store the pending disproof state for later use
         # include the suggester's database id so we can privately message them
@@ -318,7 +738,6 @@ class GameManager:
         
         if disproof_result["pending_disproof"]:
             # Disproof pending: disprover must choose a card
-            disprover = disproof_result["first_disprover"]
             matching_cards = disproof_result["matching_cards"]
             
             self.pending_disproof["disprover_id"] = disprover["player_obj"].id
@@ -361,6 +780,7 @@ class GameManager:
                 "payload": dict(self.last_suggestion_result),
             }
 
+    @game_action
     def choose_disproving_card(self, player_id: int, card_name: str):
         """
         Disprover chooses which card to reveal.
@@ -391,7 +811,8 @@ class GameManager:
             return {"success": False, "error": f"Card '{card_name}' is not a valid choice."}
 
         # Verify the card is in the disprover's hand
-        if card_name not in disprover["hand"]:
+        card_bit = CARD_CATALOG.bit(card_name)
+        if not disprover["hand"] & card_bit:
             return {"success": False, "error": f"Card '{card_name}' is not in your hand."}
 
         print(f"[DISPROOF] {disprover['name']} chose {card_name} to disprove")
@@ -409,8 +830,10 @@ class GameManager:
 
         # Add the revealed card to suggester's known cards
         suggester = self.get_player_entry(suggester_id)
+        self._mark_knowledge_dirty(disprover, *([suggester] if suggester else []))
         if suggester:
-            suggester["known_cards"].add(card_name)
+            suggester["known_cards"] |= card_bit
+            suggester["deduction"].observe_card(disprover["seat"], CARD_CATALOG.index[card_name])
             # Track who revealed this card to the suggester
             if "revealed_by" not in suggester:
                 suggester["revealed_by"] = {}
@@ -442,6 +865,7 @@ class GameManager:
             "messages": [f"{disprover['name']} chose {card_name}."],
         }
 
+    @game_action
     def make_accusation_action(self, player_id: int, suspect: str, weapon: str, room: str):
         if self.is_over:
             return {"success": False, "error": "The game has already ended."}
@@ -458,6 +882,7 @@ class GameManager:
         Notifier.broadcast(accusation_msg, room=self.room_name)
         correct = self.accusation_engine.check_accusation(suspect, weapon, room)
         self.turn_state["has_accused"] = True
+        self._mark_dirty("turn_state")
 
         if correct:
             self._finalize_game(entry, correct_accusation=True)
@@ -471,8 +896,8 @@ class GameManager:
             }
 
         entry["eliminated"] = True
-        Player.objects.filter(pk=entry["player_obj"].pk).update(is_eliminated=True)
-        entry["player_obj"].is_eliminated = True
+        self.persistence.mark(entry["player_obj"], is_eliminated=True)
+        self._mark_dirty("players")
         
         # Free the hallway if the eliminated player was in one
         location = entry["location"]
@@ -493,13 +918,14 @@ class GameManager:
                 "game_over": True,
             }
 
-        next_player = self._advance_turn()
+        self._advance_turn()
         return {
             "success": True,
             "messages": [f"{entry['name']} has been eliminated."],
-            "next_player": self.serialize_state()["current_player"],
+            "next_player": self.current_player_payload(),
         }
 
+    @game_action
     def end_turn(self, player_id: int):
         if self.is_over:
             return {"success": False, "error": "The game has already ended."}
@@ -543,7 +969,7 @@ class GameManager:
         return {
             "success": True,
             "messages": [f"Turn ended. Next up: {next_player['name']}"],
-            "next_player": self.serialize_state()["current_player"],
+            "next_player": self.current_player_payload(),
         }
 
     # ------------------------------------------------------------------
@@ -552,6 +978,12 @@ class GameManager:
     def _broadcast(self, message: str):
         Notifier.broadcast(message, room=self.room_name)
 
+    def _observe_suggestion(self, suggester: Dict, cards: int, disprover: Optional[int]):
+        """Every player learns who could and could not disprove a suggestion."""
+        for entry in self.players:
+            if entry["deduction"].observe_suggestion(suggester["seat"], cards, disprover):
+                self._mark_knowledge_dirty(entry)
+
     def _finalize_game(self, winner_entry: Optional[Dict], correct_accusation: bool):
         if winner_entry:
             self.winner = winner_entry["name"]
@@ -561,19 +993,17 @@ class GameManager:
             self.winner = None
 
         self.is_over = True
-        Game.objects.filter(pk=self.game.pk).update(
+        self._mark_dirty("turn_state")
+        self.persistence.mark(
+            self.game,
             is_completed=True,
             is_active=False,
             current_player=None,
         )
-        self.game.is_completed = True
-        self.game.is_active = False
-        self.game.current_player = None
 
         for entry in self.players:
             if entry["player_obj"].is_active_turn:
-                Player.objects.filter(pk=entry["player_obj"].pk).update(is_active_turn=False)
-                entry["player_obj"].is_active_turn = False
+                self.persistence.mark(entry["player_obj"], is_active_turn=False)
 
     def _advance_turn(self) -> Optional[Dict]:
         if not self.players:
@@ -583,33 +1013,24 @@ class GameManager:
         if self.current_index is not None:
             current_player_entry = self.players[self.current_index]
             current_player_entry["arrived_via_suggestion"] = False
+            self._mark_dirty("players")
 
-        starting_index = self.current_index
-        while True:
-            self.current_index = (self.current_index + 1) % len(self.players)
-            candidate = self.players[self.current_index]
-            if not candidate["eliminated"]:
-                self._switch_to_player(self.current_index)
-                return candidate
-            if self.current_index == starting_index:
-                return None
+        seat = next_seat([entry["eliminated"] for entry in self.players], self.current_index)
+        if seat is None:
+            return None
+        self._switch_to_player(seat)
+        return self.players[seat]
 
     def _switch_to_player(self, index: int):
         self.current_index = index
         current_entry = self.players[self.current_index]
 
-        Game.objects.filter(pk=self.game.pk).update(
-            current_player=current_entry["player_obj"]
-        )
-        self.game.current_player = current_entry["player_obj"]
+        self.persistence.mark(self.game, current_player=current_entry["player_obj"])
 
         for entry in self.players:
             should_be_active = entry is current_entry and not entry["eliminated"]
             if entry["player_obj"].is_active_turn != should_be_active:
-                Player.objects.filter(pk=entry["player_obj"].pk).update(
-                    is_active_turn=should_be_active
-                )
-                entry["player_obj"].is_active_turn = should_be_active
+                self.persistence.mark(entry["player_obj"], is_active_turn=should_be_active)
 
         self.turn_state = {
             "has_moved": False,
@@ -617,6 +1038,7 @@ class GameManager:
             "has_accused": False,
             "entered_room": False,  # Track if player entered a new room this turn
         }
+        self._mark_dirty("turn_state")
         self._broadcast(f"🎯 {current_entry['name']} will act now.")
 
     def _apply_movement(self, player_entry: Dict, option: Dict):
@@ -634,23 +1056,13 @@ class GameManager:
             self._set_hallway_occupied(hallway, True)
             player_entry["location"] = hallway
             # Don't reset arrived_via_suggestion here - it persists until turn ends
-            Player.objects.filter(pk=player_obj.pk).update(
-                current_room=None,
-                current_hallway=hallway,
-            )
-            player_obj.current_room = None
-            player_obj.current_hallway = hallway
+            self.persistence.mark(player_obj, current_room=None, current_hallway=hallway)
         elif option_type == "room":
             room: Room = option["target"]
             player_entry["location"] = room
             # Don't reset arrived_via_suggestion here - it persists until turn ends
             self.turn_state["entered_room"] = True  # Player entered a room this turn
-            Player.objects.filter(pk=player_obj.pk).update(
-                current_room=room,
-                current_hallway=None,
-            )
-            player_obj.current_room = room
-            player_obj.current_hallway = None
+            self.persistence.mark(player_obj, current_room=room, current_hallway=None)
         elif option_type == "stay":
             # Staying keeps the player in the room but counts as their movement action
             # Player must still make a suggestion since they chose to stay in the room
@@ -676,14 +1088,15 @@ class GameManager:
     def _set_hallway_occupied(self, hallway: Hallway, occupied: bool):
         if hallway is None:
             return
-        updated = Hallway.objects.filter(pk=hallway.pk).update(is_occupied=occupied)
-        if updated:
-            hallway.is_occupied = occupied
+        self.occupancy.set(BOARD_GRAPH.node_id(hallway.name), occupied)
 
     def _is_hallway_occupied(self, hallway: Hallway) -> bool:
         if hallway is None:
             return False
-        return Hallway.objects.filter(pk=hallway.pk, is_occupied=True).exists()
+        return self.occupancy.is_occupied(BOARD_GRAPH.node_id(hallway.name))
+
+    def _persist_hallway_occupancy(self, mask: int):
+        self.persistence.mark(self.game, hallway_occupancy=mask)
 
     # ------------------------------------------------------------------
     # Initialization helpers
@@ -698,10 +1111,10 @@ class GameManager:
                     f"Player {lobby_player.id} has not selected a character."
                 )
 
-            start_pos = StartingPosition.objects.get(
+            start_pos = StartingPosition.objects.select_related("hallway").get(
                 character=lobby_player.character_card
             )
-            hallway = start_pos.hallway
+            hallway = self.board_nodes[BOARD_GRAPH.node_id(start_pos.hallway.name)]
             if self._is_hallway_occupied(hallway):
                 raise RuntimeError(
                     f"Starting hallway for {lobby_player.character_card.name} is occupied."
@@ -720,15 +1133,17 @@ class GameManager:
 
             self.players.append(
                 {
+                    "seat": len(self.players),  # Fixed clockwise position
                     "name": lobby_player.character_card.name,
                     "player_obj": player,
                     "location": hallway,
-                    "hand": [],
+                    "hand": 0,  # CARD_CATALOG bit mask
                     "eliminated": False,
-                    "known_cards": set(),
+                    "known_cards": 0,  # CARD_CATALOG bit mask
                     "revealed_by": {},  # Dict mapping card_name -> disprover_name
                     "revealed_to": {},  # Dict mapping card_name -> list of player names this card was revealed to
                     "arrived_via_suggestion": False,
+                    "bot": getattr(lobby_player, "bot_kind", "") or None,  # Bot strategy, None for humans
                 }
             )
 
@@ -736,9 +1151,24 @@ class GameManager:
         hands = self.deck.deal(len(self.players), self.game.solution)
         for index, entry in enumerate(self.players):
             entry["hand"] = hands[index]
-            entry["known_cards"] = set(hands[index])
+            entry["known_cards"] = hands[index]
             entry["revealed_by"] = {}  # Reset revealed_by when dealing cards
             entry["revealed_to"] = {}  # Reset revealed_to when dealing cards
+            entry["deduction"] = Deduction(index, hands)
+        self._private_states.clear()
+
+    def _load_board_nodes(self) -> List:
+        """Load the board models once, indexed by ``BOARD_GRAPH`` node id."""
+        nodes: List = [None] * BOARD_GRAPH.node_count
+        for location in list(Room.objects.all()) + list(
+            Hallway.objects.select_related("room1", "room2")
+        ):
+            node = BOARD_GRAPH.find_node(location.name)
+            if node != NO_NODE:
+                nodes[node] = location
+        if any(location is None for location in nodes):
+            raise RuntimeError("Board models do not match the board definitions.")
+        return nodes
 
     def _initialize_starting_positions(self):
         # If starting positions already exist, assume they are correct
@@ -784,3 +1214,123 @@ class GameManager:
                 room2=room_index[definition["room2"]],
                 is_occupied=False,
             )
+
+
+# ----------------------------------------------------------------------
+# Rules shared with the headless simulator (game_engine/simulation.py)
+# ----------------------------------------------------------------------
+def first_seat(characters: List[str], rng=random) -> int:
+    """Miss Scarlet goes first if present, otherwise a random player."""
+    if "Miss Scarlet" in characters:
+        return characters.index("Miss Scarlet")
+    return rng.randint(0, len(characters) - 1)
+
+
+def next_seat(eliminated: List[bool], current: int) -> Optional[int]:
+    """The next seat clockwise from ``current`` still in the game, or None."""
+    count = len(eliminated)
+    for step in range(1, count + 1):
+        seat = (current + step) % count
+        if not eliminated[seat]:
+            return seat
+    return None
+
+
+def movement_options(node: int, occupied: int, may_stay: bool) -> List[int]:
+    """
+    Destination nodes from ``node``. A hallway leads into either of its rooms.
+    A room leads into its hallways that are not ``occupied`` (a hallway bit
+    mask) and through its secret passage. Players dragged into a room by a
+    suggestion (``may_stay``) may also stay, which is ``node`` itself.
+    """
+    if not BOARD_GRAPH.is_room[node]:
+        return list(BOARD_GRAPH.adjacency[node])
+    options = [
+        hallway
+        for hallway in BOARD_GRAPH.adjacency[node]
+        if not occupied >> BOARD_GRAPH.hallway_index(hallway) & 1
+    ]
+    secret = BOARD_GRAPH.secret_passage[node]
+    if secret != NO_NODE:
+        options.append(secret)
+    if may_stay:
+        options.append(node)
+    return options
+
+
+def _existing(instance):
+    """Mark a model instance built from stored ids as a saved row."""
+    instance._state.adding = False
+    instance._state.db = "default"
+    return instance
+
+
+def _board_nodes_from_snapshot(pks: tuple) -> List:
+    nodes = _snapshot_boards.get(pks)
+    if nodes is None:
+        nodes = []
+        for node, pk in enumerate(pks):
+            name = BOARD_GRAPH.names[node]
+            if BOARD_GRAPH.is_room[node]:
+                nodes.append(
+                    _existing(
+                        Room(
+                            pk=pk,
+                            name=name,
+                            has_secret_passage=BOARD_GRAPH.secret_passage[node] != NO_NODE,
+                        )
+                    )
+                )
+            else:
+                room1, room2 = BOARD_GRAPH.adjacency[node]
+                nodes.append(
+                    _existing(
+                        Hallway(pk=pk, name=name, room1_id=pks[room1], room2_id=pks[room2])
+                    )
+                )
+        nodes = _snapshot_boards.setdefault(pks, nodes)
+    return nodes
+
+
+def _suggestion_from_snapshot(row: Optional[List], seat_names: List[str]) -> Optional[Dict]:
+    if row is None:
+        return None
+    names = CARD_CATALOG.names
+    suspect, weapon, room, suggester, card, disprover = row
+    result = {
+        "suspect": names[suspect],
+        "weapon": names[weapon],
+        "room": names[room],
+        "suggester": seat_names[suggester],
+        "card": names[card] if card >= 0 else None,
+    }
+    if disprover >= 0:
+        result["disprover"] = seat_names[disprover]
+    return result
+
+
+def _disproof_from_snapshot(row: Optional[List], players: List[Dict]) -> Dict:
+    if row is None:
+        return {}
+    names = CARD_CATALOG.names
+    suggester, suspect, weapon, room, disprover, matching = row
+    pending = {
+        "suggester_id": players[suggester]["player_obj"].pk,
+        "suggester_name": players[suggester]["name"],
+        "suspect": names[suspect],
+        "weapon": names[weapon],
+        "room": names[room],
+    }
+    if disprover >= 0:
+        pending["disprover_id"] = players[disprover]["player_obj"].pk
+        pending["disprover_name"] = players[disprover]["name"]
+        pending["matching_cards"] = CARD_CATALOG.names_of(matching)
+    return pending
+
+
+def estimate_hint(deduction: Deduction) -> Dict:
+    """The ``get_hint`` result for ``deduction``, from ``GAME_HINT_SAMPLES`` sampled deals."""
+    probabilities = estimate_envelope(
+        deduction, getattr(settings, "GAME_HINT_SAMPLES", DEFAULT_SAMPLES)
+    )
+    return {"success": True, "probabilities": probabilities_by_category(probabilities)}
@@ -0,0 +1,97 @@
+"""Background lobby housekeeping, off the request path.
+
+Every ``GAME_HOUSEKEEPING_INTERVAL`` seconds one :func:`sweep`, in a single
+transaction of bulk queries:
+
+* deactivates active lobbies without a human player (bots do not keep a
+  lobby open), and publishes their removal from the lobby directory
+* deletes orphaned ``LobbyPlayer`` rows: bots and players whose lobby is
+  closed, bots without a lobby, and players who have had no lobby for longer
+  than ``GAME_LOBBY_PLAYER_TTL`` seconds (counted from their creation)
+
+Lobby views therefore never clean up after each other, and ``list_lobbies``
+only reads. Sweeps run on the database writer (``writer.WRITER``). The
+scheduler is started with the ASGI application (``backend/asgi.py``), so
+tests and management commands sweep only when they call :func:`sweep`
+themselves.
+"""
+
+import threading
+import time
+from datetime import timedelta
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from game.game_engine.etags import bump_on_commit
+from game.game_engine.lobby_directory import LOBBY_DIRECTORY, publish_on_commit
+from game.game_engine.writer import WRITER
+
+
+def sweep() -> Dict[str, int]:
+    """Run one housekeeping pass; returns ``{"lobbies_closed", "players_purged"}``."""
+    from game.models import Lobby, LobbyPlayer
+
+    with transaction.atomic():
+        empty = Lobby.objects.filter(is_active=True).exclude(lobby_players__bot_kind="")
+        closed = list(empty.values_list("id", flat=True))
+        if closed:
+            # A person may have joined since the select; the filter is re-applied
+            empty.filter(id__in=closed).update(is_active=False)
+            closed = list(
+                Lobby.objects.filter(id__in=closed, is_active=False).values_list("id", flat=True)
+            )
+            for lobby_id in closed:
+                publish_on_commit("remove", lobby_id)
+
+        orphaned = Q(lobby__is_active=False) | (Q(lobby__isnull=True) & ~Q(bot_kind=""))
+        ttl = getattr(settings, "GAME_LOBBY_PLAYER_TTL", 24 * 60 * 60)
+        if ttl is not None:
+            cutoff = timezone.now() - timedelta(seconds=ttl)
+            orphaned |= Q(lobby__isnull=True, created_at__lt=cutoff)
+        purged, _ = LobbyPlayer.objects.filter(orphaned).delete()
+        if purged:
+            # get_player_lobby answers 404 for them now
+            bump_on_commit(LOBBY_DIRECTORY.versions)
+    return {"lobbies_closed": len(closed), "players_purged": purged}
+
+
+class _Housekeeper:
+    """Daemon thread running :func:`sweep` on an interval."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> bool:
+        """Start the thread unless it runs already or the interval is None."""
+        interval = getattr(settings, "GAME_HOUSEKEEPING_INTERVAL", 30)
+        with self._lock:
+            if interval is None or self._thread is not None:
+                return False
+            self._thread = threading.Thread(
+                target=self._run, args=(interval,), name="game-housekeeping", daemon=True
+            )
+            self._thread.start()
+            return True
+
+    def _run(self, interval: float):
+        while True:
+            time.sleep(interval)
+            try:
+                result = WRITER.call(sweep)
+                if any(result.values()):
+                    print(
+                        f"[Housekeeping] closed {result['lobbies_closed']} lobbies, "
+                        f"purged {result['players_purged']} players"
+                    )
+            except Exception as exc:
+                print(f"[Housekeeping error] {exc}")
+            close_old_connections()
+
+
+_housekeeper = _Housekeeper()
+start_housekeeping = _housekeeper.start
@@ -0,0 +1,171 @@
+"""In-memory directory of open lobbies, pushed to ``ws/lobbies/`` subscribers.
+
+The directory holds every active lobby as ``LobbySerializer`` data. It is
+loaded from the database once, by the first subscriber. After that, the
+lobby views hand it the data they have already serialized, so keeping it
+current costs no extra queries. Each change bumps ``version`` and is sent to
+the ``lobbies`` channel group as one pre-encoded event:
+
+* ``{"type": "lobby_updated", "version", "lobby"}`` - a lobby was created or
+  changed
+* ``{"type": "lobby_removed", "version", "lobby_id"}`` - a lobby closed
+
+A client that sees a version gap asks ``LobbyConsumer`` for the whole list
+again (``{"type": "get_lobbies"}``). The per-lobby versions in ``versions``
+also serve as the ETags of the lobby REST endpoints (see ``etags``); they
+move on even before the directory is loaded. Server work then grows with the number
+of lobby changes, not with connected clients times a polling rate. Changes
+are published once their transaction commits (see :func:`publish_on_commit`).
+Like live game sessions, the directory belongs to this process.
+"""
+
+import threading
+from typing import Dict, List, Optional
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+from game.game_engine.etags import VersionCounters
+from game.game_engine.frames import frame_event
+
+LOBBY_GROUP = "lobbies"
+
+
+class LobbyDirectory:
+    """Serialized active lobbies by id, and versions bumped on every change."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # None until the first snapshot; changes before then have no audience
+        self._lobbies: Optional[Dict[int, Dict]] = None
+        self.versions = VersionCounters()
+
+    @property
+    def loaded(self) -> bool:
+        return self._lobbies is not None
+
+    @property
+    def version(self) -> int:
+        return self.versions.version
+
+    def snapshot(self) -> Dict:
+        """``{"type": "lobbies", "version", "lobbies"}``; the first call loads from the database."""
+        with self._lock:
+            if self._lobbies is None:
+                self._lobbies = {lobby["id"]: lobby for lobby in _load_lobbies()}
+            return {
+                "type": "lobbies",
+                "version": self.version,
+                "lobbies": list(self._lobbies.values()),
+            }
+
+    def get(self, lobby_id: int) -> Optional[Dict]:
+        with self._lock:
+            return None if self._lobbies is None else self._lobbies.get(lobby_id)
+
+    # ------------------------------------------------------------------
+    # Changes; each returns the event to publish, or None if nothing changed
+    # ------------------------------------------------------------------
+    def put(self, lobby: Dict) -> Optional[Dict]:
+        """Store a lobby's serialized data (dropping it if it is no longer active)."""
+        if not lobby.get("is_active", True):
+            return self.remove(lobby["id"])
+        with self._lock:
+            if self._lobbies is None:
+                self.versions.bump(lobby["id"])
+                return None
+            if self._lobbies.get(lobby["id"]) == lobby:
+                return None
+            self._lobbies[lobby["id"]] = lobby
+            return self._event({"type": "lobby_updated", "lobby": lobby})
+
+    def update(self, lobby_id: int, **fields) -> Optional[Dict]:
+        """Change top-level fields of a lobby, such as ``game_in_progress``."""
+        with self._lock:
+            if self._lobbies is None:
+                self.versions.bump(lobby_id)
+                return None
+            lobby = self._lobbies.get(lobby_id)
+            if lobby is None or all(lobby.get(key) == value for key, value in fields.items()):
+                return None
+            # A new dict: snapshots already handed out must not change
+            lobby = self._lobbies[lobby_id] = {**lobby, **fields}
+            return self._event({"type": "lobby_updated", "lobby": lobby})
+
+    def remove(self, lobby_id: int) -> Optional[Dict]:
+        with self._lock:
+            if self._lobbies is None:
+                self.versions.bump(lobby_id)
+                return None
+            if self._lobbies.pop(lobby_id, None) is None:
+                return None
+            return self._event({"type": "lobby_removed", "lobby_id": lobby_id})
+
+    def remove_player(self, player_id: int) -> Optional[Dict]:
+        """
+        Take a player out of whichever lobby lists them. A lobby left without
+        players stays listed until housekeeping closes it.
+        """
+        with self._lock:
+            if self._lobbies is None:
+                # Which lobby is not known; every lobby's version moves on
+                self.versions.bump()
+                return None
+            for lobby_id, lobby in self._lobbies.items():
+                players = [player for player in lobby["players"] if player["id"] != player_id]
+                if len(players) != len(lobby["players"]):
+                    break
+            else:
+                return None
+            lobby = self._lobbies[lobby_id] = {
+                **lobby,
+                "players": players,
+                "player_count": len(players),
+            }
+            return self._event({"type": "lobby_updated", "lobby": lobby})
+
+    def reset(self) -> None:
+        """Forget everything; the next snapshot reloads from the database."""
+        with self._lock:
+            self._lobbies = None
+
+    def _event(self, event: Dict) -> Dict:
+        lobby_id = event["lobby"]["id"] if "lobby" in event else event["lobby_id"]
+        return {**event, "version": self.versions.bump(lobby_id)}
+
+
+LOBBY_DIRECTORY = LobbyDirectory()
+
+
+def _load_lobbies() -> List[Dict]:
+    from game.models import Lobby
+    from game.serializers import LobbySerializer
+
+    lobbies = Lobby.objects.filter(is_active=True).prefetch_related(
+        "lobby_players__character_card"
+    )
+    return [dict(data) for data in LobbySerializer(lobbies, many=True).data]
+
+
+def publish(event: Optional[Dict]) -> None:
+    """Send a directory event to every lobby subscriber (from sync code)."""
+    layer = get_channel_layer()
+    if event is not None and layer is not None:
+        async_to_sync(layer.group_send)(LOBBY_GROUP, frame_event(event))
+
+
+async def apublish(event: Optional[Dict]) -> None:
+    """:func:`publish` for async code."""
+    layer = get_channel_layer()
+    if event is not None and layer is not None:
+        await layer.group_send(LOBBY_GROUP, frame_event(event))
+
+
+def publish_on_commit(change: str, *args, **kwargs) -> None:
+    """
+    Once the current transaction commits, apply ``LOBBY_DIRECTORY.<change>(...)``
+    and publish the event it returns. Rolled-back changes are never published.
+    """
+    method = getattr(LOBBY_DIRECTORY, change)
+    transaction.on_commit(lambda: publish(method(*args, **kwargs)))
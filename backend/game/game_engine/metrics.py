@@ -0,0 +1,221 @@
+"""Latency histograms for the hot paths of live games.
+
+Every stage of a game command is timed into a histogram labelled with the
+``GameManager`` action it belongs to:
+
+* ``game_action_queue_wait_seconds`` - waiting in the game actor's queue
+* ``game_action_execution_seconds`` - applying the command on the actor
+* ``game_action_db_queries`` - queries run on the event loop meanwhile
+* ``game_state_serialization_seconds`` - ``publish_state``/``serialize_state``
+* ``game_fanout_seconds`` - handing the frames that follow to the channel layer
+* ``game_persistence_queue_wait_seconds`` and ``game_persistence_db_queries``
+  - the write-behind flush an action queued on ``PERSISTENCE_EXECUTOR``
+* ``game_thread_pool_seconds`` - calls handed to worker threads (the
+  consumers' database lookups and bot decisions), waiting included
+
+A histogram is a fixed list of bucket counts, so recording a value is a
+bisect and three additions; counts are totals, and ``rate()`` over them
+gives throughput. :func:`snapshot` is the in-process API and
+:func:`render_prometheus` the text served at ``/api/metrics/``. Both cover
+this process only. ``GAME_METRICS_ENABLED = False`` turns recording off.
+"""
+
+import bisect
+import functools
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+
+# Upper bounds in seconds, from 50 microseconds to 10 seconds
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+QUANTILES = (0.5, 0.95, 0.99)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# The action the current task or thread is working for, so that work it
+# hands on (a flush, the frames it sends) is labelled with it
+current_action: ContextVar[str] = ContextVar("current_action", default="other")
+
+
+def enabled() -> bool:
+    return getattr(settings, "GAME_METRICS_ENABLED", True)
+
+
+class Histogram:
+    """Counts of observed values per bucket, plus their sum."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # the last bucket is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate, interpolating within the bucket as Prometheus does."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                if index == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[index - 1] if index else 0.0
+                return lower + (self.bounds[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.bounds[-1]
+
+
+class Metric:
+    """A histogram family: one :class:`Histogram` per label value."""
+
+    def __init__(self, name: str, help_text: str, label: str, bounds: Sequence[float]):
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self.bounds = bounds
+        self.series: Dict[str, Histogram] = {}
+        # Flushes are recorded on the persistence thread
+        self._lock = threading.Lock()
+
+    def observe(self, label_value: str, value: float) -> None:
+        if not enabled():
+            return
+        with self._lock:
+            histogram = self.series.get(label_value)
+            if histogram is None:
+                histogram = self.series[label_value] = Histogram(self.bounds)
+            histogram.observe(value)
+
+    def since(self, label_value: str, started: float) -> None:
+        """Record the seconds since ``started`` (a ``time.perf_counter()``)."""
+        self.observe(label_value, time.perf_counter() - started)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.series = {}
+
+
+METRICS: Dict[str, Metric] = {}
+
+
+def register(name: str, help_text: str, label: str = "action", bounds=LATENCY_BUCKETS) -> Metric:
+    metric = METRICS[name] = Metric(name, help_text, label, bounds)
+    return metric
+
+
+def timed(metric: Metric, label_value: str):
+    """Decorator recording each call's duration in ``metric``."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                metric.since(label_value, started)
+
+        return wrapper
+
+    return decorator
+
+
+ACTION_QUEUE_WAIT = register(
+    "game_action_queue_wait_seconds", "Seconds a command waited in its game actor's queue."
+)
+ACTION_EXECUTION = register(
+    "game_action_execution_seconds", "Seconds a game actor spent applying a command."
+)
+ACTION_QUERIES = register(
+    "game_action_db_queries",
+    "Database queries run on the event loop while a game actor applied a command.",
+    bounds=QUERY_BUCKETS,
+)
+STATE_SERIALIZATION = register(
+    "game_state_serialization_seconds",
+    "Seconds spent serializing game state for clients.",
+    label="method",
+)
+FANOUT = register(
+    "game_fanout_seconds",
+    "Seconds spent handing the frames that follow an action to the channel layer.",
+)
+PERSISTENCE_QUEUE_WAIT = register(
+    "game_persistence_queue_wait_seconds",
+    "Seconds a database write waited for the persistence thread.",
+)
+PERSISTENCE_QUERIES = register(
+    "game_persistence_db_queries",
+    "Database queries per write handed to the persistence thread, by the action that queued it.",
+    bounds=QUERY_BUCKETS,
+)
+THREAD_POOL = register(
+    "game_thread_pool_seconds",
+    "Seconds from handing a call to a worker thread to getting its result.",
+    label="call",
+)
+
+
+def snapshot() -> Dict[str, Dict[str, Dict]]:
+    """
+    ``{metric name: {label value: {"count", "sum", "p50", "p95", "p99"}}}``;
+    quantiles are estimated from the buckets.
+    """
+    result = {}
+    for name, metric in METRICS.items():
+        with metric._lock:
+            series = list(metric.series.items())
+        result[name] = {
+            value: {
+                "count": histogram.count,
+                "sum": histogram.sum,
+                **{f"p{round(q * 100)}": histogram.quantile(q) for q in QUANTILES},
+            }
+            for value, histogram in series
+        }
+    return result
+
+
+def render_prometheus() -> str:
+    """Every metric in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for name, metric in METRICS.items():
+        lines.append(f"# HELP {name} {metric.help}")
+        lines.append(f"# TYPE {name} histogram")
+        with metric._lock:
+            series: List[Tuple[str, List[int], float, int]] = [
+                (value, list(h.counts), h.sum, h.count) for value, h in metric.series.items()
+            ]
+        for value, counts, total, count in sorted(series):
+            label = f'{metric.label}="{_escape(value)}"'
+            cumulative = 0
+            for bound, bucket in zip((*metric.bounds, "+Inf"), counts):
+                cumulative += bucket
+                lines.append(f'{name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{label}}} {total!r}")
+            lines.append(f"{name}_count{{{label}}} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def reset() -> None:
+    """Forget every observation (for tests and benchmarks)."""
+    for metric in METRICS.values():
+        metric.reset()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -1,20 +1,96 @@
 # game/game_engine/notifier.py
+import threading
+from contextlib import contextmanager
+from typing import Dict, List
+
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 
+from game.game_engine.frames import frame_event
+
+_local = threading.local()
+
+
+def room_group(room: str) -> str:
+    """Channel group of the game sockets for a GameManager room name."""
+    return f"game_{room.replace('lobby_', '')}"
+
+
+def batch_payload(messages: List[Dict]) -> Dict:
+    """One frame carrying several messages; a single message is sent as is."""
+    if len(messages) == 1:
+        return messages[0]
+    return {"type": "batch", "messages": messages}
+
+
+class Outbox:
+    """Messages broadcast during one action, held until the caller flushes them."""
+
+    def __init__(self):
+        # group name -> messages, in broadcast order
+        self.messages: Dict[str, List[Dict]] = {}
+
+    def add(self, group: str, payload: Dict) -> None:
+        self.messages.setdefault(group, []).append(payload)
+
+    def drain(self) -> Dict[str, List[Dict]]:
+        messages, self.messages = self.messages, {}
+        return messages
+
+    def flush(self) -> None:
+        """Send what was collected, one batched frame per group (sync callers)."""
+        try:
+            layer = get_channel_layer()
+            for group, messages in self.drain().items():
+                if layer is not None:
+                    async_to_sync(layer.group_send)(group, frame_event(batch_payload(messages)))
+        except Exception as exc:
+            print(f"[Broadcast error] {exc}")
+
+
+@contextmanager
+def collect_messages():
+    """
+    Collect ``Notifier.broadcast`` calls made on this thread into an Outbox
+    instead of sending each one through the channel layer.
+    """
+    previous = getattr(_local, "outbox", None)
+    outbox = _local.outbox = Outbox()
+    try:
+        yield outbox
+    finally:
+        _local.outbox = previous
+
+
+@contextmanager
+def suppress_messages():
+    """Drop ``Notifier.broadcast`` calls made on this thread (e.g. during replays)."""
+    previous = getattr(_local, "muted", False)
+    _local.muted = True
+    try:
+        yield
+    finally:
+        _local.muted = previous
+
+
 class Notifier:
     """Handles broadcasting messages to console and WebSocket clients."""
 
     @staticmethod
     def broadcast(message, room="default"):
+        if getattr(_local, "muted", False):
+            return
         print(f"[Broadcast] {message}")
 
+        payload = {"type": "game_message", "message": message}
+        outbox = getattr(_local, "outbox", None)
+        if outbox is not None:
+            outbox.add(room_group(room), payload)
+            return
+
         try:
             layer = get_channel_layer()
             if layer is not None:
-                async_to_sync(layer.group_send)(
-                    f"game_{room.replace('lobby_', '')}",
-                    {"type": "game_message", "message": message},
-                )
+                async_to_sync(layer.group_send)(room_group(room), frame_event(payload))
         except Exception as exc:
             print(f"[Broadcast error] {exc}")
@@ -0,0 +1,36 @@
+"""Per-game hallway occupancy."""
+
+from typing import Callable, Optional
+
+from game.game_engine.board_graph import BOARD_GRAPH
+
+
+class HallwayOccupancy:
+    """
+    Hallway occupancy for a single game, held as a bit mask with one bit per
+    hallway (bit ``i`` is ``BOARD_GRAPH.hallway_index(node)``).
+
+    ``on_change`` is called with the new mask whenever it changes, so the owner
+    can persist it keyed by its own game.
+    """
+
+    __slots__ = ("mask", "on_change")
+
+    def __init__(self, mask: int = 0, on_change: Optional[Callable[[int], None]] = None):
+        self.mask = mask
+        self.on_change = on_change
+
+    def is_occupied(self, node: int) -> bool:
+        return bool(self.mask >> BOARD_GRAPH.hallway_index(node) & 1)
+
+    def set(self, node: int, occupied: bool) -> None:
+        bit = 1 << BOARD_GRAPH.hallway_index(node)
+        mask = self.mask | bit if occupied else self.mask & ~bit
+        if mask == self.mask:
+            return
+        self.mask = mask
+        if self.on_change is not None:
+            self.on_change(mask)
+
+    def release(self, node: int) -> None:
+        self.set(node, False)
@@ -0,0 +1,260 @@
+"""Write-behind persistence for GameManager state changes.
+
+Game actions mark the model fields they change on a per-game
+:class:`WriteBehindBuffer`. Depending on the durability level the buffer
+writes them straight away, once per action in a single transaction, or on a
+fixed interval. A buffer given an executor (games run by a
+:class:`~game.game_engine.actor.GameActor`) hands those writes to it instead
+of blocking the caller: ``PERSISTENCE_EXECUTOR``, the process's single
+database writer (see ``writer``). ``on_write`` is called once written changes commit.
+"""
+
+import atexit
+import threading
+import time
+import weakref
+from concurrent.futures import Executor
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from game.game_engine.metrics import PERSISTENCE_QUERIES, PERSISTENCE_QUEUE_WAIT, current_action
+from game.game_engine.query_audit import QueryAudit, record
+from game.game_engine.writer import WRITER
+
+DURABILITY_IMMEDIATE = "immediate"
+DURABILITY_PER_ACTION = "per_action"
+DURABILITY_PERIODIC = "periodic"
+DURABILITY_LEVELS = (DURABILITY_IMMEDIATE, DURABILITY_PER_ACTION, DURABILITY_PERIODIC)
+
+
+class WriteBehindBuffer:
+    """Dirty model fields for one game, flushed with bulk updates."""
+
+    def __init__(
+        self,
+        durability: Optional[str] = None,
+        interval: Optional[float] = None,
+        on_write: Optional[Callable[[], None]] = None,
+    ):
+        self.durability = durability or getattr(
+            settings, "GAME_PERSISTENCE_DURABILITY", DURABILITY_PER_ACTION
+        )
+        if self.durability not in DURABILITY_LEVELS:
+            raise ValueError(
+                f"Unknown durability level {self.durability!r}; "
+                f"expected one of {', '.join(DURABILITY_LEVELS)}."
+            )
+        self.interval = (
+            interval
+            if interval is not None
+            else getattr(settings, "GAME_PERSISTENCE_FLUSH_INTERVAL", 1.0)
+        )
+        self._lock = threading.RLock()
+        # (model class, pk) -> (instance, dirty field names)
+        self._dirty: Dict[Tuple[type, int], Tuple[object, Set[str]]] = {}
+        self._depth = 0
+        self._last_flush = time.monotonic()
+        # Where blocking writes run; None writes on the calling thread
+        self.executor: Optional[Executor] = None
+        self.on_write = on_write
+        if self.durability == DURABILITY_PERIODIC:
+            _flusher.register(self)
+
+    # ------------------------------------------------------------------
+    # Recording changes
+    # ------------------------------------------------------------------
+    def mark(self, instance, **fields) -> None:
+        """Set ``fields`` on ``instance`` and schedule them to be written."""
+        for name, value in fields.items():
+            setattr(instance, name, value)
+
+        if self.durability == DURABILITY_IMMEDIATE:
+            self._write(self._update, type(instance), instance.pk, fields)
+            return
+
+        with self._lock:
+            key = (type(instance), instance.pk)
+            entry = self._dirty.get(key)
+            if entry is None:
+                self._dirty[key] = (instance, set(fields))
+            else:
+                entry[1].update(fields)
+
+    @property
+    def pending(self) -> int:
+        """Number of model instances with unwritten changes."""
+        return len(self._dirty)
+
+    # ------------------------------------------------------------------
+    # Action boundaries
+    # ------------------------------------------------------------------
+    def begin_action(self) -> None:
+        with self._lock:
+            self._depth += 1
+
+    def end_action(self) -> None:
+        with self._lock:
+            self._depth -= 1
+            if self._depth:
+                return
+        if self.flush_due():
+            self._write(self.flush)
+
+    def flush_soon(self) -> None:
+        """Flush pending changes on the executor if there is one, else now."""
+        if self._dirty:
+            self._write(self.flush)
+
+    def flush_due(self) -> bool:
+        if not self._dirty:
+            return False
+        if self.durability == DURABILITY_PERIODIC:
+            return time.monotonic() - self._last_flush >= self.interval
+        return True
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+    def _write(self, func, *args, **kwargs) -> None:
+        if self.executor is None:
+            func(*args, **kwargs)
+        else:
+            self.executor.submit(
+                _logged_write, current_action.get(), time.perf_counter(), func, *args, **kwargs
+            )
+
+    def _update(self, model, pk, fields: Dict) -> None:
+        model.objects.filter(pk=pk).update(**fields)
+        self._written()
+
+    def _written(self) -> None:
+        if self.on_write is not None:
+            transaction.on_commit(self.on_write)
+
+    def flush(self) -> int:
+        """Write every dirty field in one transaction; returns the row count."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+            self._last_flush = time.monotonic()
+        if not dirty:
+            return 0
+
+        # Instances sharing a model and field set go out in one bulk_update
+        batches: Dict[Tuple[type, Tuple[str, ...]], list] = {}
+        for (model, _), (instance, fields) in dirty.items():
+            batches.setdefault((model, tuple(sorted(fields))), []).append(instance)
+
+        try:
+            with transaction.atomic():
+                for (model, fields), instances in batches.items():
+                    model.objects.bulk_update(instances, fields)
+        except Exception:
+            # Put the changes back so the next flush retries them
+            with self._lock:
+                for key, (instance, fields) in dirty.items():
+                    entry = self._dirty.get(key)
+                    if entry is None:
+                        self._dirty[key] = (instance, fields)
+                    else:
+                        entry[1].update(fields)
+            raise
+        self._written()
+        return len(dirty)
+
+
+class NullPersistence:
+    """Buffer stand-in that applies changes in memory only, for game replays."""
+
+    executor = None
+    pending = 0
+
+    def mark(self, instance, **fields) -> None:
+        for name, value in fields.items():
+            setattr(instance, name, value)
+
+    def begin_action(self) -> None:
+        pass
+
+    def end_action(self) -> None:
+        pass
+
+    def flush_soon(self) -> None:
+        pass
+
+    def flush(self) -> int:
+        return 0
+
+
+def _logged_write(action, queued, func, *args, **kwargs):
+    PERSISTENCE_QUEUE_WAIT.since(action, queued)
+    audit = QueryAudit(action)
+    try:
+        with audit:
+            func(*args, **kwargs)
+    except Exception as exc:
+        print(f"[Persistence error] {exc}")
+    record(PERSISTENCE_QUERIES, audit)
+
+
+# One writer thread keeps each game's writes in the order they were made
+PERSISTENCE_EXECUTOR = WRITER
+
+
+class _PeriodicFlusher:
+    """Background thread that flushes periodic buffers once their interval elapses."""
+
+    def __init__(self):
+        self._buffers: "weakref.WeakSet[WriteBehindBuffer]" = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, buffer: WriteBehindBuffer) -> None:
+        with self._lock:
+            self._buffers.add(buffer)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="game-write-behind", daemon=True
+                )
+                self._thread.start()
+
+    def flush_all(self) -> None:
+        with self._lock:
+            buffers = list(self._buffers)
+        for buffer in buffers:
+            try:
+                buffer.flush()
+            except Exception as exc:
+                print(f"[Persistence error] {exc}")
+
+    def flush_due(self) -> None:
+        """
+        Write every buffer whose interval has elapsed, on the database writer:
+        queued on the buffer's executor, or through ``WRITER.call``.
+        """
+        with self._lock:
+            buffers = list(self._buffers)
+        for buffer in buffers:
+            try:
+                if not buffer.flush_due():
+                    continue
+                if buffer.executor is not None:
+                    buffer.flush_soon()
+                else:
+                    WRITER.call(buffer.flush)
+            except Exception as exc:
+                print(f"[Persistence error] {exc}")
+
+    def _run(self):
+        while True:
+            with self._lock:
+                interval = min((buffer.interval for buffer in self._buffers), default=1.0)
+            time.sleep(max(interval, 0.05))
+            self.flush_due()
+            close_old_connections()
+
+
+_flusher = _PeriodicFlusher()
+flush_all = _flusher.flush_all
+atexit.register(flush_all)
@@ -0,0 +1,27 @@
+"""Signed tokens that tie a browser to the lobby player it created.
+
+The server hands one out with every new lobby player id. A game socket
+shows it again when it identifies, so it can only subscribe to the
+private state of the game player that lobby player is seated as.
+"""
+
+from typing import Optional
+
+from django.core import signing
+
+_SALT = "game.lobby_player"
+
+
+def issue_player_token(lobby_player_id: int) -> str:
+    """Token proving the holder created lobby player ``lobby_player_id``."""
+    return signing.dumps(lobby_player_id, salt=_SALT)
+
+
+def read_player_token(token) -> Optional[int]:
+    """Lobby player id a token was issued for, or None if it is not genuine."""
+    if not token:
+        return None
+    try:
+        return int(signing.loads(str(token), salt=_SALT))
+    except (signing.BadSignature, TypeError, ValueError):
+        return None
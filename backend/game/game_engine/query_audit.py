@@ -0,0 +1,155 @@
+"""Query counts and N+1 detection for views, websocket actions and GameManager methods.
+
+A :class:`QueryAudit` records the SQL of every query run on the current
+thread's connection while it is active. Each statement is reduced to a shape,
+with literals and ``IN`` lists stripped, so the same query run for every row
+of a list (an N+1) shows up as one shape repeated many times.
+
+Audits run around:
+
+* every HTTP request (``game.middleware.QueryAuditMiddleware``), recorded in
+  ``game_view_db_queries`` by URL name
+* every command on a game actor, in ``game_action_db_queries``
+* every ``GameManager`` action, and building or restoring a manager, in
+  ``game_manager_db_queries``
+
+A shape seen ``GAME_QUERY_REPEAT_THRESHOLD`` times in one audit is logged
+as a warning on the ``game.query_audit`` logger. Tests hold code to a budget with
+:func:`query_budget`.
+"""
+
+import functools
+import logging
+import re
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import connection
+
+from game.game_engine.metrics import QUERY_BUCKETS, Metric, register
+
+VIEW_QUERIES = register(
+    "game_view_db_queries",
+    "Database queries per HTTP request, by URL name.",
+    label="view",
+    bounds=QUERY_BUCKETS,
+)
+MANAGER_QUERIES = register(
+    "game_manager_db_queries",
+    "Database queries per GameManager method call.",
+    label="method",
+    bounds=QUERY_BUCKETS,
+)
+
+logger = logging.getLogger("game.query_audit")
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LIST = re.compile(r"\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))*\s*\)")
+# Transaction control is not counted: nested atomic blocks (as in tests) would
+# otherwise add queries that the same code does not run in autocommit
+_SAVEPOINT = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+@functools.lru_cache(maxsize=1024)
+def query_shape(sql: str) -> str:
+    """``sql`` with its literals and ``IN`` lists replaced by placeholders."""
+    shape = _WHITESPACE.sub(" ", sql.strip())
+    shape = _STRING.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    return _LIST.sub("(...)", shape)
+
+
+def repeat_threshold() -> Optional[int]:
+    return getattr(settings, "GAME_QUERY_REPEAT_THRESHOLD", 3)
+
+
+class QueryAudit:
+    """The queries run on this thread's connection inside ``with QueryAudit(label):``."""
+
+    __slots__ = ("label", "statements", "_wrapper")
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.statements: List[str] = []
+        self._wrapper = None
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.startswith(_SAVEPOINT):
+            self.statements.append(sql)
+        return execute(sql, params, many, context)
+
+    def __enter__(self) -> "QueryAudit":
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
+        self._wrapper = None
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def repeated(self, threshold: Optional[int] = None) -> Dict[str, int]:
+        """Shapes run at least ``threshold`` times (default: the setting)."""
+        threshold = threshold or repeat_threshold()
+        if not threshold or len(self.statements) < threshold:
+            return {}
+        shapes = Counter(query_shape(sql) for sql in self.statements)
+        return {shape: count for shape, count in shapes.most_common() if count >= threshold}
+
+    def report(self, threshold: Optional[int] = None) -> str:
+        lines = [f"{self.label or 'queries'}: {self.count} queries"]
+        for shape, count in self.repeated(threshold).items():
+            lines.append(f"  {count} x {shape}")
+        return "\n".join(lines)
+
+
+def record(metric: Metric, audit: QueryAudit) -> None:
+    """Add ``audit``'s count to ``metric`` and warn about repeated shapes."""
+    metric.observe(audit.label, audit.count)
+    if audit.statements and repeat_threshold():
+        for shape, count in audit.repeated().items():
+            logger.warning("%s: %d x %s", audit.label, count, shape)
+
+
+def audited(metric: Metric, label: str):
+    """Decorator running each call in a :class:`QueryAudit` recorded in ``metric``."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with QueryAudit(label) as audit:
+                result = func(*args, **kwargs)
+            record(metric, audit)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised by :func:`query_budget`; the message lists the count and repeated shapes."""
+
+
+@contextmanager
+def query_budget(limit: int, label: str = "", allow_repeats: bool = False, threshold: int = 2):
+    """
+    Fail if the block runs more than ``limit`` queries or, unless
+    ``allow_repeats``, any query shape ``threshold`` times or more.
+    """
+    with QueryAudit(label) as audit:
+        yield audit
+    problems = []
+    if audit.count > limit:
+        problems.append(f"{audit.count} queries is over the budget of {limit}")
+    if not allow_repeats and audit.repeated(threshold):
+        problems.append("the same query ran repeatedly (N+1)")
+    if problems:
+        raise QueryBudgetExceeded(f"{'; '.join(problems)}\n{audit.report(threshold)}")
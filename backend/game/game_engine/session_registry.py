@@ -1,33 +1,315 @@
-"""In-memory registry for active GameManager instances."""
+"""In-memory registry for active GameManager instances.
+
+Sessions idle for longer than ``GAME_SESSION_IDLE_TTL`` seconds are evicted,
+and when ``GAME_SESSION_MAX_SESSIONS`` or ``GAME_SESSION_MAX_BYTES`` is set
+the least recently used sessions are evicted to stay within it. Evicted
+games are checkpointed and rehydrated by the next ``get_session``; a game
+run by a ``GameActor`` is evicted by its actor, once the commands already
+queued on it are applied (``actor.retire_actor``). The
+registry lock is never held for disk access: checkpoint files are written
+and deleted on ``FILE_EXECUTOR``, and rehydration reads outside the
+lock (on a worker thread for async callers, see ``aget_session``). Every
+live game is also checkpointed at shutdown, and ``restore_all`` loads all
+checkpoints back after a restart.
+"""
 
 from __future__ import annotations
 
+import asyncio
+import atexit
+import gc
 import threading
-from typing import Dict, Optional
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+
+from django.conf import settings
+
+from game.game_engine.checkpoints import (
+    FILE_EXECUTOR,
+    delete_checkpoint,
+    dump_manager,
+    iter_checkpoints,
+    load_checkpoint,
+    load_manager,
+    restore_manager,
+    save_checkpoint,
+)
+from game.game_engine.event_log import delete_log
 
 if False:  # pragma: nocover
     from .game_manager import GameManager
 
 _lock = threading.RLock()
-_sessions: Dict[str, "GameManager"] = {}
+# game name -> [manager, last used (monotonic), checkpoint size in bytes], oldest first
+_sessions: "OrderedDict[str, list]" = OrderedDict()
+_stats = {"hits": 0, "misses": 0, "evictions": 0, "rehydrations": 0}
+_last_sweep = time.monotonic()
+# Checkpoints of evicted games queued on FILE_EXECUTOR but not yet on
+# disk; None while a removed game's checkpoint is waiting to be deleted
+_unwritten: Dict[str, Optional[bytes]] = {}
+# Bumped by every remove_session, so a rehydration it overlapped is dropped
+_removals = 0
+_ON_DISK = object()
+# Games whose actor will evict them once its queued commands are applied
+_retiring: Set[str] = set()
 
 
 def register_session(game_name: str, manager: "GameManager") -> None:
+    size = len(dump_manager(manager)) if _max_bytes() else 0
     with _lock:
-        _sessions[game_name] = manager
+        _sessions[game_name] = [manager, time.monotonic(), size]
+        _sessions.move_to_end(game_name)
+        _retiring.discard(game_name)
+        _enforce_budget()
 
 
-def get_session(game_name: str) -> Optional["GameManager"]:
+def get_live_session(game_name: str) -> Optional["GameManager"]:
+    """The game if it is in memory; never touches the disk."""
     with _lock:
-        return _sessions.get(game_name)
+        _sweep_if_due()
+        entry = _sessions.get(game_name)
+        if entry is None:
+            return None
+        _stats["hits"] += 1
+        entry[1] = time.monotonic()
+        _sessions.move_to_end(game_name)
+        return entry[0]
+
+
+def get_session(game_name: str) -> Optional["GameManager"]:
+    """
+    The game, rehydrated from its checkpoint if it was evicted. The
+    checkpoint is read and replayed outside the registry lock; async callers
+    use :func:`aget_session` to keep it off the event loop too.
+    """
+    while True:
+        manager = get_live_session(game_name)
+        if manager is not None:
+            return manager
+        with _lock:
+            removals = _removals
+            data = _unwritten.get(game_name, _ON_DISK)
+        if data is _ON_DISK:
+            data = load_checkpoint(game_name)
+        manager = load_manager(data) if data is not None else None
+
+        with _lock:
+            if _removals != removals:
+                continue  # A game was removed meanwhile; look again
+            entry = _sessions.get(game_name)
+            if entry is not None:
+                # Another caller rehydrated it first
+                _stats["hits"] += 1
+                return entry[0]
+            if manager is None:
+                _stats["misses"] += 1
+                return None
+            _stats["rehydrations"] += 1
+            _sessions[game_name] = [manager, time.monotonic(), len(data)]
+            _enforce_budget(keep=game_name)
+            return manager
+
+
+async def aget_session(game_name: str) -> Optional["GameManager"]:
+    """:func:`get_session` for the event loop: a rehydration runs on a worker thread."""
+    manager = get_live_session(game_name)
+    if manager is not None:
+        return manager
+    return await asyncio.get_running_loop().run_in_executor(None, get_session, game_name)
 
 
 def remove_session(game_name: str) -> None:
+    """Drop a finished or deleted game with its checkpoint and event log."""
+    global _removals
+    with _lock:
+        entry = _sessions.pop(game_name, None)
+        _retiring.discard(game_name)
+        _removals += 1
+        _unwritten[game_name] = None
+    # Behind any checkpoint write still queued for the game
+    FILE_EXECUTOR.submit(_delete_checkpoint, game_name)
+    events = None
+    if entry is not None:
+        # Write out anything the write-behind buffer is still holding
+        entry[0].persistence.flush()
+        events = entry[0].events
+    if events is not None and events.executor is not None:
+        # Behind the appends still queued, which would recreate the file
+        events.executor.submit(delete_log, game_name)
+    else:
+        delete_log(game_name)
+
+
+def is_live(game_name: str, manager: "GameManager") -> bool:
+    """Whether ``manager`` is still the registered session for ``game_name``."""
     with _lock:
-        _sessions.pop(game_name, None)
+        entry = _sessions.get(game_name)
+        return entry is not None and entry[0] is manager
 
 
 def list_sessions() -> Dict[str, "GameManager"]:
     with _lock:
-        return dict(_sessions)
+        return {name: entry[0] for name, entry in _sessions.items()}
+
+
+def session_stats() -> Dict[str, int]:
+    """Registry counters: hits, misses, evictions, rehydrations and live sessions."""
+    with _lock:
+        return {
+            **_stats,
+            "sessions": len(_sessions),
+            "bytes": sum(entry[2] for entry in _sessions.values()),
+        }
+
+
+def evict_idle(now: Optional[float] = None) -> int:
+    """Checkpoint and drop sessions idle for longer than the TTL; returns how many."""
+    ttl = getattr(settings, "GAME_SESSION_IDLE_TTL", None)
+    if not ttl:
+        return 0
+    now = time.monotonic() if now is None else now
+    with _lock:
+        idle = [
+            name
+            for name, entry in _sessions.items()
+            if now - entry[1] > ttl and name not in _retiring
+        ]
+        for name in idle:
+            _evict(name)
+    return len(idle)
+
+
+def checkpoint_all() -> int:
+    """Checkpoint every live session (run at shutdown); returns how many."""
+    with _lock:
+        sessions = {name: entry[0] for name, entry in _sessions.items()}
+        # Evicted games whose checkpoint the executor may not get to
+        unwritten = {name: data for name, data in _unwritten.items() if data is not None}
+    for name, data in unwritten.items():
+        try:
+            save_checkpoint(name, data)
+        except Exception as exc:
+            print(f"[Checkpoint error] {name}: {exc}")
+    for name, manager in sessions.items():
+        try:
+            manager.persistence.flush()
+            save_checkpoint(name, dump_manager(manager))
+        except Exception as exc:
+            print(f"[Checkpoint error] {name}: {exc}")
+    return len(sessions)
+
+
+def restore_all() -> int:
+    """Load every checkpointed game that is not already live; returns how many."""
+    restored = 0
+    # Restoring allocates many long-lived objects; cyclic GC passes over the
+    # growing heap would otherwise dominate the restore time
+    gc.disable()
+    try:
+        for snapshot, size in iter_checkpoints():
+            name = snapshot["name"]
+            with _lock:
+                if name in _sessions:
+                    continue
+                _sessions[name] = [restore_manager(snapshot), time.monotonic(), size]
+                _stats["rehydrations"] += 1
+            restored += 1
+    finally:
+        gc.enable()
+    with _lock:
+        _enforce_budget()
+    return restored
+
+
+def evict_session(game_name: str, manager: "GameManager") -> bool:
+    """Checkpoint and drop ``manager``'s session; its actor calls this once retired."""
+    with _lock:
+        _retiring.discard(game_name)
+        entry = _sessions.get(game_name)
+        if entry is None or entry[0] is not manager:
+            return False  # Removed or replaced meanwhile
+        _evict_now(game_name)
+        return True
+
+
+def _evict(game_name: str) -> None:
+    """
+    Evict a game. A game run by an actor is evicted by the actor itself,
+    between commands and after those already queued, so none of them is
+    applied to a manager the registry no longer holds.
+    """
+    from game.game_engine.actor import retire_actor
+
+    if retire_actor(game_name, _sessions[game_name][0]):
+        _retiring.add(game_name)
+    else:
+        _evict_now(game_name)
+
+
+def _evict_now(game_name: str) -> None:
+    manager = _sessions.pop(game_name)[0]
+    # Games run by an actor may be evicted from the event loop; don't block it
+    manager.persistence.flush_soon()
+    # Only the snapshot is taken under the lock; the file is written later
+    data = _unwritten[game_name] = dump_manager(manager)
+    FILE_EXECUTOR.submit(_write_checkpoint, game_name, data)
+    _stats["evictions"] += 1
+
+
+def _write_checkpoint(game_name: str, data: bytes) -> None:
+    with _lock:
+        if _unwritten.get(game_name) is not data:
+            return  # Removed, or evicted again with a newer checkpoint
+    try:
+        save_checkpoint(game_name, data)
+    except OSError as exc:
+        print(f"[Checkpoint error] {game_name}: {exc}")
+        return
+    with _lock:
+        if _unwritten.get(game_name) is data:
+            del _unwritten[game_name]
+
+
+def _delete_checkpoint(game_name: str) -> None:
+    delete_checkpoint(game_name)
+    with _lock:
+        if game_name in _unwritten and _unwritten[game_name] is None:
+            del _unwritten[game_name]
+
+
+def _max_bytes() -> Optional[int]:
+    return getattr(settings, "GAME_SESSION_MAX_BYTES", None)
+
+
+def _enforce_budget(keep: Optional[str] = None) -> None:
+    """Evict least recently used sessions until the budget holds."""
+    max_sessions = getattr(settings, "GAME_SESSION_MAX_SESSIONS", None)
+    max_bytes = _max_bytes()
+    # Sessions their actors are evicting already no longer count
+    staying = [name for name in _sessions if name not in _retiring]
+    count = len(staying)
+    total = sum(_sessions[name][2] for name in staying) if max_bytes else 0
+    for name in staying:
+        over_count = max_sessions and count > max_sessions
+        over_bytes = max_bytes and total > max_bytes
+        if not (over_count or over_bytes):
+            return
+        if name == keep:
+            continue
+        total -= _sessions[name][2]
+        count -= 1
+        _evict(name)
+
+
+def _sweep_if_due() -> None:
+    # Idle sessions are swept on access, at most once per minute or TTL
+    global _last_sweep
+    ttl = getattr(settings, "GAME_SESSION_IDLE_TTL", None)
+    now = time.monotonic()
+    if ttl and now - _last_sweep >= min(ttl, 60):
+        _last_sweep = now
+        evict_idle(now)
+
 
+atexit.register(checkpoint_all)
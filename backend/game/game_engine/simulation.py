@@ -0,0 +1,438 @@
+"""Headless, database-free Clue-Less simulation.
+
+:class:`SimulatedGame` plays whole games between bots with the same rules as
+``GameManager``, ``SuggestionEngine`` and ``AccusationEngine``. It calls the
+same rule helpers for movement, turn order and the first player, and uses
+the same round-robin deal and clockwise disprover search on ``CARD_CATALOG``
+masks. Everything is a plain int, and there are no models, broadcasts or
+persistence, so a game takes well under a millisecond.
+This is meant for balance testing and regression checks.
+
+Bots only see what their player would: their hand, the cards shown to them,
+the public outcome of every suggestion, and the moves on offer.
+"""
+
+import random
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from game.game_engine.board_graph import BOARD_GRAPH
+from game.game_engine.constants import ROOMS, STARTING_POSITIONS, SUSPECTS, WEAPONS
+from game.game_engine.deck import CARD_CATALOG, deal_hands
+from game.game_engine.deduction import Deduction, _bits
+from game.game_engine.estimator import estimate_envelope
+from game.game_engine.game_manager import first_seat, movement_options, next_seat
+from game.game_engine.suggestion import NO_HOLDER, build_holder_index, find_first_disprover
+
+MIN_PLAYERS = 2  # as start_game
+MAX_PLAYERS = len(SUSPECTS)
+
+SUSPECT_CARDS = tuple(CARD_CATALOG.index[name] for name in SUSPECTS)
+WEAPON_CARDS = tuple(CARD_CATALOG.index[name] for name in WEAPONS)
+ROOM_CARDS = tuple(CARD_CATALOG.index[name] for name in ROOMS)
+# BOARD_GRAPH room node -> its card index
+ROOM_CARD_OF_NODE = tuple(
+    CARD_CATALOG.index[BOARD_GRAPH.names[node]] for node in range(BOARD_GRAPH.room_count)
+)
+CATEGORY_MASKS = (CARD_CATALOG.suspects_mask, CARD_CATALOG.weapons_mask, CARD_CATALOG.rooms_mask)
+
+
+class Bot:
+    """
+    Plays at random but never accuses wrongly: it accuses once its hand and
+    the cards it has been shown leave a single candidate in each category.
+    """
+
+    name = "random"
+
+    def __init__(self, seat: int, hand: int, rng: random.Random, sizes: Sequence[int]):
+        self.seat = seat
+        self.hand = hand
+        self.rng = rng
+        self.known = hand  # cards known not to be in the envelope
+        self.solved = 0  # cards known to be in the envelope
+
+    # Decisions ---------------------------------------------------------
+    def choose_move(self, options: Sequence[int]) -> int:
+        """Pick a destination node from ``options``."""
+        return self.rng.choice(options)
+
+    def choose_suggestion(self, room_card: int) -> Tuple[int, int]:
+        """Pick the suspect and weapon card to suggest with ``room_card``."""
+        return self.rng.choice(SUSPECT_CARDS), self.rng.choice(WEAPON_CARDS)
+
+    def choose_card(self, matching: int, suggester: int) -> int:
+        """Pick which of the ``matching`` cards in hand to show ``suggester``."""
+        return self.rng.choice(_bits(matching))
+
+    def accusation(self) -> Optional[Tuple[int, int, int]]:
+        """The cards to accuse with, or None to keep playing."""
+        picks = []
+        for category in CATEGORY_MASKS:
+            solved = self.solved & category
+            candidates = solved or ~self.known & category
+            if candidates & (candidates - 1):
+                return None
+            picks.append(candidates.bit_length() - 1)
+        return tuple(picks)
+
+    # Observations ------------------------------------------------------
+    def observe_suggestion(self, suggester: int, cards: int, disprover: Optional[int]) -> None:
+        """Public outcome of any suggestion, this bot's included."""
+
+    def observe_card(self, card: int, disprover: int) -> None:
+        """``disprover`` showed this bot ``card``."""
+        self.known |= 1 << card
+
+    def observe_no_disproof(self, cards: int) -> None:
+        """Nobody could disprove this bot's suggestion of ``cards``."""
+        self.solved |= cards & ~self.hand
+
+
+class DeducingBot(Bot):
+    """Heads for rooms it has not ruled out and only suggests unknown cards."""
+
+    name = "deducer"
+
+    def choose_move(self, options: Sequence[int]) -> int:
+        unknown_rooms = [
+            node
+            for node in options
+            if BOARD_GRAPH.is_room[node] and not self.known >> ROOM_CARD_OF_NODE[node] & 1
+        ]
+        return self.rng.choice(unknown_rooms or options)
+
+    def choose_suggestion(self, room_card: int) -> Tuple[int, int]:
+        return self._candidate(SUSPECT_CARDS), self._candidate(WEAPON_CARDS)
+
+    def _candidate(self, cards: Sequence[int]) -> int:
+        for card in cards:
+            if self.solved >> card & 1:
+                return card
+        unknown = [card for card in cards if not self.known >> card & 1]
+        return self.rng.choice(unknown or cards)
+
+
+class EstimatorBot(DeducingBot):
+    """
+    Tracks every suggestion with a :class:`Deduction`, then plays the odds from
+    :func:`estimate_envelope`. It heads for the likeliest room and suggests the
+    likeliest suspect and weapon. It accuses once it is certain, or once the
+    likeliest three cards together clear ``ACCUSE_CONFIDENCE``.
+    """
+
+    name = "estimator"
+    SAMPLES = 300
+    ACCUSE_CONFIDENCE = 0.9
+
+    def __init__(self, seat: int, hand: int, rng: random.Random, sizes: Sequence[int]):
+        super().__init__(seat, hand, rng, sizes)
+        # Deduction only reads the other hands' sizes
+        hands = [hand if other == seat else (1 << size) - 1 for other, size in enumerate(sizes)]
+        self.deduction = Deduction(seat, hands)
+        self._odds: Optional[List[float]] = None
+
+    @property
+    def odds(self) -> List[float]:
+        """Envelope probability of each card, estimated again after new observations."""
+        if self._odds is None:
+            self._odds = estimate_envelope(
+                self.deduction, self.SAMPLES, seed=self.rng.getrandbits(32)
+            )
+        return self._odds
+
+    def choose_move(self, options: Sequence[int]) -> int:
+        odds = self.odds
+        rooms = [node for node in options if BOARD_GRAPH.is_room[node]]
+        best = max(rooms, key=lambda node: odds[ROOM_CARD_OF_NODE[node]], default=None)
+        if best is None or not odds[ROOM_CARD_OF_NODE[best]]:
+            return super().choose_move(options)
+        return best
+
+    def choose_suggestion(self, room_card: int) -> Tuple[int, int]:
+        odds = self.odds
+        return max(SUSPECT_CARDS, key=odds.__getitem__), max(WEAPON_CARDS, key=odds.__getitem__)
+
+    def accusation(self) -> Optional[Tuple[int, int, int]]:
+        odds = self.odds
+        picks = tuple(
+            max(cards, key=odds.__getitem__) for cards in (SUSPECT_CARDS, WEAPON_CARDS, ROOM_CARDS)
+        )
+        certain = all(
+            self.deduction.candidates & mask == 1 << card for mask, card in zip(CATEGORY_MASKS, picks)
+        )
+        if certain or odds[picks[0]] * odds[picks[1]] * odds[picks[2]] >= self.ACCUSE_CONFIDENCE:
+            return picks
+        return None
+
+    def observe_suggestion(self, suggester: int, cards: int, disprover: Optional[int]) -> None:
+        if self.deduction.observe_suggestion(suggester, cards, disprover) or disprover is not None:
+            self._odds = None
+
+    def observe_card(self, card: int, disprover: int) -> None:
+        super().observe_card(card, disprover)
+        self.deduction.observe_card(disprover, card)
+        self._odds = None
+
+
+BOTS: Dict[str, type] = {bot.name: bot for bot in (Bot, DeducingBot, EstimatorBot)}
+
+
+class SimulatedGame:
+    """One in-memory game between bots, indexed by seat."""
+
+    def __init__(
+        self,
+        player_count: int = MAX_PLAYERS,
+        bots: Union[str, Sequence[str]] = "deducer",
+        seed: Optional[int] = None,
+        characters: Optional[Sequence[str]] = None,
+    ):
+        if characters is None:
+            if not MIN_PLAYERS <= player_count <= MAX_PLAYERS:
+                raise ValueError(f"A game needs {MIN_PLAYERS} to {MAX_PLAYERS} players.")
+            characters = SUSPECTS[:player_count]
+        characters = list(characters)
+        if not MIN_PLAYERS <= len(characters) <= MAX_PLAYERS:
+            raise ValueError(f"A game needs {MIN_PLAYERS} to {MAX_PLAYERS} players.")
+        bot_names = [bots] * len(characters) if isinstance(bots, str) else list(bots)
+        unknown = [name for name in bot_names if name not in BOTS]
+        if unknown or len(bot_names) != len(characters):
+            raise ValueError(f"Bots must be {len(characters)} of: {', '.join(BOTS)}.")
+
+        rng = self.rng = random.Random(seed)
+        self.count = len(characters)
+        self.characters = characters
+        self.seat_of_card = {CARD_CATALOG.index[name]: seat for seat, name in enumerate(characters)}
+        self.solution = (
+            rng.choice(SUSPECT_CARDS),
+            rng.choice(WEAPON_CARDS),
+            rng.choice(ROOM_CARDS),
+        )
+        dealt = [card for card in range(len(CARD_CATALOG.names)) if card not in self.solution]
+        self.hands = deal_hands(dealt, self.count, rng)
+        self.holders = build_holder_index(self.hands)
+        sizes = [hand.bit_count() for hand in self.hands]
+        self.bots = [
+            BOTS[name](seat, hand, rng, sizes)
+            for seat, (name, hand) in enumerate(zip(bot_names, self.hands))
+        ]
+
+        self.nodes = [BOARD_GRAPH.node_for_code(STARTING_POSITIONS[name]) for name in characters]
+        self.occupied = 0  # hallway bit mask, as HallwayOccupancy
+        for node in self.nodes:
+            self.occupied |= 1 << BOARD_GRAPH.hallway_index(node)
+        self.eliminated = [False] * self.count
+        self.arrived_via_suggestion = [False] * self.count
+
+        self.current = first_seat(characters, rng)
+        self.turns = 0
+        self.suggestions = 0
+        self.wrong_accusations = 0
+        self.winner: Optional[int] = None
+        self.is_over = False
+
+    # ------------------------------------------------------------------
+    # Playing
+    # ------------------------------------------------------------------
+    def run(self, max_rounds: int = 100) -> Dict:
+        """Play until someone wins or ``max_rounds`` rounds have passed."""
+        max_turns = max_rounds * self.count
+        while not self.is_over and self.turns < max_turns:
+            self.play_turn()
+        return self.result()
+
+    def play_turn(self) -> None:
+        seat = self.current
+        bot = self.bots[seat]
+        self.turns += 1
+        if not self._try_accusation(seat):
+            options = self.available_moves(seat)
+            entered_room = False
+            if options:
+                destination = bot.choose_move(options)
+                self._move(seat, destination)
+                entered_room = BOARD_GRAPH.is_room[destination]
+            node = self.nodes[seat]
+            # Suggestions are required after entering a room and allowed after staying put
+            if BOARD_GRAPH.is_room[node] and (entered_room or not options):
+                self._suggest(seat, ROOM_CARD_OF_NODE[node])
+                self._try_accusation(seat)
+        if not self.is_over:
+            self._advance_turn()
+
+    def available_moves(self, seat: int) -> List[int]:
+        """Destination nodes for ``seat``, as ``GameManager.get_available_moves``."""
+        return movement_options(
+            self.nodes[seat], self.occupied, self.arrived_via_suggestion[seat]
+        )
+
+    def result(self) -> Dict:
+        names = CARD_CATALOG.names
+        return {
+            "completed": self.is_over,
+            "winner": self.characters[self.winner] if self.winner is not None else None,
+            "winner_seat": self.winner,
+            "winner_bot": self.bots[self.winner].name if self.winner is not None else None,
+            "turns": self.turns,
+            "rounds": -(-self.turns // self.count),
+            "suggestions": self.suggestions,
+            "wrong_accusations": self.wrong_accusations,
+            "solution": dict(
+                zip(("suspect", "weapon", "room"), (names[card] for card in self.solution))
+            ),
+        }
+
+    # ------------------------------------------------------------------
+    # Rules
+    # ------------------------------------------------------------------
+    def _move(self, seat: int, destination: int) -> None:
+        node = self.nodes[seat]
+        if not BOARD_GRAPH.is_room[node]:
+            self.occupied &= ~(1 << BOARD_GRAPH.hallway_index(node))
+        if not BOARD_GRAPH.is_room[destination]:
+            self.occupied |= 1 << BOARD_GRAPH.hallway_index(destination)
+        self.nodes[seat] = destination
+
+    def _suggest(self, seat: int, room_card: int) -> None:
+        bot = self.bots[seat]
+        suspect, weapon = bot.choose_suggestion(room_card)
+        self.suggestions += 1
+
+        # The suggested suspect is dragged into the room
+        moved = self.seat_of_card.get(suspect)
+        if moved is not None and moved != seat and not self.eliminated[moved]:
+            self._move(moved, self.nodes[seat])
+            self.arrived_via_suggestion[moved] = True
+
+        cards = 1 << suspect | 1 << weapon | 1 << room_card
+        disprover = find_first_disprover(
+            self.holders, seat, self.count, (suspect, weapon, room_card)
+        )
+        for other in self.bots:
+            other.observe_suggestion(seat, cards, None if disprover == NO_HOLDER else disprover)
+        if disprover == NO_HOLDER:
+            bot.observe_no_disproof(cards)
+            return
+        card = self.bots[disprover].choose_card(self.hands[disprover] & cards, seat)
+        bot.observe_card(card, disprover)
+
+    def _try_accusation(self, seat: int) -> bool:
+        accusation = self.bots[seat].accusation()
+        if accusation is None:
+            return False
+        if accusation == self.solution:
+            self._finish(seat)
+            return True
+
+        self.wrong_accusations += 1
+        self.eliminated[seat] = True
+        node = self.nodes[seat]
+        if not BOARD_GRAPH.is_room[node]:
+            self.occupied &= ~(1 << BOARD_GRAPH.hallway_index(node))
+        remaining = [other for other in range(self.count) if not self.eliminated[other]]
+        if len(remaining) == 1:
+            self._finish(remaining[0])
+        return True
+
+    def _advance_turn(self) -> None:
+        self.arrived_via_suggestion[self.current] = False
+        seat = next_seat(self.eliminated, self.current)
+        if seat is None:
+            self._finish(None)
+        else:
+            self.current = seat
+
+    def _finish(self, winner: Optional[int]) -> None:
+        self.winner = winner
+        self.is_over = True
+
+
+def simulate_game(max_rounds: int = 100, **options) -> Dict:
+    """Play one game; ``options`` are passed to :class:`SimulatedGame`."""
+    return SimulatedGame(**options).run(max_rounds)
+
+
+def simulate_games(
+    games: int,
+    seed: Optional[int] = None,
+    max_rounds: int = 100,
+    **options,
+) -> Dict:
+    """
+    Play ``games`` games and summarize them. With a ``seed``, game ``i`` uses
+    seed ``seed + i``, so any game of a run can be played again on its own.
+    """
+    summary = new_summary()
+    for index in range(games):
+        game_seed = None if seed is None else seed + index
+        add_result(summary, simulate_game(max_rounds, seed=game_seed, **options))
+    return finish_summary(summary)
+
+
+def new_summary() -> Dict:
+    """Raw counts for :func:`add_result`; :func:`finish_summary` adds the rates."""
+    return {
+        "games": 0,
+        "completed": 0,
+        "wins_by_character": {},
+        "wins_by_seat": {},
+        "wins_by_bot": {},
+        "turns": 0,
+        "solved_turns": 0,  # turns of completed games only
+        "min_turns": None,
+        "max_turns": None,
+        "suggestions": 0,
+        "wrong_accusations": 0,
+    }
+
+
+SUMMED = ("games", "completed", "turns", "solved_turns", "suggestions", "wrong_accusations")
+WIN_COUNTS = ("wins_by_character", "wins_by_seat", "wins_by_bot")
+
+
+def add_result(summary: Dict, result: Dict) -> None:
+    summary["games"] += 1
+    summary["turns"] += result["turns"]
+    summary["suggestions"] += result["suggestions"]
+    summary["wrong_accusations"] += result["wrong_accusations"]
+    if result["completed"]:
+        turns = result["turns"]
+        summary["completed"] += 1
+        summary["solved_turns"] += turns
+        if summary["min_turns"] is None or turns < summary["min_turns"]:
+            summary["min_turns"] = turns
+        if summary["max_turns"] is None or turns > summary["max_turns"]:
+            summary["max_turns"] = turns
+    if result["winner"] is not None:
+        winner = (result["winner"], result["winner_seat"], result["winner_bot"])
+        for key, value in zip(WIN_COUNTS, winner):
+            summary[key][value] = summary[key].get(value, 0) + 1
+
+
+def merge_summaries(summary: Dict, other: Dict) -> None:
+    """Add the raw counts of ``other`` into ``summary``."""
+    for key in SUMMED:
+        summary[key] += other[key]
+    for key, pick in (("min_turns", min), ("max_turns", max)):
+        values = [value for value in (summary[key], other[key]) if value is not None]
+        summary[key] = pick(values) if values else None
+    for key in WIN_COUNTS:
+        for value, wins in other[key].items():
+            summary[key][value] = summary[key].get(value, 0) + wins
+
+
+def finish_summary(summary: Dict) -> Dict:
+    games = summary["games"] or 1
+    completed = summary["completed"] or 1
+    return {
+        **summary,
+        "win_rate_by_character": {
+            name: round(wins / games, 4) for name, wins in summary["wins_by_character"].items()
+        },
+        "win_rate_by_seat": {
+            seat: round(wins / games, 4) for seat, wins in sorted(summary["wins_by_seat"].items())
+        },
+        "average_turns": round(summary["turns"] / games, 2),
+        "average_turns_to_solve": round(summary["solved_turns"] / completed, 2),
+        "suggestions_per_game": round(summary["suggestions"] / games, 2),
+    }
@@ -0,0 +1,122 @@
+"""Batches of headless simulations sharded across a process pool.
+
+A batch of ``games`` games with base ``seed`` is split into shards of
+consecutive seeds. Each worker process plays one shard with
+:func:`~game.game_engine.simulation.simulate_game` and sends back the raw
+counts, and the parent merges them as they arrive. Game ``i`` always uses
+seed ``seed + i``, so a batch gives the same totals as
+``simulate_games(games, seed)`` however it is sharded, and any single game
+can be replayed from its seed. Shards are independent, so throughput scales
+with the number of worker processes.
+"""
+
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+
+from game.game_engine.simulation import (
+    SimulatedGame,
+    add_result,
+    finish_summary,
+    merge_summaries,
+    new_summary,
+    simulate_game,
+)
+
+# Shards per worker, so progress is reported often and slow shards even out
+SHARDS_PER_WORKER = 8
+MIN_SHARD_SIZE = 50
+
+
+def default_workers() -> int:
+    return getattr(settings, "GAME_SIMULATION_WORKERS", None) or os.cpu_count() or 1
+
+
+def plan_shards(games: int, seed: int, shard_size: int) -> List[Tuple[int, int]]:
+    """``(first seed, game count)`` for each shard."""
+    return [
+        (seed + start, min(shard_size, games - start)) for start in range(0, games, shard_size)
+    ]
+
+
+def run_shard(first_seed: int, count: int, max_rounds: int, options: Dict) -> Dict:
+    """Play ``count`` games from ``first_seed`` on; returns the raw counts."""
+    summary = new_summary()
+    for offset in range(count):
+        add_result(summary, simulate_game(max_rounds, seed=first_seed + offset, **options))
+    return summary
+
+
+def iter_batch(
+    games: int,
+    seed: Optional[int] = None,
+    workers: Optional[int] = None,
+    shard_size: Optional[int] = None,
+    max_rounds: int = 100,
+    **options,
+) -> Iterator[Dict]:
+    """
+    Play a batch and yield the merged summary after every shard, ending with
+    ``"done": True``. Bad ``options`` raise ValueError here, before any game
+    is played.
+    """
+    if games < 1 or max_rounds < 1:
+        raise ValueError("games and max_rounds must be at least 1.")
+    SimulatedGame(**options)  # validate the players and bots up front
+    seed = random.randrange(2**31) if seed is None else seed
+    workers = max(1, workers or default_workers())
+    if not shard_size:
+        shard_size = max(MIN_SHARD_SIZE, math.ceil(games / (workers * SHARDS_PER_WORKER)))
+    return _run(plan_shards(games, seed, shard_size), seed, workers, max_rounds, options)
+
+
+def run_batch(games: int, **kwargs) -> Dict:
+    """Play a batch and return only the final summary."""
+    for summary in iter_batch(games, **kwargs):
+        pass
+    return summary
+
+
+def _run(shards, seed, workers, max_rounds, options) -> Iterator[Dict]:
+    summary = new_summary()
+
+    def progress(done):
+        return {
+            **finish_summary(summary),
+            "seed": seed,
+            "shards_done": done,
+            "shards": len(shards),
+            "done": done == len(shards),
+        }
+
+    if workers == 1:
+        # No point paying for a process pool
+        for done, shard in enumerate(shards, 1):
+            merge_summaries(summary, run_shard(*shard, max_rounds, options))
+            yield progress(done)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(run_shard, *shard, max_rounds, options) for shard in shards]
+        try:
+            for done, future in enumerate(as_completed(futures), 1):
+                merge_summaries(summary, future.result())
+                yield progress(done)
+        finally:
+            # A consumer that stops early should not wait for the rest
+            for future in futures:
+                future.cancel()
+
+
+def _init_worker():
+    # Spawned workers (the default outside Linux) start without Django set up
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+        django.setup()
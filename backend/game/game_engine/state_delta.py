@@ -0,0 +1,53 @@
+"""Compact deltas between two serialized game states."""
+
+from typing import Dict, Optional
+
+
+def diff_states(old: Dict, new: Dict) -> Dict:
+    """
+    Return the changes that turn ``old`` into ``new``.
+
+    Top-level keys are included whole when they differ. Players are matched by
+    id and only their changed fields are sent, under ``players_changed``; if
+    the set of players itself changed the full list is sent as ``players``.
+    """
+    changes: Dict = {}
+    for key, value in new.items():
+        if key == "players":
+            continue
+        if key not in old or old[key] != value:
+            changes[key] = value
+
+    old_players = old.get("players", [])
+    new_players = new.get("players", [])
+    if [p["id"] for p in old_players] != [p["id"] for p in new_players]:
+        changes["players"] = new_players
+        return changes
+
+    players_changed = {}
+    for before, after in zip(old_players, new_players):
+        fields = {
+            field: value
+            for field, value in after.items()
+            if before.get(field) != value
+        }
+        if fields:
+            players_changed[str(after["id"])] = fields
+    if players_changed:
+        changes["players_changed"] = players_changed
+    return changes
+
+
+def apply_delta(state: Dict, changes: Dict) -> Dict:
+    """Apply ``changes`` from :func:`diff_states` to ``state`` (used by tests and tools)."""
+    merged = dict(state)
+    for key, value in changes.items():
+        if key != "players_changed":
+            merged[key] = value
+    players_changed: Optional[Dict] = changes.get("players_changed")
+    if players_changed:
+        merged["players"] = [
+            {**player, **players_changed.get(str(player["id"]), {})}
+            for player in merged["players"]
+        ]
+    return merged
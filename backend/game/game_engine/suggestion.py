@@ -1,15 +1,58 @@
-from game.models import Player, Room, Hallway
+from game.models import Hallway
+from game.game_engine.board_graph import BOARD_GRAPH, NO_NODE
+from game.game_engine.deck import CARD_CATALOG
 from game.game_engine.notifier import Notifier
 
+NO_HOLDER = -1
+
+
+def build_holder_index(hands):
+    """Map every card bit index to the seat holding it (``NO_HOLDER`` for the envelope)."""
+    holders = [NO_HOLDER] * len(CARD_CATALOG.names)
+    for seat, hand in enumerate(hands):
+        while hand:
+            low = hand & -hand
+            holders[low.bit_length() - 1] = seat
+            hand ^= low
+    return holders
+
+
+def find_first_disprover(holders, suggester_seat, player_count, card_indices):
+    """
+    Return the seat of the first player clockwise from ``suggester_seat`` who
+    holds one of ``card_indices``, or ``NO_HOLDER`` if nobody can disprove.
+    """
+    best_seat = NO_HOLDER
+    best_distance = player_count
+    for card_index in card_indices:
+        seat = holders[card_index]
+        if seat == NO_HOLDER or seat == suggester_seat:
+            continue
+        distance = (seat - suggester_seat) % player_count
+        if distance < best_distance:
+            best_seat, best_distance = seat, distance
+    return best_seat
+
 
 class SuggestionEngine:
     """
     Handles suggestion logic: move the suspect, find who can disprove, and report results.
     """
 
-    def __init__(self, players, room_name="default"):
+    def __init__(
+        self,
+        players,
+        room_name="default",
+        board_nodes=None,
+        occupancy=None,
+        persistence=None,
+    ):
         self.players = players  # list of dicts from GameManager
         self.room_name = room_name
+        self.board_nodes = board_nodes  # board models indexed by BOARD_GRAPH node id
+        self.occupancy = occupancy  # the game's HallwayOccupancy
+        self.persistence = persistence  # the game's WriteBehindBuffer
+        self.holders = build_holder_index(p["hand"] for p in players)  # card bit -> seat
 
     # ======================================================================
     # Core logic
@@ -27,30 +70,26 @@ class SuggestionEngine:
         # Move the suspect to the suggested room (only if not eliminated)
         suspect_player = next((p for p in self.players if p["name"] == suspect), None)
         if suspect_player and suspect_player is not suggesting_player and not suspect_player.get("eliminated", False):
-            try:
-                new_room = Room.objects.get(name=room_name)
-            except Room.DoesNotExist:
+            room_node = BOARD_GRAPH.find_node(room_name)
+            if room_node == NO_NODE or not BOARD_GRAPH.is_room[room_node]:
                 return {
                     "pending_disproof": False,
                     "first_disprover": None,
                     "matching_cards": [],
                     "message": f"⚠️ Room {room_name} not found.",
                 }
+            new_room = self.board_nodes[room_node]
 
             previous_location = suspect_player["location"]
             if isinstance(previous_location, Hallway):
-                updated = Hallway.objects.filter(pk=previous_location.pk).update(is_occupied=False)
-                if updated:
-                    previous_location.is_occupied = False
+                self.occupancy.release(BOARD_GRAPH.node_id(previous_location.name))
 
             suspect_player["location"] = new_room
-            player_obj = suspect_player["player_obj"]
-            Player.objects.filter(pk=player_obj.pk).update(
+            self.persistence.mark(
+                suspect_player["player_obj"],
                 current_hallway=None,
                 current_room=new_room,
             )
-            player_obj.current_hallway = None
-            player_obj.current_room = new_room
             suspect_player["arrived_via_suggestion"] = True
             Notifier.broadcast(
                 f"  {suspect} was moved to {room_name} due to the suggestion.",
@@ -61,29 +100,24 @@ class SuggestionEngine:
         #         f"  {suspect} is already in {room_name}.", room=self.room_name
         #     )
 
-        # Find players in order (excluding the suggester)
-        player_order = self._rotate_players(suggesting_player)
-
-        # Find the first player who can disprove
-        for p in player_order:
-            matching_cards = [
-                card for card in p["hand"]
-                if card in {suspect, weapon, room_name}
-            ]
-            if matching_cards:
-                # Return pending disproof state (server will prompt player to choose) insead of random choice
-                return {
-                    "pending_disproof": True,
-                    "first_disprover": p,
-                    "matching_cards": matching_cards,
-                    "message": f"Waiting for {p['name']} to choose a card to disprove the suggestion.",
-                }    
-                # chosen_card = random.choice(matching_cards)
-                # Notifier.broadcast(
-                #     f"🃏 {p['name']} disproved using {chosen_card}.",
-                #     room=self.room_name,
-                # )
-                # return (f"{p['name']} disproved {suggester_name}'s suggestion.", chosen_card)
+        # Find the first player clockwise from the suggester who holds a suggested card
+        index = CARD_CATALOG.index
+        card_indices = (index[suspect], index[weapon], index[room_name])
+        seat = find_first_disprover(
+            self.holders, suggesting_player["seat"], len(self.players), card_indices
+        )
+        if seat != NO_HOLDER:
+            p = self.players[seat]
+            matching_cards = CARD_CATALOG.names_of(
+                p["hand"] & CARD_CATALOG.mask((suspect, weapon, room_name))
+            )
+            # Return pending disproof state (server will prompt player to choose) insead of random choice
+            return {
+                "pending_disproof": True,
+                "first_disprover": p,
+                "matching_cards": matching_cards,
+                "message": f"Waiting for {p['name']} to choose a card to disprove the suggestion.",
+            }
 
         # No one can disprove
         Notifier.broadcast(
@@ -96,11 +130,3 @@ class SuggestionEngine:
             "matching_cards": [],
             "message": f"No one could disprove {suggester_name}'s suggestion.",
         }
-    # ======================================================================
-    # Helper: rotate player order
-    # ======================================================================
-    def _rotate_players(self, current_player):
-        """Return players in clockwise order starting after the current one."""
-        idx = self.players.index(current_player)
-        rotated = self.players[idx + 1 :] + self.players[:idx]
-        return rotated
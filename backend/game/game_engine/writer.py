@@ -0,0 +1,211 @@
+"""SQLite concurrency mode: WAL, tuned pragmas and one serialized writer.
+
+SQLite lets many connections read at once but only one write at a time;
+other writers wait up to the busy timeout and then fail with ``database is
+locked``. With ``GAME_SQLITE_CONCURRENCY`` on, and the default database a
+SQLite file:
+
+* every connection opens with ``GAME_SQLITE_PRAGMAS``: WAL, so readers never
+  wait for the writer; ``synchronous=NORMAL``, so a commit does not wait for
+  an fsync; and a busy timeout for other processes' writes
+* the game and lobby writes of this process all run on :data:`WRITER`, one
+  thread, so they never contend with each other. Write-behind flushes
+  queued while the writer is busy are committed together, up to
+  ``GAME_WRITER_BATCH_SIZE`` per transaction. Lobby views and other callers
+  that wait for their result (:func:`serialized_write`) run alone, in their
+  own transactions, so their side effects still follow their commit.
+* reads stay on the threads that need them and run concurrently
+
+Otherwise (another database, or SQLite in memory as in tests) the writer
+runs each job on its own as a plain single-thread executor, and
+:func:`serialized_write` functions run on the caller's thread.
+"""
+
+import collections
+import functools
+import threading
+from concurrent.futures import Executor, Future
+from typing import Callable, Deque, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+SQLITE_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "busy_timeout": 5000,
+    "temp_store": "memory",
+    "cache_size": -16000,  # KiB
+}
+
+
+def sqlite_file(wrapper=None) -> bool:
+    """Whether ``wrapper`` (default: this thread's connection) is a SQLite file."""
+    wrapper = wrapper or connection
+    return wrapper.vendor == "sqlite" and not wrapper.is_in_memory_db()
+
+
+def active(wrapper=None) -> bool:
+    return getattr(settings, "GAME_SQLITE_CONCURRENCY", False) and sqlite_file(wrapper)
+
+
+@receiver(connection_created)
+def tune_connection(sender, connection, **kwargs):
+    if not active(connection):
+        return
+    pragmas = {**SQLITE_PRAGMAS, **getattr(settings, "GAME_SQLITE_PRAGMAS", {})}
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+class _Job:
+    __slots__ = ("func", "args", "kwargs", "future", "batch")
+
+    def __init__(self, func, args, kwargs, batch):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future: Future = Future()
+        self.batch = batch
+
+    def run(self):
+        return self.func(*self.args, **self.kwargs)
+
+
+class WriterQueue(Executor):
+    """One thread running every database write of the process, in order."""
+
+    def __init__(self, name: str = "game-writer"):
+        self.name = name
+        self._jobs: Deque[_Job] = collections.deque()
+        self._wakeup = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._shutdown = False
+        self.stats = {"jobs": 0, "batches": 0}
+
+    # ------------------------------------------------------------------
+    # Submitting
+    # ------------------------------------------------------------------
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        """Queue a write that may share a transaction with others queued with it."""
+        return self._put(_Job(fn, args, kwargs, batch=True))
+
+    def submit_alone(self, fn: Callable, /, *args, **kwargs) -> Future:
+        """Queue a write that runs in a transaction of its own."""
+        return self._put(_Job(fn, args, kwargs, batch=False))
+
+    def call(self, fn: Callable, /, *args, **kwargs):
+        """
+        Run ``fn`` on the writer and return its result once committed. Runs
+        on the calling thread instead when the mode is off, on the writer
+        itself, or inside a transaction, which cannot move to another thread.
+        """
+        if self.on_writer_thread() or not active() or connection.in_atomic_block:
+            return fn(*args, **kwargs)
+        return self.submit_alone(fn, *args, **kwargs).result()
+
+    def on_writer_thread(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def _put(self, job: _Job) -> Future:
+        with self._wakeup:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new writes after shutdown")
+            self._jobs.append(job)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._wakeup.notify()
+        return job.future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        with self._wakeup:
+            self._shutdown = True
+            if cancel_futures:
+                while self._jobs:
+                    self._jobs.popleft().future.cancel()
+            self._wakeup.notify()
+            thread = self._thread
+        if wait and thread is not None:
+            thread.join()
+
+    # ------------------------------------------------------------------
+    # The writer thread
+    # ------------------------------------------------------------------
+    def _next_batch(self):
+        """The next job, plus the batchable jobs queued behind a batchable one."""
+        with self._wakeup:
+            while not self._jobs:
+                if self._shutdown:
+                    return None
+                self._wakeup.wait()
+            first = self._jobs.popleft()
+            jobs = [first]
+            if first.batch and active():
+                limit = getattr(settings, "GAME_WRITER_BATCH_SIZE", 200)
+                while self._jobs and self._jobs[0].batch and len(jobs) < limit:
+                    jobs.append(self._jobs.popleft())
+            return jobs
+
+    def _run(self):
+        while True:
+            jobs = self._next_batch()
+            if jobs is None:
+                return
+            jobs = [job for job in jobs if job.future.set_running_or_notify_cancel()]
+            if not jobs:
+                continue
+            if len(jobs) == 1:
+                outcomes = [_outcome(jobs[0].run)]
+            else:
+                outcomes = _run_batch(jobs)
+            self.stats["jobs"] += len(jobs)
+            self.stats["batches"] += 1
+            for job, (result, error) in zip(jobs, outcomes):
+                if error is None:
+                    job.future.set_result(result)
+                else:
+                    job.future.set_exception(error)
+
+
+def _outcome(func):
+    try:
+        return func(), None
+    except Exception as exc:
+        return None, exc
+
+
+def _run_batch(jobs):
+    """Run ``jobs`` in one transaction; each in a savepoint, so one failing rolls back alone."""
+    outcomes = []
+    try:
+        with transaction.atomic():
+            for job in jobs:
+                outcomes.append(_outcome(functools.partial(_in_savepoint, job)))
+    except Exception as exc:
+        # The commit failed: nothing in the batch was written
+        print(f"[Writer error] {exc}")
+        return [(None, exc)] * len(jobs)
+    return outcomes
+
+
+def _in_savepoint(job: _Job):
+    with transaction.atomic():
+        return job.run()
+
+
+# Every game and lobby write of the process goes through this one thread
+WRITER = WriterQueue()
+
+
+def serialized_write(func):
+    """Decorator running each call of ``func`` through :meth:`WriterQueue.call`."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return WRITER.call(func, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,48 @@
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, teardown_databases
+
+from game.benchmarks import load_scenarios
+
+
+class Command(BaseCommand):
+    help = "Run game engine benchmarks (ORM scenarios use a throwaway test database)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("scenarios", nargs="*", help="Scenario names (default: all).")
+        parser.add_argument("--list", action="store_true", help="List scenarios and exit.")
+
+    def handle(self, *args, **options):
+        scenarios = load_scenarios()
+        if options["list"]:
+            for item in scenarios.values():
+                self.stdout.write(f"{item.name:<20} {item.description}")
+            return
+
+        names = options["scenarios"] or list(scenarios)
+        unknown = [name for name in names if name not in scenarios]
+        if unknown:
+            raise CommandError(f"Unknown scenario(s): {', '.join(unknown)}")
+
+        selected = [scenarios[name] for name in names]
+        old_config = None
+        directory = None
+        if any(item.file_db for item in selected):
+            # Test databases are in memory by default; these scenarios measure a file
+            directory = tempfile.TemporaryDirectory()
+            test_settings = settings.DATABASES["default"].setdefault("TEST", {})
+            test_settings["NAME"] = f"{directory.name}/benchmark.sqlite3"
+        if any(item.needs_db for item in selected):
+            old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            for item in selected:
+                self.stdout.write(self.style.MIGRATE_HEADING(f"[{item.name}] {item.description}"))
+                for label, value in item.func():
+                    self.stdout.write(f"  {label:<48} {value}")
+        finally:
+            if old_config is not None:
+                teardown_databases(old_config, verbosity=0)
+            if directory is not None:
+                directory.cleanup()
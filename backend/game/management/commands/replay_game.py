@@ -0,0 +1,49 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from game.game_engine.deck import CARD_CATALOG
+from game.game_engine.event_log import log_dir, log_path, read_log, replay
+
+
+class Command(BaseCommand):
+    help = "Rebuild a game from its event log and print the resulting state (no database needed)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("game", help="Game name (e.g. lobby_3) or path to a log file.")
+        parser.add_argument("--until", type=int, help="Stop after this many events.")
+
+    def handle(self, *args, **options):
+        path = Path(options["game"])
+        if not path.is_file():
+            if log_dir() is None:
+                raise CommandError("GAME_EVENT_LOG_DIR is not set.")
+            path = log_path(options["game"])
+        if not path.is_file():
+            raise CommandError(f"No event log for {options['game']!r}.")
+
+        start, events = read_log(path)
+        began = time.perf_counter()
+        try:
+            manager = replay(start, events, options["until"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - began
+
+        applied = len(events) if options["until"] is None else min(options["until"], len(events))
+        self.stdout.write(f"{manager.room_name}: {applied} of {len(events)} events in {elapsed * 1000:.1f} ms")
+        if manager.is_over:
+            self.stdout.write(f"Game over; winner: {manager.winner or 'none'}")
+        else:
+            current = manager.players[manager.current_index]
+            self.stdout.write(f"Current player: {current['name']} {manager.turn_state}")
+        self.stdout.write(
+            "Solution: " + ", ".join(manager.solution[key] for key in ("suspect", "weapon", "room"))
+        )
+        for entry in manager.players:
+            status = " (eliminated)" if entry["eliminated"] else ""
+            self.stdout.write(
+                f"  {entry['name']:<16} {entry['location'].name:<28}{status} "
+                f"hand: {', '.join(CARD_CATALOG.names_of(entry['hand']))}"
+            )
@@ -0,0 +1,69 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from game.game_engine.simulation import BOTS, MAX_PLAYERS
+from game.game_engine.simulation_pool import default_workers, iter_batch
+
+
+class Command(BaseCommand):
+    help = "Play a batch of bot-only games across worker processes and print aggregate stats."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--games", type=int, default=10000)
+        parser.add_argument("--seed", type=int, help="Base seed; game i uses seed + i.")
+        parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count).")
+        parser.add_argument("--shard-size", type=int, help="Games per shard.")
+        parser.add_argument("--players", type=int, default=MAX_PLAYERS)
+        parser.add_argument(
+            "--bots",
+            default="deducer",
+            help=f"One bot for every seat, or a comma-separated bot per seat ({', '.join(BOTS)}).",
+        )
+        parser.add_argument("--rounds", type=int, default=100, help="Round limit per game.")
+        parser.add_argument("--json", action="store_true", help="Print the final summary as JSON.")
+
+    def handle(self, *args, **options):
+        bots = options["bots"].split(",") if "," in options["bots"] else options["bots"]
+        workers = options["workers"] or default_workers()
+        try:
+            batch = iter_batch(
+                options["games"],
+                seed=options["seed"],
+                workers=workers,
+                shard_size=options["shard_size"],
+                max_rounds=options["rounds"],
+                player_count=options["players"],
+                bots=bots,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        started = time.perf_counter()
+        for summary in batch:
+            elapsed = time.perf_counter() - started
+            self.stderr.write(
+                f"[{summary['shards_done']}/{summary['shards']}] {summary['games']:,} games, "
+                f"{summary['games'] / elapsed * 60:,.0f}/min on {workers} worker(s)"
+            )
+
+        if options["json"]:
+            self.stdout.write(json.dumps(summary, indent=2))
+            return
+
+        self.stdout.write(
+            f"{summary['games']:,} games (seed {summary['seed']}), "
+            f"{summary['completed']:,} solved within {options['rounds']} rounds"
+        )
+        self.stdout.write(
+            f"Turns to solve: {summary['average_turns_to_solve']} average, "
+            f"{summary['min_turns']}-{summary['max_turns']}; "
+            f"suggestions per game: {summary['suggestions_per_game']}"
+        )
+        self.stdout.write("Win rate by character:")
+        for name, rate in sorted(summary["win_rate_by_character"].items(), key=lambda item: -item[1]):
+            self.stdout.write(f"  {name:<16} {rate:.2%}")
+        self.stdout.write("Win rate by seat:")
+        for seat, rate in summary["win_rate_by_seat"].items():
+            self.stdout.write(f"  {seat:<16} {rate:.2%}")
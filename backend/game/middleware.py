@@ -0,0 +1,16 @@
+from game.game_engine.query_audit import VIEW_QUERIES, QueryAudit, record
+
+
+class QueryAuditMiddleware:
+    """Count each request's queries under its URL name and flag repeated ones."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryAudit() as audit:
+            response = self.get_response(request)
+        match = request.resolver_match
+        audit.label = (match.url_name or match.view_name) if match else "unresolved"
+        record(VIEW_QUERIES, audit)
+        return response
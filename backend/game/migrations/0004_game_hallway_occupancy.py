@@ -0,0 +1,18 @@
+# Generated by Django 4.2.25 on 2026-10-17 01:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0003_alter_lobby_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='hallway_occupancy',
+            field=models.PositiveIntegerField(default=0, help_text='Bit mask of occupied hallways in this game (bit 0 = H01 ... bit 11 = H12).'),
+        ),
+    ]
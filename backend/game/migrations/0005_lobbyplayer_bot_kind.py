@@ -0,0 +1,18 @@
+# Generated by Django 4.2.25 on 2026-10-17 02:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0004_game_hallway_occupancy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lobbyplayer',
+            name='bot_kind',
+            field=models.CharField(blank=True, default='', help_text='Strategy of the server-side bot playing this seat; blank for a human player.', max_length=20),
+        ),
+    ]
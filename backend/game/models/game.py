@@ -7,6 +7,10 @@ class Game(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True)
     is_completed = models.BooleanField(default=False)
+    hallway_occupancy = models.PositiveIntegerField(
+        default=0,
+        help_text="Bit mask of occupied hallways in this game (bit 0 = H01 ... bit 11 = H12).",
+    )
 
     solution = models.OneToOneField(
         "Solution", on_delete=models.CASCADE, null=True, blank=True
@@ -19,6 +19,16 @@ class LobbyPlayer(models.Model):
         limit_choices_to={'card_type': 'CHAR'},
         related_name='lobby_players'
     )
+    bot_kind = models.CharField(
+        max_length=20,
+        blank=True,
+        default='',
+        help_text='Strategy of the server-side bot playing this seat; blank for a human player.'
+    )
+
+    @property
+    def is_bot(self):
+        return bool(self.bot_kind)
 
     def __str__(self):
         return f"Player {self.id}"
@@ -45,7 +45,7 @@ class LobbyPlayerSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = LobbyPlayer
-        fields = ['id', 'created_at', 'character_card', 'character_name']
+        fields = ['id', 'created_at', 'character_card', 'character_name', 'bot_kind']
     
     def get_character_name(self, obj):
         if obj.character_card:
@@ -61,8 +61,6 @@ class LobbySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'created_at', 'is_active', 'game_in_progress', 'players', 'player_count']
     
     def get_player_count(self, obj):
-        count = obj.lobby_players.count()
-        # Debug print
-        print(f"Lobby {obj.id} player count: {count}")
-        print(f"Raw players query: {list(obj.lobby_players.all().values())}")
-        return count
\ No newline at end of file
+        # Annotated by list_lobbies; otherwise counted from the players loaded above
+        count = getattr(obj, 'player_count', None)
+        return count if count is not None else len(obj.lobby_players.all())
\ No newline at end of file
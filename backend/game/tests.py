@@ -1,3 +1,1448 @@
-from django.test import TestCase
+import asyncio
+import json
+import random
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.db import connection, connections
+from django.db.models import Q
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from game.benchmarks import create_lobby_players, play_turn, turn_actions
+from game.benchmarks.queries import measure_endpoints, over_budget
+
+from game.game_engine.actor import BUSY_ERROR, GameActor, get_actor, stop_actor
+from game.game_engine.board_graph import BOARD_GRAPH, NO_NODE
+from game.game_engine.bots import BOT_DEDUCER, decide, next_bot_step
+from game.game_engine.constants import (
+    HALLWAY_DEFINITIONS,
+    ROOM_DEFINITIONS,
+    ROOMS,
+    STARTING_POSITIONS,
+    SUSPECTS,
+    WEAPONS,
+)
+from game.game_engine.deck import CARD_CATALOG, deal_hands
+from game.game_engine.deduction import Deduction
+from game.game_engine.estimator import estimate_envelope, uniform_estimate
+from game.game_engine.frames import JSON_BACKENDS, encode_frame, frame_event, get_encoder
+from game.game_engine.checkpoints import FILE_EXECUTOR, dump_manager, load_checkpoint, load_manager
+from game.game_engine.event_log import read_log, replay, replay_log
+from game.game_engine.game_manager import STATE_SECTIONS, GameManager
+from game.game_engine.housekeeping import sweep
+from game.game_engine.lobby_directory import LOBBY_DIRECTORY, apublish
+from game.game_engine import metrics
+from game.game_engine.notifier import Notifier, batch_payload, collect_messages
+from game.game_engine.player_tokens import issue_player_token
+from game.game_engine.query_audit import QueryBudgetExceeded, query_budget, query_shape
+from game.game_engine.persistence import (
+    DURABILITY_PERIODIC,
+    DURABILITY_PER_ACTION,
+    PERSISTENCE_EXECUTOR,
+    WriteBehindBuffer,
+    _PeriodicFlusher,
+)
+from game.game_engine.session_registry import (
+    evict_idle,
+    get_session,
+    list_sessions,
+    register_session,
+    remove_session,
+    session_stats,
+)
+from game.game_engine.simulation import SimulatedGame, simulate_game, simulate_games
+from game.game_engine.simulation_pool import iter_batch, run_batch
+from game.game_engine.state_delta import apply_delta
+from game.game_engine.suggestion import NO_HOLDER, build_holder_index, find_first_disprover
+from game.game_engine.writer import WriterQueue
+from game.consumers import LobbyConsumer
+from game.routing import websocket_urlpatterns
+from game.models import Card, Game, Hallway, Lobby, LobbyPlayer, Player
+
+
+def create_manager(game_name, characters=SUSPECTS[:2]):
+    """Start a game the way the start_game view does."""
+    lobby = Lobby.objects.create(name=game_name)
+    lobby_players = []
+    for name in characters:
+        card, _ = Card.objects.get_or_create(name=name, defaults={"card_type": "CHAR"})
+        lobby_players.append(LobbyPlayer.objects.create(lobby=lobby, character_card=card))
+    return GameManager(game_name=game_name, lobby_players=lobby_players)
+
+
+def start_mask(characters):
+    mask = 0
+    for name in characters:
+        node = BOARD_GRAPH.node_for_code(STARTING_POSITIONS[name])
+        mask |= 1 << BOARD_GRAPH.hallway_index(node)
+    return mask
+
+
+# Tests that want event logs point GAME_EVENT_LOG_DIR at a temporary directory;
+# the rest must not leave logs in the source tree
+_no_event_logs = override_settings(GAME_EVENT_LOG_DIR=None)
+
+
+def setUpModule():
+    _no_event_logs.enable()
+
+
+def tearDownModule():
+    _no_event_logs.disable()
+
+
+class BoardGraphTests(SimpleTestCase):
+    def test_adjacency_matches_the_board_definitions(self):
+        self.assertEqual(
+            (BOARD_GRAPH.room_count, BOARD_GRAPH.hallway_count),
+            (len(ROOM_DEFINITIONS), len(HALLWAY_DEFINITIONS)),
+        )
+        for code, definition in ROOM_DEFINITIONS.items():
+            node = BOARD_GRAPH.node_for_code(code)
+            self.assertTrue(BOARD_GRAPH.is_room[node])
+            self.assertEqual(BOARD_GRAPH.node_id(definition["name"]), node)
+            self.assertEqual(
+                BOARD_GRAPH.adjacency[node],
+                tuple(BOARD_GRAPH.node_for_code(hallway) for hallway in definition["hallways"]),
+            )
+            secret = definition["secret_passage"]
+            passage = BOARD_GRAPH.node_for_code(secret) if secret else NO_NODE
+            self.assertEqual(BOARD_GRAPH.secret_passage[node], passage)
+            if secret:
+                self.assertEqual(BOARD_GRAPH.secret_passage[passage], node)
+        for code, definition in HALLWAY_DEFINITIONS.items():
+            node = BOARD_GRAPH.node_for_code(code)
+            self.assertFalse(BOARD_GRAPH.is_room[node])
+            self.assertEqual(BOARD_GRAPH.secret_passage[node], NO_NODE)
+            rooms = tuple(BOARD_GRAPH.node_for_code(definition[key]) for key in ("room1", "room2"))
+            self.assertEqual(BOARD_GRAPH.adjacency[node], rooms)
+            # Every hallway is listed by both of the rooms it joins
+            for room in rooms:
+                self.assertIn(node, BOARD_GRAPH.adjacency[room])
+
+    def test_graph_cannot_be_changed(self):
+        with self.assertRaises(AttributeError):
+            BOARD_GRAPH.adjacency = ()
+
+
+def orm_moves(manager, entry):
+    """``(name, type)`` of the moves get_available_moves found with ORM queries."""
+    location = entry["location"]
+    if isinstance(location, Hallway):
+        return {(room.name, "room") for room in (location.room1, location.room2)}
+    taken = {
+        other["location"].id
+        for other in manager.players
+        if not other["eliminated"] and isinstance(other["location"], Hallway)
+    }
+    moves = {
+        (hallway.name, "hallway")
+        for hallway in Hallway.objects.filter(Q(room1=location) | Q(room2=location))
+        if hallway.id not in taken
+    }
+    moves |= {(room.name, "room") for room in location.connected_rooms.all()}
+    if entry.get("arrived_via_suggestion"):
+        moves.add((f"Stay in {location.name}", "stay"))
+    return moves
+
+
+class MoveGenerationTests(TestCase):
+    def test_moves_match_the_orm_lookup_from_every_square(self):
+        manager = create_manager("lobby_moves")
+        mover, other = manager.players
+        # Only the other player's starting hallway stays occupied
+        manager._set_hallway_occupied(mover["location"], False)
+        for location in manager.board_nodes:
+            for arrived_via_suggestion in (False, True):
+                mover["location"] = location
+                mover["arrived_via_suggestion"] = arrived_via_suggestion
+                with self.assertNumQueries(0):
+                    moves = manager.get_available_moves(mover)
+                self.assertEqual(
+                    {(move["name"], move["type"]) for move in moves},
+                    orm_moves(manager, mover),
+                    location.name,
+                )
+
+
+class HallwayOccupancyTests(TestCase):
+    GAME_COUNT = 200
+    CHARACTERS = ("Miss Scarlet", "Colonel Mustard")
+
+    def test_concurrent_games_do_not_share_occupancy(self):
+        managers = [
+            create_manager(f"lobby_{index}", self.CHARACTERS)
+            for index in range(self.GAME_COUNT)
+        ]
+        expected = start_mask(self.CHARACTERS)
+        for manager in managers:
+            self.assertEqual(manager.occupancy.mask, expected)
+
+        # Interleave turns across every game: each current player leaves their
+        # starting hallway, which must free it in that game only.
+        for manager in managers:
+            entry = manager.get_current_player()
+            options = manager.move_player(entry["player_obj"].id)["options"]
+            self.assertTrue(manager.move_player(entry["player_obj"].id, options[0])["success"])
+        moved = start_mask(self.CHARACTERS[:1])
+        for manager in managers:
+            self.assertEqual(manager.occupancy.mask, expected & ~moved)
+
+        # A fresh game started after all that still begins with its own hallways free.
+        late = create_manager("lobby_late", self.CHARACTERS)
+        self.assertEqual(late.occupancy.mask, expected)
+
+    def test_occupied_hallway_blocks_only_its_own_game(self):
+        first = create_manager("lobby_first", self.CHARACTERS)
+        second = create_manager("lobby_second", self.CHARACTERS)
+        mustard = next(p for p in first.players if p["name"] == "Colonel Mustard")
+        # Put Mustard in the Lounge: H08 (his start) is free, H11 is Scarlet's.
+        mustard["location"] = first.board_nodes[BOARD_GRAPH.node_for_code("R20")]
+        first._set_hallway_occupied(first.board_nodes[BOARD_GRAPH.node_for_code("H08")], False)
+
+        names = {option["name"] for option in first.get_available_moves(mustard)}
+        self.assertIn(BOARD_GRAPH.names[BOARD_GRAPH.node_for_code("H08")], names)
+        self.assertNotIn(BOARD_GRAPH.names[BOARD_GRAPH.node_for_code("H11")], names)
+        self.assertEqual(second.occupancy.mask, start_mask(self.CHARACTERS))
+
+    @override_settings(GAME_PERSIST_HALLWAY_OCCUPANCY=True)
+    def test_occupancy_is_persisted_per_game(self):
+        first = create_manager("lobby_a", self.CHARACTERS)
+        second = create_manager("lobby_b", self.CHARACTERS[:1])
+        self.assertEqual(
+            Game.objects.get(pk=first.game.pk).hallway_occupancy,
+            start_mask(self.CHARACTERS),
+        )
+        self.assertEqual(
+            Game.objects.get(pk=second.game.pk).hallway_occupancy,
+            start_mask(self.CHARACTERS[:1]),
+        )
+
+
+class WriteBehindPersistenceTests(TestCase):
+    def _move_current_player(self, manager):
+        entry = manager.get_current_player()
+        options = manager.move_player(entry["player_obj"].id)["options"]
+        manager.move_player(entry["player_obj"].id, options[0])
+        return entry
+
+    @override_settings(GAME_PERSISTENCE_DURABILITY=DURABILITY_PER_ACTION)
+    def test_per_action_flushes_when_the_action_ends(self):
+        manager = create_manager("lobby_per_action")
+        entry = self._move_current_player(manager)
+        self.assertEqual(manager.persistence.pending, 0)
+        stored = Player.objects.get(pk=entry["player_obj"].pk)
+        self.assertEqual(stored.current_room, entry["location"])
+        self.assertIsNone(stored.current_hallway)
+
+    @override_settings(
+        GAME_PERSISTENCE_DURABILITY=DURABILITY_PERIODIC,
+        GAME_PERSISTENCE_FLUSH_INTERVAL=3600,
+    )
+    def test_periodic_defers_writes_until_flushed(self):
+        manager = create_manager("lobby_periodic")
+        manager.persistence.flush()
+        entry = self._move_current_player(manager)
+        self.assertIsNotNone(Player.objects.get(pk=entry["player_obj"].pk).current_hallway)
+
+        manager.make_suggestion_action(entry["player_obj"].id, entry["name"], "Rope")
+        self.assertTrue(manager.end_turn(entry["player_obj"].id)["success"])
+        self.assertGreater(manager.persistence.pending, 0)
+        manager.persistence.flush()
+
+        stored = Player.objects.get(pk=entry["player_obj"].pk)
+        self.assertEqual(stored.current_room, entry["location"])
+        self.assertFalse(stored.is_active_turn)
+        game = Game.objects.get(pk=manager.game.pk)
+        self.assertEqual(game.current_player_id, manager.get_current_player()["player_obj"].pk)
+
+    def test_periodic_flushes_go_through_the_writer(self):
+        flusher = _PeriodicFlusher()
+        queued, inline = WriteBehindBuffer(), WriteBehindBuffer()
+        queued.executor = mock.Mock()
+        for buffer in (queued, inline):
+            buffer.durability, buffer.interval = DURABILITY_PERIODIC, 0
+            buffer.mark(mock.Mock(pk=1), is_active_turn=True)
+            flusher._buffers.add(buffer)
+
+        with mock.patch("game.game_engine.persistence.WRITER.call") as call:
+            flusher.flush_due()
+        queued.executor.submit.assert_called_once()
+        call.assert_called_once_with(inline.flush)
+
+
+class CardCatalogTests(SimpleTestCase):
+    def test_every_card_has_its_own_bit(self):
+        self.assertEqual(len(CARD_CATALOG.names), len(SUSPECTS) + len(WEAPONS) + len(ROOMS))
+        bits = [CARD_CATALOG.bit(name) for name in CARD_CATALOG.names]
+        self.assertEqual(len(set(bits)), len(bits))
+        self.assertEqual(sum(bits), CARD_CATALOG.all_mask)
+
+        by_type = (CARD_CATALOG.suspects_mask, CARD_CATALOG.weapons_mask, CARD_CATALOG.rooms_mask)
+        self.assertEqual(by_type, tuple(map(CARD_CATALOG.mask, (SUSPECTS, WEAPONS, ROOMS))))
+        self.assertEqual(by_type[0] | by_type[1] | by_type[2], CARD_CATALOG.all_mask)
+        self.assertFalse(by_type[0] & by_type[1] or by_type[0] & by_type[2] or by_type[1] & by_type[2])
+
+    def test_masks_convert_back_to_names(self):
+        hand = CARD_CATALOG.mask(["Rope", "Miss Scarlet", "Hall"])
+        self.assertEqual(CARD_CATALOG.names_of(hand), ["Miss Scarlet", "Rope", "Hall"])
+        self.assertEqual(CARD_CATALOG.sorted_names(hand), ["Hall", "Miss Scarlet", "Rope"])
+        self.assertEqual(CARD_CATALOG.names_of(0), [])
+        self.assertEqual(CARD_CATALOG.names_of(CARD_CATALOG.all_mask), list(CARD_CATALOG.names))
+
+    def test_deal_hands_splits_the_cards_between_players(self):
+        dealt = [bit for bit in range(len(CARD_CATALOG.names)) if bit % 7]
+        hands = deal_hands(dealt, 4, random.Random(7))
+        self.assertEqual(sum(hands), sum(1 << bit for bit in dealt))
+        self.assertEqual(sorted(bin(hand).count("1") for hand in hands), [4, 4, 5, 5])
+
+
+class DisproverIndexTests(SimpleTestCase):
+    def test_holder_index_matches_clockwise_scan(self):
+        # Deal 18 cards round-robin to 6 seats, leaving one of each type in the envelope
+        dealt = [name for name in CARD_CATALOG.names if name not in ("Mr. Green", "Rope", "Hall")]
+        hands = [CARD_CATALOG.mask(dealt[seat::6]) for seat in range(6)]
+        holders = build_holder_index(hands)
+
+        for suggester in range(6):
+            for suspect in SUSPECTS:
+                for weapon in WEAPONS:
+                    for room in ROOMS:
+                        suggested = CARD_CATALOG.mask((suspect, weapon, room))
+                        expected = next(
+                            (
+                                seat
+                                for seat in ((suggester + step) % 6 for step in range(1, 6))
+                                if hands[seat] & suggested
+                            ),
+                            NO_HOLDER,
+                        )
+                        indices = tuple(CARD_CATALOG.index[n] for n in (suspect, weapon, room))
+                        self.assertEqual(
+                            find_first_disprover(holders, suggester, 6, indices), expected
+                        )
+
+    def test_nearest_holder_clockwise_disproves(self):
+        hands = [0] * 5
+        hands[0] = CARD_CATALOG.bit("Rope")
+        hands[1] = CARD_CATALOG.bit("Hall")
+        hands[4] = CARD_CATALOG.bit("Mr. Green")
+        holders = build_holder_index(hands)
+        indices = tuple(CARD_CATALOG.index[name] for name in ("Mr. Green", "Rope", "Hall"))
+
+        # Seat 1 holds a suggested card but never disproves its own suggestion
+        for suggester, expected in ((0, 1), (1, 4), (2, 4), (3, 4), (4, 0)):
+            self.assertEqual(find_first_disprover(holders, suggester, 5, indices), expected, suggester)
+        self.assertEqual(
+            find_first_disprover(holders, 0, 5, (CARD_CATALOG.index["Rope"],)), NO_HOLDER
+        )
+
+
+class StateDeltaTests(TestCase):
+    def test_deltas_rebuild_the_published_state(self):
+        manager = create_manager("lobby_delta", SUSPECTS[:3])
+        first = manager.publish_state()
+        self.assertIsNone(first["changes"])
+        state, version = first["state"], first["version"]
+
+        entry = manager.get_current_player()
+        options = manager.move_player(entry["player_obj"].id)["options"]
+        manager.move_player(entry["player_obj"].id, options[0])
+        frame = manager.publish_state()
+
+        self.assertEqual(frame["version"], version + 1)
+        self.assertEqual(set(frame["changes"]["players_changed"]), {str(entry["player_obj"].id)})
+        self.assertEqual(apply_delta(state, frame["changes"]), manager.serialize_public_state())
+
+        unchanged = manager.publish_state()
+        self.assertEqual(unchanged["changes"], {})
+        self.assertEqual(unchanged["version"], frame["version"])
+
+
+class ViewerProjectionTests(TestCase):
+    def test_private_data_only_reaches_its_owner(self):
+        manager = create_manager("lobby_private", SUSPECTS[:3])
+        frame = manager.publish_state()
+        for player in frame["state"]["players"]:
+            self.assertNotIn("hand", player)
+            self.assertNotIn("known_cards", player)
+        self.assertEqual(
+            set(frame["private"]), {entry["player_obj"].id for entry in manager.players}
+        )
+
+        suggester, disprover = manager.players[0], manager.players[1]
+        card = CARD_CATALOG.names_of(disprover["hand"])[0]
+        manager.last_suggestion_result = {
+            "suspect": "Mr. Green",
+            "weapon": "Rope",
+            "room": "Hall",
+            "suggester": suggester["name"],
+            "card": card,
+            "disprover": disprover["name"],
+        }
+        frame = manager.publish_state()
+        self.assertNotIn("card", frame["state"]["last_suggestion"])
+        self.assertTrue(frame["state"]["last_suggestion"]["disproved"])
+        shown = {
+            player_id: payload["last_suggestion_card"]
+            for player_id, payload in frame["private"].items()
+        }
+        self.assertEqual(
+            shown,
+            {suggester["player_obj"].id: card, disprover["player_obj"].id: card},
+        )
+
+
+class StateCacheTests(TestCase):
+    def _rebuilt(self, manager):
+        manager._mark_dirty(*STATE_SECTIONS)
+        manager._mark_knowledge_dirty(*manager.players)
+        return (
+            manager.serialize_public_state(),
+            [manager.serialize_private_state(entry) for entry in manager.players],
+        )
+
+    def test_cached_state_matches_a_full_rebuild(self):
+        manager = create_manager("lobby_cache", SUSPECTS[:4])
+        rng = random.Random(3)
+        checked = 0
+
+        def check():
+            nonlocal checked
+            cached = (
+                manager.serialize_public_state(),
+                [manager.serialize_private_state(entry) for entry in manager.players],
+            )
+            self.assertEqual(cached, self._rebuilt(manager))
+            checked += 1
+
+        with mock.patch("game.game_engine.notifier.Notifier.broadcast"):
+            for _ in range(40):
+                if manager.is_over:
+                    break
+                play_turn(manager, rng, check)
+        self.assertGreater(checked, 40)
+
+    def test_repeated_calls_reuse_unchanged_sections(self):
+        manager = create_manager("lobby_cache_reuse", SUSPECTS[:3])
+        state = manager.serialize_public_state()
+        self.assertIs(manager.serialize_public_state(), state)
+
+        entry = manager.get_current_player()
+        private = manager.serialize_private_state(entry)
+        options = manager.move_player(entry["player_obj"].id)["options"]
+        manager.move_player(entry["player_obj"].id, options[0])
+        moved = manager.serialize_public_state()
+        self.assertIsNot(moved, state)
+        self.assertIsNot(moved["players"], state["players"])
+        self.assertIs(moved["last_suggestion"], state["last_suggestion"])
+        self.assertIs(manager.serialize_private_state(entry), private)
+
+
+class FrameEncodingTests(SimpleTestCase):
+    PAYLOAD = {
+        "type": "private_state",
+        "version": 3,
+        "private": {"revealed_by": {"Rope": "Mr. Green"}, "hand": ["Hall", "Mrs. Peacock"]},
+    }
+
+    def test_backends_encode_the_same_message(self):
+        for backend in JSON_BACKENDS:
+            with self.subTest(backend=backend), override_settings(GAME_JSON_BACKEND=backend):
+                self.assertEqual(json.loads(encode_frame(self.PAYLOAD)), self.PAYLOAD)
+
+    def test_frame_event_carries_text_for_forwarding(self):
+        event = frame_event(self.PAYLOAD)
+        self.assertEqual(event["type"], "forward_frame")
+        self.assertIsInstance(event["text"], str)
+        self.assertEqual(json.loads(event["text"]), self.PAYLOAD)
+
+    def test_unknown_backend_is_rejected(self):
+        with self.assertRaises(ValueError):
+            get_encoder("simplejson")
+
+
+class OutboxTests(TestCase):
+    def test_action_messages_are_collected_for_one_frame(self):
+        manager = create_manager("lobby_outbox", SUSPECTS[:3])
+        with mock.patch("game.game_engine.notifier.get_channel_layer") as get_layer:
+            with collect_messages() as outbox:
+                play_turn(manager, random.Random(1))
+            get_layer.assert_not_called()
+
+        messages = outbox.drain()
+        self.assertEqual(list(messages), ["game_outbox"])
+        frame = batch_payload(messages["game_outbox"])
+        self.assertEqual(frame["type"], "batch")
+        self.assertGreater(len(frame["messages"]), 1)
+        self.assertEqual(
+            {message["type"] for message in frame["messages"]}, {"game_message"}
+        )
+
+    def test_broadcasts_outside_an_action_are_sent_directly(self):
+        with mock.patch("game.game_engine.notifier.get_channel_layer") as get_layer:
+            get_layer.return_value.group_send = mock.AsyncMock()
+            with collect_messages():
+                pass
+            Notifier.broadcast("hello", room="lobby_direct")
+        get_layer.return_value.group_send.assert_awaited_once()
+
+
+@override_settings(
+    GAME_PERSISTENCE_DURABILITY=DURABILITY_PERIODIC,
+    GAME_PERSISTENCE_FLUSH_INTERVAL=3600,
+)
+class GameActorTests(TestCase):
+    def setUp(self):
+        self.manager = create_manager("lobby_actor", SUSPECTS[:3])
+        register_session("lobby_actor", self.manager)
+        self.addCleanup(remove_session, "lobby_actor")
+        entry = self.manager.get_current_player()
+        self.player_id = entry["player_obj"].id
+        self.destination = self.manager.move_player(self.player_id)["options"][0]
+
+    def test_commands_from_two_sockets_apply_in_order(self):
+        async def two_sockets():
+            actor = await get_actor("lobby_actor")
+            self.assertIs(await get_actor("lobby_actor"), actor)
+            move = {"player_id": self.player_id, "destination_name": self.destination}
+            results = await asyncio.gather(
+                actor.call("move_player", **move), actor.call("move_player", **move)
+            )
+            await stop_actor("lobby_actor")
+            return [result for result, _ in results]
+
+        first, second = asyncio.run(two_sockets())
+        self.assertTrue(first["success"])
+        self.assertEqual(second["error"], "Player has already moved this turn.")
+
+    def test_full_queue_rejects_commands(self):
+        async def flood():
+            actor = GameActor(self.manager, maxsize=1)
+            results = await asyncio.gather(
+                *(actor.call("publish_state") for _ in range(3))
+            )
+            await actor.stop()
+            return [result for result, _ in results]
+
+        results = asyncio.run(flood())
+        self.assertIn("version", results[0])
+        self.assertEqual(results[1:], [{"success": False, "error": BUSY_ERROR}] * 2)
+
+    @override_settings(GAME_HINTS_ENABLED=True, GAME_HINT_SAMPLES=200)
+    def test_hints_are_estimated_off_the_event_loop(self):
+        threads = []
+
+        def estimate(deduction, samples):
+            threads.append(threading.current_thread())
+            return [0.0] * len(CARD_CATALOG.names)
+
+        async def ask():
+            actor = GameActor(self.manager)
+            with mock.patch("game.game_engine.game_manager.estimate_envelope", estimate):
+                result = await actor.hint(self.player_id)
+            await actor.stop()
+            return result, threading.current_thread()
+
+        result, loop_thread = asyncio.run(ask())
+        self.assertTrue(result["success"])
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], loop_thread)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+    def test_histogram_buckets_and_quantiles(self):
+        histogram = metrics.Histogram((1, 2, 4))
+        for value in (0.5, 1, 1.5, 3, 10):
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [2, 1, 1, 1])
+        self.assertEqual(histogram.count, 5)
+        self.assertEqual(histogram.quantile(0.4), 1)
+        self.assertEqual(histogram.quantile(0.99), 4)
+
+    def test_actor_records_each_stage_of_an_action(self):
+        manager = create_manager("lobby_metrics", SUSPECTS[:3])
+        register_session("lobby_metrics", manager)
+        self.addCleanup(remove_session, "lobby_metrics")
+        player_id = manager.get_current_player()["player_obj"].id
+        destination = manager.move_player(player_id)["options"][0]
+
+        async def play():
+            actor = await get_actor("lobby_metrics")
+            await actor.call("move_player", player_id=player_id, destination_name=destination)
+            await actor.run(GameManager.publish_state)
+            await stop_actor("lobby_metrics")
+
+        asyncio.run(play())
+        PERSISTENCE_EXECUTOR.submit(lambda: None).result()
+        stats = metrics.snapshot()
+        for name in (
+            "game_action_queue_wait_seconds",
+            "game_action_execution_seconds",
+            "game_action_db_queries",
+            "game_persistence_queue_wait_seconds",
+            "game_persistence_db_queries",
+        ):
+            self.assertEqual(stats[name]["move_player"]["count"], 1, name)
+        # The hot path leaves the database to the persistence thread
+        self.assertEqual(stats["game_action_db_queries"]["move_player"]["sum"], 0)
+        self.assertGreaterEqual(stats["game_persistence_db_queries"]["move_player"]["sum"], 1)
+        self.assertEqual(stats["game_state_serialization_seconds"]["publish_state"]["count"], 1)
+
+    def test_prometheus_endpoint(self):
+        metrics.FANOUT.observe("end_turn", 0.003)
+        response = self.client.get("/api/metrics/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        body = response.content.decode()
+        self.assertIn("# TYPE game_fanout_seconds histogram", body)
+        self.assertIn('game_fanout_seconds_bucket{action="end_turn",le="0.0025"} 0', body)
+        self.assertIn('game_fanout_seconds_bucket{action="end_turn",le="+Inf"} 1', body)
+        self.assertIn('game_fanout_seconds_count{action="end_turn"} 1', body)
+        with override_settings(GAME_METRICS_ENABLED=False):
+            metrics.FANOUT.observe("end_turn", 0.003)
+            self.assertEqual(self.client.get("/api/metrics/").status_code, 404)
+        self.assertEqual(metrics.snapshot()["game_fanout_seconds"]["end_turn"]["count"], 1)
+
+
+class QueryAuditTests(TestCase):
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+    def test_endpoints_stay_within_query_budgets(self):
+        self.assertEqual(over_budget(measure_endpoints()), [])
+
+    def test_budget_flags_repeated_queries(self):
+        for name in SUSPECTS[:3]:
+            Card.objects.create(name=name, card_type="CHAR")
+        self.assertEqual(
+            query_shape('SELECT * FROM "card" WHERE "id" IN (%s, %s) AND "name" = \'Plum\' LIMIT 21'),
+            'SELECT * FROM "card" WHERE "id" IN (...) AND "name" = ? LIMIT ?',
+        )
+        with query_budget(1):
+            list(Card.objects.filter(name__in=SUSPECTS[:3]))
+        with self.assertRaisesMessage(QueryBudgetExceeded, "N+1"):
+            with query_budget(5):
+                for name in SUSPECTS[:3]:
+                    Card.objects.get(name=name)
+        with self.assertRaisesMessage(QueryBudgetExceeded, "over the budget of 2"):
+            with query_budget(2, allow_repeats=True):
+                for name in SUSPECTS[:3]:
+                    Card.objects.get(name=name)
+
+    def test_views_and_manager_methods_are_counted(self):
+        create_manager("lobby_audit")
+        self.client.get("/api/lobbies/")
+        stats = metrics.snapshot()
+        self.assertEqual(stats["game_view_db_queries"]["lobby-list"]["count"], 1)
+        self.assertGreater(stats["game_manager_db_queries"]["__init__"]["sum"], 0)
+
+
+class LobbyDirectoryTests(TestCase):
+    def setUp(self):
+        LOBBY_DIRECTORY.reset()
+        self.addCleanup(LOBBY_DIRECTORY.reset)
+
+    def post(self, path, data):
+        return self.client.post(path, data, content_type="application/json").json()
+
+    def test_lobby_changes_are_published_after_commit(self):
+        host, guest = (LobbyPlayer.objects.create().id for _ in range(2))
+        base = LOBBY_DIRECTORY.snapshot()["version"]
+        events = []
+        with mock.patch("game.game_engine.lobby_directory.publish", events.append), \
+                self.captureOnCommitCallbacks(execute=True):
+            lobby = self.post("/api/lobbies/create/", {"name": "pushed", "player_id": host})
+            self.post(f"/api/lobbies/{lobby['id']}/join/", {"player_id": guest})
+            self.post(
+                f"/api/lobbies/{lobby['id']}/select-character/",
+                {"player_id": guest, "character_name": SUSPECTS[2]},
+            )
+            self.post(f"/api/lobbies/{lobby['id']}/leave/", {"player_id": host})
+            self.post(f"/api/lobbies/{lobby['id']}/leave/", {"player_id": guest})
+            sweep()
+
+        self.assertEqual([event["version"] - base for event in events], [1, 2, 3, 4, 5, 6])
+        self.assertEqual([event["type"] for event in events], ["lobby_updated"] * 5 + ["lobby_removed"])
+        self.assertEqual(events[1]["lobby"]["player_count"], 2)
+        self.assertEqual(events[2]["lobby"]["players"][1]["character_name"], SUSPECTS[2])
+        self.assertEqual([event["lobby"]["player_count"] for event in events[3:5]], [1, 0])
+        snapshot = LOBBY_DIRECTORY.snapshot()
+        self.assertEqual((snapshot["version"] - base, snapshot["lobbies"]), (6, []))
+
+    def test_consumer_sends_the_list_then_changes(self):
+        lobby = Lobby.objects.create(name="listed")
+        LobbyPlayer.objects.create(lobby=lobby)
+        base = LOBBY_DIRECTORY.snapshot()["version"]
+
+        async def subscribe():
+            communicator = WebsocketCommunicator(LobbyConsumer.as_asgi(), "/ws/lobbies/")
+            await communicator.connect()
+            first = await communicator.receive_json_from()
+            player_id = first["lobbies"][0]["players"][0]["id"]
+            await apublish(LOBBY_DIRECTORY.remove_player(player_id))
+            updated = await communicator.receive_json_from()
+            await apublish(LOBBY_DIRECTORY.remove(lobby.id))
+            removed = await communicator.receive_json_from()
+            await communicator.send_json_to({"type": "get_lobbies"})
+            again = await communicator.receive_json_from()
+            await communicator.disconnect()
+            return first, updated, removed, again
+
+        first, updated, removed, again = asyncio.run(subscribe())
+        self.assertEqual([item["name"] for item in first["lobbies"]], ["listed"])
+        self.assertEqual(
+            (updated["type"], updated["version"], updated["lobby"]["players"]),
+            ("lobby_updated", base + 1, []),
+        )
+        self.assertEqual(removed, {"type": "lobby_removed", "lobby_id": lobby.id, "version": base + 2})
+        self.assertEqual((again["version"], again["lobbies"]), (base + 2, []))
+
+
+class HousekeepingTests(TestCase):
+    def setUp(self):
+        LOBBY_DIRECTORY.reset()
+        self.addCleanup(LOBBY_DIRECTORY.reset)
+
+    @override_settings(GAME_LOBBY_PLAYER_TTL=3600)
+    def test_sweep_closes_empty_lobbies_and_purges_orphans(self):
+        people = Lobby.objects.create(name="people")
+        LobbyPlayer.objects.create(lobby=people)
+        LobbyPlayer.objects.create(lobby=people, bot_kind=BOT_DEDUCER)
+        bots_only = Lobby.objects.create(name="bots-only")
+        LobbyPlayer.objects.create(lobby=bots_only, bot_kind=BOT_DEDUCER)
+        empty = Lobby.objects.create(name="empty")
+        LobbyPlayer.objects.create(bot_kind=BOT_DEDUCER)
+        idle = LobbyPlayer.objects.create()
+        LobbyPlayer.objects.filter(pk=idle.pk).update(created_at=timezone.now() - timedelta(hours=2))
+        fresh = LobbyPlayer.objects.create()
+        LOBBY_DIRECTORY.snapshot()
+
+        with mock.patch("game.game_engine.housekeeping.publish_on_commit") as publish, \
+                query_budget(4):
+            result = sweep()
+        self.assertEqual(result, {"lobbies_closed": 2, "players_purged": 3})
+        self.assertEqual(
+            sorted(call.args for call in publish.call_args_list),
+            sorted([("remove", bots_only.id), ("remove", empty.id)]),
+        )
+        self.assertEqual(list(Lobby.objects.filter(is_active=True)), [people])
+        self.assertEqual(
+            set(LobbyPlayer.objects.filter(lobby=None).values_list("id", flat=True)), {fresh.id}
+        )
+        self.assertEqual(LobbyPlayer.objects.filter(lobby=people).count(), 2)
+
+    def test_list_lobbies_is_one_read_plus_its_players(self):
+        for index in range(3):
+            create_lobby_players(3, f"listed-{index}")
+        with query_budget(2):
+            lobbies = self.client.get("/api/lobbies/").json()["lobbies"]
+        self.assertEqual([lobby["player_count"] for lobby in lobbies], [3, 3, 3])
+        self.assertEqual(lobbies[0]["players"][2]["character_name"], SUSPECTS[2])
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        LOBBY_DIRECTORY.reset()
+        self.addCleanup(LOBBY_DIRECTORY.reset)
+
+    def assertNotModified(self, path, etag):
+        with self.assertNumQueries(0):
+            response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.content), (304, b""))
+
+    def test_lobby_endpoints_answer_304_until_the_lobby_changes(self):
+        host, guest = (LobbyPlayer.objects.create().id for _ in range(2))
+        with self.captureOnCommitCallbacks(execute=True):
+            lobby = self.client.post(
+                "/api/lobbies/create/", {"name": "tagged", "player_id": host}, content_type="application/json"
+            ).json()
+        paths = (f"/api/lobbies/{lobby['id']}/", "/api/lobbies/", f"/api/player/{host}/lobby/")
+        etags = [self.client.get(path)["ETag"] for path in paths]
+        for path, etag in zip(paths, etags):
+            self.assertNotModified(path, etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                f"/api/lobbies/{lobby['id']}/join/", {"player_id": guest}, content_type="application/json"
+            )
+        for path, etag in zip(paths, etags):
+            response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(self.client.get(paths[0]).json()["player_count"], 2)
+
+    def test_game_state_etag_moves_once_an_action_is_written(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            manager = create_manager("lobby_tagged")
+        path = "/api/games/state/?game_name=lobby_tagged"
+        etag = self.client.get(path)["ETag"]
+        self.assertNotModified(path, etag)
+
+        player_id = manager.get_current_player()["player_obj"].id
+        options = manager.move_player(player_id)["options"]
+        with self.captureOnCommitCallbacks(execute=True):
+            manager.move_player(player_id, options[0])
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertNotModified(path, response["ETag"])
+
+
+class WriterTests(TestCase):
+    def test_queued_writes_are_batched_in_order(self):
+        writer = WriterQueue(name="test-writer")
+        self.addCleanup(writer.shutdown)
+        started, release = threading.Event(), threading.Event()
+        done = []
+
+        def blocker():
+            started.set()
+            release.wait(5)
+
+        def fail():
+            raise ValueError("rolled back alone")
+
+        with mock.patch("game.game_engine.writer.active", return_value=True):
+            writer.submit(blocker)
+            started.wait(5)
+            futures = [writer.submit(done.append, index) for index in range(3)]
+            failed = writer.submit(fail)
+            alone = writer.submit_alone(done.append, "alone")
+            last = writer.submit(done.append, "last")
+            release.set()
+            last.result(5)
+            writer.submit(connections.close_all).result(5)
+
+        self.assertEqual(done, [0, 1, 2, "alone", "last"])
+        self.assertTrue(all(future.exception() is None for future in futures + [alone]))
+        self.assertIsInstance(failed.exception(), ValueError)
+        # The blocker, then the three appends and the failure together, then one each
+        self.assertEqual(writer.stats, {"jobs": 8, "batches": 5})
+
+    def test_file_connections_open_in_wal(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        wrapper = DatabaseWrapper(
+            {**connection.settings_dict, "NAME": f"{directory.name}/wal.sqlite3"}, alias="wal"
+        )
+        try:
+            with wrapper.cursor() as cursor:
+                cursor.execute("PRAGMA journal_mode")
+                journal_mode = cursor.fetchone()[0]
+                cursor.execute("PRAGMA synchronous")
+                synchronous = cursor.fetchone()[0]
+        finally:
+            wrapper.close()
+        self.assertEqual((journal_mode, synchronous), ("wal", 1))
+
+
+class SessionEvictionTests(TestCase):
+    def setUp(self):
+        checkpoints = tempfile.TemporaryDirectory()
+        self.addCleanup(checkpoints.cleanup)
+        override = override_settings(
+            GAME_CHECKPOINT_DIR=checkpoints.name, GAME_SESSION_IDLE_TTL=60
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        # Checkpoint files are written on the executor; finish them in this directory
+        self.addCleanup(lambda: FILE_EXECUTOR.submit(lambda: None).result())
+
+    def _register(self, name):
+        manager = create_manager(name)
+        register_session(name, manager)
+        self.addCleanup(remove_session, name)
+        return manager
+
+    def test_idle_game_is_checkpointed_and_rehydrated(self):
+        manager = self._register("lobby_idle")
+        entry = manager.get_current_player()
+        options = manager.move_player(entry["player_obj"].id)["options"]
+        manager.move_player(entry["player_obj"].id, options[0])
+        before = session_stats()
+
+        self.assertEqual(evict_idle(now=time.monotonic() + 61), 1)
+        self.assertNotIn("lobby_idle", list_sessions())
+
+        restored = get_session("lobby_idle")
+        self.assertIsNot(restored, manager)
+        self.assertEqual(restored.serialize_state(), manager.serialize_state())
+        self.assertIs(get_session("lobby_idle"), restored)
+        self.assertIsNone(get_session("lobby_never_started"))
+
+        after = session_stats()
+        self.assertEqual(after["evictions"] - before["evictions"], 1)
+        self.assertEqual(after["rehydrations"] - before["rehydrations"], 1)
+        self.assertEqual(after["hits"] - before["hits"], 1)
+        self.assertEqual(after["misses"] - before["misses"], 1)
+
+    def test_session_budget_evicts_least_recently_used(self):
+        with override_settings(GAME_SESSION_MAX_SESSIONS=2):
+            self._register("lobby_lru_a")
+            self._register("lobby_lru_b")
+            get_session("lobby_lru_a")
+            self._register("lobby_lru_c")
+            self.assertEqual(set(list_sessions()), {"lobby_lru_a", "lobby_lru_c"})
+
+            self.assertIsNotNone(get_session("lobby_lru_b"))
+            self.assertEqual(set(list_sessions()), {"lobby_lru_b", "lobby_lru_c"})
+
+    def test_checkpoints_are_written_on_the_executor(self):
+        manager = self._register("lobby_queued")
+        started, release = threading.Event(), threading.Event()
+        FILE_EXECUTOR.submit(lambda: (started.set(), release.wait(5)))
+        started.wait(5)
+        try:
+            evict_idle(now=time.monotonic() + 61)
+            self.assertIsNone(load_checkpoint("lobby_queued"))
+            # Still rehydrated from the checkpoint waiting to be written
+            restored = get_session("lobby_queued")
+            self.assertEqual(restored.serialize_state(), manager.serialize_state())
+        finally:
+            release.set()
+        FILE_EXECUTOR.submit(lambda: None).result()
+        self.assertIsNotNone(load_checkpoint("lobby_queued"))
+
+    def test_actor_rehydrates_on_a_worker_thread(self):
+        self._register("lobby_cold")
+        evict_idle(now=time.monotonic() + 61)
+        threads = []
+
+        def load(data):
+            threads.append(threading.current_thread())
+            return load_manager(data)
+
+        async def open_actor():
+            with mock.patch("game.game_engine.session_registry.load_manager", load):
+                actor = await get_actor("lobby_cold")
+            await stop_actor("lobby_cold")
+            return actor, threading.current_thread()
+
+        actor, loop_thread = asyncio.run(open_actor())
+        self.assertIsNotNone(actor)
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], loop_thread)
+
+    def test_actor_applies_queued_commands_before_eviction(self):
+        manager = self._register("lobby_busy")
+        player_id = manager.get_current_player()["player_obj"].id
+        destination = manager.move_player(player_id)["options"][0]
+
+        async def evict_while_queued():
+            actor = await get_actor("lobby_busy")
+            move = asyncio.ensure_future(
+                actor.call("move_player", player_id=player_id, destination_name=destination)
+            )
+            await asyncio.sleep(0)
+            self.assertFalse(actor.queue.empty())
+            evict_idle(now=time.monotonic() + 61)
+            # The actor evicts the game itself, after the queued move
+            self.assertIn("lobby_busy", list_sessions())
+            result, _ = await move
+            await asyncio.wait_for(actor._task, timeout=5)
+            late, _ = await actor.call("end_turn", player_id=player_id)
+            return result, late
+
+        result, late = asyncio.run(evict_while_queued())
+        self.assertTrue(result["success"])
+        self.assertEqual(late["error"], BUSY_ERROR)
+        self.assertNotIn("lobby_busy", list_sessions())
+        restored = get_session("lobby_busy")
+        self.assertIsNot(restored, manager)
+        self.assertEqual(restored.serialize_state(), manager.serialize_state())
+        self.assertTrue(restored.turn_state["has_moved"])
+
+    def test_removed_game_is_not_rehydrated(self):
+        self._register("lobby_removed")
+        evict_idle(now=time.monotonic() + 61)
+        remove_session("lobby_removed")
+        self.assertIsNone(get_session("lobby_removed"))
+
+
+class GameResetTests(TestCase):
+    def test_reset_deals_the_lobby_game_again(self):
+        lobby = Lobby.objects.create(name="reset lobby")
+        for name in SUSPECTS[:3]:
+            card, _ = Card.objects.get_or_create(name=name, defaults={"card_type": "CHAR"})
+            LobbyPlayer.objects.create(lobby=lobby, character_card=card)
+        game_name = f"lobby_{lobby.id}"
+        self.addCleanup(remove_session, game_name)
+        self.assertEqual(self.client.post(f"/api/lobbies/{lobby.id}/start/").status_code, 200)
+        first = get_session(game_name)
+        first.move_player(first.get_current_player()["player_obj"].id)
+
+        # The body App.jsx resetGame sends
+        response = self.client.post(
+            "/api/games/reset/",
+            data=json.dumps({"game_name": f"lobby_{lobby.id}"}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["players"], SUSPECTS[:3])
+        second = get_session(game_name)
+        self.assertIsNot(second, first)
+        self.assertFalse(second.turn_state["has_moved"])
+        self.assertEqual(Game.objects.filter(name=game_name).count(), 1)
+
+        for name, code in (("default", 400), ("lobby_999999", 404), ("lobby_x", 400)):
+            response = self.client.post(
+                "/api/games/reset/", {"game_name": name}, content_type="application/json"
+            )
+            self.assertEqual(response.status_code, code, name)
+
+
+class IdentifyTests(TransactionTestCase):
+    def _identify(self, lobby_id, player_id, token):
+        async def run():
+            communicator = WebsocketCommunicator(
+                URLRouter(websocket_urlpatterns), f"/ws/game/{lobby_id}/"
+            )
+            await communicator.connect()
+            await communicator.receive_json_from()
+            await communicator.send_json_to(
+                {"type": "identify", "player_id": player_id, "token": token}
+            )
+            frames = []
+            while not await communicator.receive_nothing(timeout=0.2):
+                frames.append(await communicator.receive_json_from())
+            await communicator.disconnect()
+            return frames
+
+        return asyncio.run(run())
+
+    def test_socket_cannot_identify_as_another_players_seat(self):
+        lobby = Lobby.objects.create(name="identify lobby")
+        lobby_players = []
+        for name in SUSPECTS[:2]:
+            card, _ = Card.objects.get_or_create(name=name, defaults={"card_type": "CHAR"})
+            lobby_players.append(LobbyPlayer.objects.create(lobby=lobby, character_card=card))
+        game_name = f"lobby_{lobby.id}"
+        self.addCleanup(remove_session, game_name)
+        self.assertEqual(self.client.post(f"/api/lobbies/{lobby.id}/start/").status_code, 200)
+        manager = get_session(game_name)
+        mine, theirs = (entry["player_obj"].id for entry in manager.players)
+        my_token = issue_player_token(lobby_players[0].id)
+
+        own = self._identify(lobby.id, mine, my_token)
+        self.assertIn("private_state", [frame["type"] for frame in own])
+
+        for token in (my_token, None, "forged"):
+            frames = self._identify(lobby.id, theirs, token)
+            self.assertEqual([frame["type"] for frame in frames], ["error"], token)
+
+
+class SnapshotTests(TestCase):
+    def _played(self, name, turns):
+        manager = create_manager(name, SUSPECTS[:4])
+        rng = random.Random(11)
+        with mock.patch("game.game_engine.notifier.Notifier.broadcast"):
+            for _ in range(turns):
+                play_turn(manager, rng)
+            # Play on until a suggestion is left waiting on its disprover
+            while not manager.pending_disproof.get("disprover_id"):
+                turn = turn_actions(manager, rng)
+                action, kwargs = next(turn)
+                while action != "choose_disproving_card":
+                    result = getattr(manager, action)(**kwargs)
+                    try:
+                        action, kwargs = turn.send(result)
+                    except StopIteration:
+                        break
+        return manager
+
+    def _private(self, manager):
+        return [manager.serialize_private_state(entry) for entry in manager.players]
+
+    def test_restore_rebuilds_the_game_without_queries(self):
+        manager = self._played("lobby_snapshot", 12)
+        data = dump_manager(manager)
+        with self.assertNumQueries(0):
+            restored = load_manager(data)
+
+        self.assertEqual(restored.serialize_state(), manager.serialize_state())
+        self.assertEqual(self._private(restored), self._private(manager))
+        self.assertEqual(restored.pending_disproof, manager.pending_disproof)
+        self.assertEqual(restored.solution, manager.solution)
+        self.assertEqual(restored.occupancy.mask, manager.occupancy.mask)
+        self.assertEqual(restored.state_version, manager.state_version)
+        self.assertEqual(dump_manager(restored), data)
+
+    def test_restored_game_plays_on_like_the_original(self):
+        manager = self._played("lobby_snapshot_play", 6)
+        disproof = manager.pending_disproof
+        restored = load_manager(dump_manager(manager))
+        for game in (manager, restored):
+            game.choose_disproving_card(disproof["disprover_id"], disproof["matching_cards"][0])
+            rng = random.Random(5)
+            with mock.patch("game.game_engine.notifier.Notifier.broadcast"):
+                for _ in range(8):
+                    if not game.is_over:
+                        play_turn(game, rng)
+        self.assertEqual(restored.serialize_state(), manager.serialize_state())
+
+        restored.persistence.flush()
+        for entry in restored.players:
+            stored = Player.objects.get(pk=entry["player_obj"].pk)
+            self.assertEqual(stored.current_room_id, entry["player_obj"].current_room_id)
+            self.assertEqual(stored.current_hallway_id, entry["player_obj"].current_hallway_id)
+
+    def test_unknown_snapshot_version_is_rejected(self):
+        snapshot = create_manager("lobby_snapshot_version").to_snapshot()
+        snapshot["v"] = 0
+        with self.assertRaises(ValueError):
+            GameManager.from_snapshot(snapshot)
+
+
+class EventLogTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        override = override_settings(GAME_EVENT_LOG_DIR=directory.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def _play(self, manager, turns, seed=3):
+        rng = random.Random(seed)
+        with mock.patch("game.game_engine.notifier.Notifier.broadcast"):
+            for _ in range(turns):
+                if not manager.is_over:
+                    play_turn(manager, rng)
+
+    def _private(self, manager):
+        return [manager.serialize_private_state(entry) for entry in manager.players]
+
+    def test_replay_rebuilds_the_game_without_the_database(self):
+        manager = create_manager("lobby_replay", SUSPECTS[:5])
+        self._play(manager, 40)
+        start, events = read_log(manager.events.path)
+        self.assertGreater(len(events), 40)
+
+        with self.assertNumQueries(0):
+            replayed = replay(start, events)
+        self.assertEqual(replayed.serialize_state(), manager.serialize_state())
+        self.assertEqual(self._private(replayed), self._private(manager))
+        self.assertEqual(replayed.occupancy.mask, manager.occupancy.mask)
+
+        opening = replay_log(manager.events.path, until=0).to_snapshot()
+        self.assertEqual(opening["players"], start["players"])
+        self.assertEqual(opening["turn"], start["turn"])
+
+    def test_removing_the_session_deletes_the_log(self):
+        manager = create_manager("lobby_log_removed", SUSPECTS[:3])
+        register_session("lobby_log_removed", manager)
+        self.assertTrue(manager.events.path.exists())
+        remove_session("lobby_log_removed")
+        self.assertFalse(manager.events.path.exists())
+
+    def test_checkpoint_catches_up_from_the_log(self):
+        manager = create_manager("lobby_replay_crash", SUSPECTS[:4])
+        self._play(manager, 5)
+        stale = dump_manager(manager)
+        self._play(manager, 10, seed=8)
+        # A write cut short by a crash
+        with open(manager.events.path, "ab") as handle:
+            handle.write(b"[4,")
+
+        restored = load_manager(stale)
+        self.assertEqual(restored.serialize_state(), manager.serialize_state())
+        self.assertEqual(self._private(restored), self._private(manager))
+        self.assertEqual(restored.events.size, manager.events.size)
+        self.assertEqual(manager.events.path.stat().st_size, manager.events.size)
+
+
+class SimulationTests(TestCase):
+    def test_seeded_runs_are_reproducible(self):
+        with self.assertNumQueries(0):
+            summary = simulate_games(200, seed=4)
+        self.assertEqual(summary, simulate_games(200, seed=4))
+        self.assertEqual(summary["completed"], 200)
+        self.assertEqual(summary["wrong_accusations"], 0)
+        self.assertEqual(sum(summary["wins_by_seat"].values()), 200)
+        self.assertEqual(simulate_game(seed=4 + 7), simulate_game(seed=4 + 7))
+
+    def test_moves_follow_the_game_manager_rules(self):
+        manager = create_manager("lobby_simulation_rules", SUSPECTS[:4])
+        game = SimulatedGame(4, seed=1)
+        rng = random.Random(2)
+        with mock.patch("game.game_engine.notifier.Notifier.broadcast"):
+            for _ in range(30):
+                game.nodes = [BOARD_GRAPH.node_id(entry["location"].name) for entry in manager.players]
+                game.occupied = manager.occupancy.mask
+                game.arrived_via_suggestion = [
+                    entry["arrived_via_suggestion"] for entry in manager.players
+                ]
+                seat = manager.current_index
+                expected = [
+                    BOARD_GRAPH.node_id(option["target"].name)
+                    for option in manager.get_available_moves(manager.players[seat])
+                ]
+                self.assertEqual(sorted(game.available_moves(seat)), sorted(expected))
+                play_turn(manager, rng)
+
+    def test_simulate_endpoint(self):
+        response = self.client.post(
+            "/api/games/simulate/", {"rounds": 50, "seed": 3}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), json.loads(json.dumps(simulate_game(50, seed=3))))
+
+        response = self.client.post(
+            "/api/games/simulate/",
+            {"games": 20, "players": 3, "bots": "random"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["games"], 20)
+
+        for data in ({"players": 9}, {"bots": "psychic"}, {"games": "many"}, {"games": 0}):
+            response = self.client.post("/api/games/simulate/", data, content_type="application/json")
+            self.assertEqual(response.status_code, 400, data)
+
+
+class BatchSimulationTests(TestCase):
+    def test_sharded_batch_matches_a_serial_run(self):
+        serial = simulate_games(300, seed=9, bots=["deducer", "random", "deducer"], player_count=3)
+        batch = run_batch(
+            300,
+            seed=9,
+            workers=2,
+            shard_size=40,
+            bots=["deducer", "random", "deducer"],
+            player_count=3,
+        )
+        for key, value in serial.items():
+            self.assertEqual(batch[key], value, key)
+        self.assertEqual(sum(batch["win_rate_by_seat"].values()), batch["completed"] / 300)
+
+    def test_partial_results_are_streamed(self):
+        updates = list(iter_batch(250, seed=1, workers=1, shard_size=100))
+        self.assertEqual([update["games"] for update in updates], [100, 200, 250])
+        self.assertEqual([update["done"] for update in updates], [False, False, True])
+        with self.assertRaises(ValueError):
+            iter_batch(10, bots="psychic")
+
+    def test_batch_endpoint_streams_json_lines(self):
+        response = self.client.post(
+            "/api/games/simulate/batch/",
+            {"games": 120, "seed": 2, "players": 4},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        # Async content, so ASGI servers send each shard's line as it finishes
+        self.assertTrue(response.is_async)
+
+        async def read(content):
+            return [json.loads(part) async for part in content]
+
+        lines = async_to_sync(read)(response.streaming_content)
+        self.assertGreater(len(lines), 1)
+        self.assertFalse(lines[0]["done"])
+        self.assertTrue(lines[-1]["done"])
+        self.assertEqual(lines[-1]["games"], 120)
+        serial = simulate_games(120, seed=2, player_count=4)
+        self.assertEqual(lines[-1]["completed"], serial["completed"])
+
+        response = self.client.post(
+            "/api/games/simulate/batch/", {"players": 1}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+def random_suggestions(rng, player_count, count):
+    """A random deal and ``count`` random suggestions with their public outcome."""
+    solution = (
+        rng.randrange(6),
+        rng.randrange(6, 12),
+        rng.randrange(12, len(CARD_CATALOG.names)),
+    )
+    hands = deal_hands(
+        [card for card in range(len(CARD_CATALOG.names)) if card not in solution], player_count, rng
+    )
+    holders = build_holder_index(hands)
+    suggestions = []
+    for _ in range(count):
+        suggester = rng.randrange(player_count)
+        cards = (rng.randrange(6), rng.randrange(6, 12), rng.randrange(12, len(CARD_CATALOG.names)))
+        disprover = find_first_disprover(holders, suggester, player_count, cards)
+        shown = None
+        if disprover != NO_HOLDER:
+            shown = rng.choice([card for card in cards if hands[disprover] >> card & 1])
+        mask = sum(1 << card for card in set(cards))
+        suggestions.append((suggester, mask, None if disprover == NO_HOLDER else disprover, shown))
+    return solution, hands, suggestions
+
+
+class DeductionTests(TestCase):
+    def test_deductions_are_sound_and_tighter_than_known_cards(self):
+        rng = random.Random(17)
+        tighter = 0
+        for _ in range(60):
+            count = rng.randint(3, 6)
+            solution, hands, suggestions = random_suggestions(rng, count, 40)
+            envelope = sum(1 << card for card in solution)
+            players = [Deduction(seat, hands) for seat in range(count)]
+            known = list(hands)
+            for suggester, mask, disprover, shown in suggestions:
+                for deduction in players:
+                    deduction.observe_suggestion(suggester, mask, disprover)
+                if shown is not None:
+                    players[suggester].observe_card(disprover, shown)
+                    known[suggester] |= 1 << shown
+                for seat, deduction in enumerate(players):
+                    self.assertEqual(deduction.candidates & envelope, envelope)
+                    self.assertEqual(deduction.envelope & ~envelope, 0)
+                    self.assertEqual(deduction.candidates & known[seat], 0)
+                    for other, hand in enumerate(hands):
+                        self.assertEqual(deduction.has[other] & ~hand, 0)
+                        self.assertEqual(deduction.lacks[other] & hand, 0)
+                    tighter += deduction.candidates != CARD_CATALOG.all_mask & ~known[seat]
+        self.assertGreater(tighter, 0)
+
+    def test_game_players_see_tightened_candidates(self):
+        # The deal uses the module-level random; fix it so the game is the same every run
+        random.seed(6)
+        manager = create_manager("lobby_deduction", SUSPECTS[:4])
+        rng = random.Random(6)
+        with mock.patch("game.game_engine.notifier.Notifier.broadcast"):
+            for _ in range(24):
+                play_turn(manager, rng)
+        solution = set(manager.solution.values())
+        tighter = 0
+        for entry in manager.players:
+            possible = manager.serialize_private_state(entry)["possible_solution_cards"]
+            names = set(possible["suspects"] + possible["weapons"] + possible["rooms"])
+            self.assertLessEqual(solution, names)
+            self.assertFalse(names & set(CARD_CATALOG.names_of(entry["known_cards"])))
+            tighter += len(names) < len(CARD_CATALOG.names) - entry["known_cards"].bit_count()
+        self.assertGreater(tighter, 0)
+
+
+class EstimatorTests(TestCase):
+    def test_estimates_agree_with_deductions(self):
+        rng = random.Random(23)
+        categories = (CARD_CATALOG.suspects_mask, CARD_CATALOG.weapons_mask, CARD_CATALOG.rooms_mask)
+        for count in (3, 4, 6):
+            solution, hands, suggestions = random_suggestions(rng, count, 15)
+            deduction = Deduction(0, hands)
+            # Before any suggestion every candidate of a category is as likely
+            for card, odds in enumerate(estimate_envelope(deduction, 4000, seed=1)):
+                self.assertAlmostEqual(odds, uniform_estimate(deduction)[card], delta=0.05)
+            for suggester, mask, disprover, shown in suggestions:
+                deduction.observe_suggestion(suggester, mask, disprover)
+                if suggester == 0 and shown is not None:
+                    deduction.observe_card(disprover, shown)
+            odds = estimate_envelope(deduction, 500, seed=2)
+            for card, probability in enumerate(odds):
+                if not deduction.candidates >> card & 1:
+                    self.assertEqual(probability, 0.0)
+                if deduction.envelope >> card & 1:
+                    self.assertEqual(probability, 1.0)
+            for mask in categories:
+                total = sum(odds[card] for card in range(len(odds)) if mask >> card & 1)
+                self.assertAlmostEqual(total, 1.0)
+
+    def test_estimator_bots_play_reproducible_games(self):
+        bots = ["estimator", "deducer", "estimator", "random"]
+        first = simulate_game(seed=8, player_count=4, bots=bots)
+        self.assertEqual(first, simulate_game(seed=8, player_count=4, bots=bots))
+        self.assertTrue(first["completed"])
+
+    def test_hints_follow_setting(self):
+        manager = create_manager("lobby_hints", SUSPECTS[:3])
+        entry = manager.players[0]
+        player_id = entry["player_obj"].id
+        self.assertFalse(manager.get_hint(player_id)["success"])
+        with override_settings(GAME_HINTS_ENABLED=True, GAME_HINT_SAMPLES=200):
+            result = manager.get_hint(player_id)
+        self.assertTrue(result["success"])
+        odds = result["probabilities"]
+        self.assertEqual(
+            sum(map(len, odds.values())), len(SUSPECTS) + len(WEAPONS) + len(ROOMS)
+        )
+        for card in CARD_CATALOG.names_of(entry["hand"]):
+            self.assertEqual(next(o[card] for o in odds.values() if card in o), 0.0)
+
+
+class BotPlayerTests(TestCase):
+    def _bot_manager(self, name, kinds):
+        manager = create_manager(name, SUSPECTS[: len(kinds)])
+        for entry, kind in zip(manager.players, kinds):
+            entry["bot"] = kind
+        return manager
+
+    @override_settings(GAME_BOT_ESTIMATOR_SAMPLES=200)
+    def test_bots_finish_a_game_with_legal_actions(self):
+        manager = self._bot_manager("lobby_bots", ["deducer", "estimator", "random"])
+        with mock.patch("game.game_engine.notifier.Notifier.broadcast"):
+            for _ in range(3000):
+                view = next_bot_step(manager)
+                if view is None:
+                    break
+                action, kwargs = decide(view)
+                result = getattr(manager, action)(**kwargs)
+                self.assertTrue(result["success"], (action, result))
+        self.assertTrue(manager.is_over)
+
+    def test_bots_wait_for_people(self):
+        manager = self._bot_manager("lobby_bot_waits", [None, "deducer"])
+        manager.players[manager.current_index]["bot"] = None
+        self.assertIsNone(next_bot_step(manager))
+
+    @override_settings(
+        GAME_BOT_DELAY=0,
+        GAME_PERSISTENCE_DURABILITY=DURABILITY_PERIODIC,
+        GAME_PERSISTENCE_FLUSH_INTERVAL=3600,
+    )
+    def test_actor_plays_bot_turns_until_the_game_ends(self):
+        manager = self._bot_manager("lobby_bot_actor", ["deducer"] * 3)
+        register_session("lobby_bot_actor", manager)
+        self.addCleanup(remove_session, "lobby_bot_actor")
+
+        async def play():
+            with mock.patch("game.game_engine.actor.remove_session") as removed:
+                actor = await get_actor("lobby_bot_actor")
+                # The actor stops itself once a bot ends the game
+                await asyncio.wait_for(actor._task, timeout=60)
+            removed.assert_called_once_with("lobby_bot_actor")
+            return actor
+
+        actor = asyncio.run(play())
+        self.assertTrue(manager.is_over)
+        self.assertGreater(len(actor.bot_latencies), 0)
+
+    def test_lobby_bot_seats(self):
+        lobby = Lobby.objects.create(name="bot lobby")
+        add = f"/api/lobbies/{lobby.id}/bots/add/"
+        response = self.client.post(add, {"bot_kind": "estimator"}, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        bot = response.json()["players"][0]
+        self.assertEqual((bot["bot_kind"], bot["character_name"]), ("estimator", SUSPECTS[0]))
+        self.client.post(add, {}, content_type="application/json")
+        self.assertEqual(
+            self.client.post(add, {"bot_kind": "genius"}, content_type="application/json").status_code,
+            400,
+        )
+
+        response = self.client.post(f"/api/lobbies/{lobby.id}/start/")
+        self.assertEqual(response.json()["error"], "Game requires at least one human player")
+
+        response = self.client.post(
+            f"/api/lobbies/{lobby.id}/bots/remove/",
+            {"player_id": bot["id"]},
+            content_type="application/json",
+        )
+        self.assertEqual([p["bot_kind"] for p in response.json()["players"]], ["deducer"])
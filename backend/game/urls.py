@@ -7,7 +7,9 @@ urlpatterns = [
     path('games/<int:pk>/', views.GameRetrieveUpdateDeleteView.as_view(), name='game-detail'),
     path('games/reset/', views.GameResetView.as_view(), name='game-reset'),
     path('games/simulate/', views.GameSimulationView.as_view(), name='game-simulate'),
+    path('games/simulate/batch/', views.GameBatchSimulationView.as_view(), name='game-simulate-batch'),
     path('games/state/', views.GameStateView.as_view(), name='game-state'),
+    path('metrics/', views.game_metrics, name='game-metrics'),
 
     # Player endpoints
     path('players/', views.PlayerListCreateView.as_view(), name='player-list'),
@@ -20,6 +22,8 @@ urlpatterns = [
     path('lobbies/<int:lobby_id>/join/', views.join_lobby, name='lobby-join'),
     path('lobbies/<int:lobby_id>/leave/', views.leave_lobby, name='lobby-leave'),
     path('lobbies/<int:lobby_id>/select-character/', views.select_character, name='lobby-select-character'),
+    path('lobbies/<int:lobby_id>/bots/add/', views.add_bot, name='lobby-add-bot'),
+    path('lobbies/<int:lobby_id>/bots/remove/', views.remove_bot, name='lobby-remove-bot'),
     path('lobbies/<int:lobby_id>/start/', views.start_game, name='lobby-start-game'),
     path('lobbies/<int:lobby_id>/return-to-character-select/', views.return_to_character_select, name='lobby-return-to-character-select'),
     
@@ -1,22 +1,37 @@
-import time
+import json
 
 from rest_framework import generics, status
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.db import transaction, OperationalError
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Prefetch
+from django.utils.decorators import method_decorator
 from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
+from asgiref.sync import async_to_sync, sync_to_async
 
-from .models import Game, Player, Hallway, Solution
+from .models import Card, Game, Player, Solution
 from .models.lobby import Lobby
 from .models.lobby_player import LobbyPlayer
 from .serializers import GameSerializer, PlayerSerializer, LobbySerializer
+from game.game_engine.bots import BOT_DEDUCER, BOT_KINDS
+from game.game_engine.constants import SUSPECTS
+from game.game_engine.etags import GAME_VERSIONS, bump_on_commit, etag_condition
+from game.game_engine.frames import frame_event
 from game.game_engine.game_manager import GameManager
+from game.game_engine.lobby_directory import LOBBY_DIRECTORY, publish_on_commit
+from game.game_engine.metrics import PROMETHEUS_CONTENT_TYPE, render_prometheus
+from game.game_engine.notifier import collect_messages
+from game.game_engine.player_tokens import issue_player_token
 from game.game_engine.session_registry import register_session, remove_session
+from game.game_engine.simulation import MAX_PLAYERS, simulate_game, simulate_games
+from game.game_engine.simulation_pool import iter_batch
+from game.game_engine.writer import WRITER, serialized_write
 
 from rest_framework.decorators import api_view
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
 from .models import Lobby
 from .serializers import LobbySerializer
 
@@ -25,6 +40,7 @@ from .serializers import LobbySerializer
 # ---------------------------
 
 @api_view(['POST'])
+@serialized_write
 def create_player(request):
     try:
         with transaction.atomic():
@@ -45,12 +61,8 @@ def create_player(request):
                         # Remove player from the lobby
                         old_player.lobby = None
                         old_player.save()
-                        
-                        # Check if the lobby is now empty
-                        if old_lobby.lobby_players.count() == 0:
-                            print(f"Lobby {old_lobby.id} is now empty, deactivating")
-                            old_lobby.is_active = False
-                            old_lobby.save()
+                        publish_on_commit("remove_player", old_player.id)
+                        # A lobby left empty is closed by housekeeping
                             
                 except LobbyPlayer.DoesNotExist:
                     print(f"Old player with ID {old_id} not found, will create new player")
@@ -66,13 +78,16 @@ def create_player(request):
                 print(f"Created new player with ID: {player.id}")
 
             return JsonResponse({
-                'id': player.id
+                'id': player.id,
+                'token': issue_player_token(player.id),
             })
     except Exception as e:
         print(f"Error in create_player: {str(e)}")
         return JsonResponse({'error': str(e)}, status=400)
 
 @api_view(['GET'])
+# Any lobby change may move a player, so the tag follows the whole directory
+@etag_condition("player-lobby", lambda request, player_id: LOBBY_DIRECTORY.version)
 def get_player_lobby(request, player_id):
     """Get the current lobby for a player."""
     try:
@@ -92,6 +107,7 @@ from django.db import transaction
 from django.core.exceptions import ValidationError
 
 @api_view(['POST'])
+@serialized_write
 def create_new_lobby(request):
     print("request received to create lobby")
     try:
@@ -151,7 +167,7 @@ def create_new_lobby(request):
             print(f"Serialized data: {serialized_data}")
             
             # Broadcast update to all connected clients
-            # broadcast_lobby_update()
+            publish_on_commit("put", serialized_data)
             
             return JsonResponse(serialized_data)
     except LobbyPlayer.DoesNotExist:
@@ -162,69 +178,22 @@ def create_new_lobby(request):
         return JsonResponse({'error': str(e)}, status=400)
 
 @api_view(['GET'])
-# def broadcast_lobby_update():
-#     """Helper function to broadcast lobby updates to all connected clients"""
-#     try:
-#         channel_layer = get_channel_layer()
-#         lobbies = Lobby.objects.filter(is_active=True).prefetch_related('lobby_players')
-#         serializer = LobbySerializer(lobbies, many=True)
-#         lobby_data = serializer.data
-        
-#         print(f"Broadcasting lobby update: {lobby_data}")
-        
-#         async_to_sync(channel_layer.group_send)(
-#             "lobbies",
-#             {
-#                 "type": "send_lobby_update",
-#             }
-#         )
-#     except Exception as e:
-#         print(f"Error broadcasting lobby update: {e}")
-
+@etag_condition("lobbies", lambda request: LOBBY_DIRECTORY.version)
 def list_lobbies(request):
-    print("Fetching active lobbies")
-    with transaction.atomic():
-        # Clean up any lobbies that have only disconnected players
-        lobbies = Lobby.objects.filter(is_active=True).prefetch_related('lobby_players')
-        for lobby in lobbies:
-            # Check if any players in this lobby are still connected
-            has_active_players = False
-            current_player_ids = lobby.lobby_players.values_list('id', flat=True)
-            
-            if not current_player_ids:
-                # No players at all, deactivate lobby
-                lobby.is_active = False
-                lobby.save()
-                continue
-                
-            if current_player_ids:
-                # If there are players, lobby stays active
-                has_active_players = True
-            
-            if not has_active_players:
-                lobby.is_active = False
-                lobby.save()
-        
-        # Now get the final list of active lobbies
-        lobbies = Lobby.objects.filter(is_active=True).prefetch_related('lobby_players')
-        
-        # Debug info
-        for lobby in lobbies:
-            print(f"Lobby {lobby.id}:")
-            print(f"  Name: {lobby.name}")
-            print(f"  Player count: {lobby.lobby_players.count()}")
-            print(f"  Players: {list(lobby.lobby_players.all().values('id', 'lobby_id'))}")
-        
-        serializer = LobbySerializer(lobbies, many=True)
-        response_data = {"lobbies": serializer.data}
-        print(f"Response data: {response_data}")
-        
-        # Broadcast updates to all connected clients
-        # broadcast_lobby_update()
-        
-        return JsonResponse(response_data)
+    """
+    Active lobbies and their players. Read-only: empty lobbies are closed in
+    the background (game_engine/housekeeping.py).
+    """
+    lobbies = Lobby.objects.filter(is_active=True).annotate(
+        player_count=Count('lobby_players')
+    ).prefetch_related(
+        Prefetch('lobby_players', queryset=LobbyPlayer.objects.select_related('character_card'))
+    )
+    serializer = LobbySerializer(lobbies, many=True)
+    return JsonResponse({"lobbies": serializer.data})
 
 @api_view(['POST'])
+@serialized_write
 def join_lobby(request, lobby_id):
     print(f"Attempting to join lobby {lobby_id}")
     print(f"Request data: {request.data}")
@@ -249,6 +218,7 @@ def join_lobby(request, lobby_id):
                 print(f"Created new player with ID: {player.id}")
                 return JsonResponse({
                     'new_player_id': player.id,
+                    'token': issue_player_token(player.id),
                     'message': 'New player created. Please retry joining with the new player ID.'
                 })
 
@@ -308,7 +278,7 @@ def join_lobby(request, lobby_id):
             print(f"Response data: {response_data}")
             
             # Broadcast update to all connected clients
-            # broadcast_lobby_update()
+            publish_on_commit("put", response_data)
             
             return JsonResponse(response_data)
     except Lobby.DoesNotExist:
@@ -319,6 +289,7 @@ def join_lobby(request, lobby_id):
         return JsonResponse({'error': str(e)}, status=400)
 
 @api_view(['POST'])
+@serialized_write
 def leave_lobby(request, lobby_id):
     try:
         with transaction.atomic():
@@ -337,20 +308,14 @@ def leave_lobby(request, lobby_id):
             player.lobby = None
             player.save()
             
-            # Re-fetch the lobby
+            # Re-fetch the lobby; once no person is left, housekeeping closes it
             lobby.refresh_from_db()
             
-            # Check if lobby is empty
-            if lobby.lobby_players.count() == 0:
-                lobby.is_active = False
-                lobby.save()
-                return JsonResponse({'message': 'Lobby closed', 'success': True})
-            
             serializer = LobbySerializer(lobby)
             response_data = {'success': True, **serializer.data}
             
             # Broadcast update to all connected clients
-            # broadcast_lobby_update()
+            publish_on_commit("put", serializer.data)
             
             return JsonResponse(response_data)
     except Lobby.DoesNotExist:
@@ -361,6 +326,7 @@ def leave_lobby(request, lobby_id):
         return JsonResponse({'error': str(e)}, status=400)
             
 @api_view(['POST'])
+@serialized_write
 def select_character(request, lobby_id):
     try:
         with transaction.atomic():
@@ -409,8 +375,7 @@ def select_character(request, lobby_id):
             # Re-fetch the lobby and serialize it
             lobby = Lobby.objects.prefetch_related('lobby_players').get(id=lobby.id)
             serializer = LobbySerializer(lobby)
-            
-            # broadcast_lobby_update()
+            publish_on_commit("put", serializer.data)
             
             return JsonResponse({
                 'success': True,
@@ -424,7 +389,87 @@ def select_character(request, lobby_id):
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=400)
 
+@api_view(['POST'])
+@serialized_write
+def add_bot(request, lobby_id):
+    """Seat a server-side bot, as the given character or the first one free."""
+    try:
+        with transaction.atomic():
+            lobby = Lobby.objects.get(id=lobby_id)
+            if lobby.game_in_progress:
+                return JsonResponse({
+                    'error': 'Cannot add a bot while a game is in progress'
+                }, status=400)
+
+            bot_kind = request.data.get('bot_kind') or BOT_DEDUCER
+            if bot_kind not in BOT_KINDS:
+                return JsonResponse({
+                    'error': f"Bot kind must be one of: {', '.join(BOT_KINDS)}"
+                }, status=400)
+
+            if lobby.lobby_players.count() >= 6:
+                return JsonResponse({'error': 'Lobby is full'}, status=400)
+
+            taken = set(
+                lobby.lobby_players.filter(character_card__isnull=False)
+                .values_list('character_card__name', flat=True)
+            )
+            character_name = request.data.get('character_name') or next(
+                (name for name in SUSPECTS if name not in taken), None
+            )
+            if character_name not in SUSPECTS:
+                return JsonResponse({'error': 'Invalid character name'}, status=400)
+            if character_name in taken:
+                return JsonResponse({'error': 'Character is already taken'}, status=400)
+
+            character_card, _ = Card.objects.get_or_create(
+                name=character_name,
+                card_type='CHAR'
+            )
+            LobbyPlayer.objects.create(
+                lobby=lobby, character_card=character_card, bot_kind=bot_kind
+            )
+
+            lobby = Lobby.objects.prefetch_related('lobby_players').get(id=lobby.id)
+            serializer = LobbySerializer(lobby)
+            publish_on_commit("put", serializer.data)
+            return JsonResponse({'success': True, **serializer.data})
+    except Lobby.DoesNotExist:
+        return JsonResponse({'error': 'Lobby not found'}, status=404)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+@api_view(['POST'])
+@serialized_write
+def remove_bot(request, lobby_id):
+    try:
+        with transaction.atomic():
+            lobby = Lobby.objects.get(id=lobby_id)
+            if lobby.game_in_progress:
+                return JsonResponse({
+                    'error': 'Cannot remove a bot while a game is in progress'
+                }, status=400)
+
+            bot = LobbyPlayer.objects.get(id=request.data.get('player_id'))
+            if bot.lobby_id != lobby.id or not bot.is_bot:
+                return JsonResponse({
+                    'error': 'Player is not a bot in this lobby'
+                }, status=400)
+            bot.delete()
+
+            lobby = Lobby.objects.prefetch_related('lobby_players').get(id=lobby.id)
+            serializer = LobbySerializer(lobby)
+            publish_on_commit("put", serializer.data)
+            return JsonResponse({'success': True, **serializer.data})
+    except Lobby.DoesNotExist:
+        return JsonResponse({'error': 'Lobby not found'}, status=404)
+    except LobbyPlayer.DoesNotExist:
+        return JsonResponse({'error': 'Player not found'}, status=404)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
 @api_view(['GET'])
+@etag_condition("lobby", lambda request, lobby_id: LOBBY_DIRECTORY.versions.get(lobby_id))
 def get_lobby(request, lobby_id):
     try:
         lobby = Lobby.objects.prefetch_related('lobby_players').get(id=lobby_id)
@@ -436,6 +481,7 @@ def get_lobby(request, lobby_id):
         return JsonResponse({'error': str(e)}, status=400)
 
 @api_view(['POST'])
+@serialized_write
 def return_to_character_select(request, lobby_id):
     """Return all players in the lobby to character select screen."""
     try:
@@ -445,6 +491,7 @@ def return_to_character_select(request, lobby_id):
             # Mark game as not in progress
             lobby.game_in_progress = False
             lobby.save()
+            publish_on_commit("update", lobby.id, game_in_progress=False)
             
             # Clean up the game session
             game_name = f"lobby_{lobby_id}"
@@ -469,7 +516,50 @@ def return_to_character_select(request, lobby_id):
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=400)
 
+def _launch_game(lobby_id, players):
+    """
+    Replace the lobby's game, if any, with a new one for ``players`` and send
+    it to the lobby's sockets. Runs in the caller's transaction; returns the
+    manager and the public game state.
+    """
+    game_name = f"lobby_{lobby_id}"
+    remove_session(game_name)
+
+    # Delete existing game and its related objects (solution will cascade)
+    Game.objects.filter(name=game_name).delete()
+    Player.objects.filter(game__name=game_name).delete()
+
+    with collect_messages() as outbox:
+        manager = GameManager(game_name=game_name, lobby_players=players)
+    register_session(game_name, manager)
+
+    # Broadcast clear_log message to all players before sending game state
+    channel_layer = get_channel_layer()
+    async_to_sync(channel_layer.group_send)(
+        f"game_{lobby_id}",
+        {"type": "clear_log"},
+    )
+    # Messages from setting up the game land in the freshly cleared log
+    outbox.flush()
+
+    # Public state only; each socket gets its private part once it identifies
+    frame = manager.publish_state()
+    game_state = frame["state"]
+    async_to_sync(channel_layer.group_send)(
+        f"game_{lobby_id}",
+        frame_event(
+            {
+                "type": "game_state",
+                "version": frame["version"],
+                "game_state": game_state,
+            }
+        ),
+    )
+    return manager, game_state
+
+
 @api_view(["POST"])
+@serialized_write
 def start_game(request, lobby_id):
     try:
         with transaction.atomic():
@@ -486,33 +576,16 @@ def start_game(request, lobby_id):
                     {"error": "All players must select characters"}, status=400
                 )
 
-            game_name = f"lobby_{lobby_id}"
-            remove_session(game_name)
-
-            # Delete existing game and its related objects (solution will cascade)
-            Game.objects.filter(name=game_name).delete()
-            Player.objects.filter(game__name=game_name).delete()
-            # Clear all hallway occupancy and eliminated status
-            Hallway.objects.all().update(is_occupied=False)
+            if not players.filter(bot_kind="").exists():
+                return JsonResponse(
+                    {"error": "Game requires at least one human player"}, status=400
+                )
 
-            manager = GameManager(game_name=game_name, lobby_players=players)
-            register_session(game_name, manager)
+            manager, game_state = _launch_game(lobby.id, players)
 
             lobby.game_in_progress = True
             lobby.save()
-
-            # Broadcast clear_log message to all players before sending game state
-            channel_layer = get_channel_layer()
-            async_to_sync(channel_layer.group_send)(
-                f"game_{lobby_id}",
-                {"type": "clear_log"},
-            )
-
-            game_state = manager.serialize_state()
-            async_to_sync(channel_layer.group_send)(
-                f"game_{lobby_id}",
-                {"type": "forward_game_state", "game_state": game_state},
-            )
+            publish_on_commit("update", lobby.id, game_in_progress=True)
 
             return JsonResponse(
                 {
@@ -531,13 +604,29 @@ def start_game(request, lobby_id):
 # GAME API VIEWS
 # ---------------------------
 
-class GameListCreateView(generics.ListCreateAPIView):
+class GameVersionsMixin:
+    """Raw game and player writes may change any game's ``GameStateView``."""
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        bump_on_commit(GAME_VERSIONS)
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        bump_on_commit(GAME_VERSIONS)
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        bump_on_commit(GAME_VERSIONS)
+
+
+class GameListCreateView(GameVersionsMixin, generics.ListCreateAPIView):
     """GET all games or POST a new one."""
     queryset = Game.objects.all()
     serializer_class = GameSerializer
 
 
-class GameRetrieveUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
+class GameRetrieveUpdateDeleteView(GameVersionsMixin, generics.RetrieveUpdateDestroyAPIView):
     """GET, PUT, PATCH, DELETE a specific game."""
     queryset = Game.objects.all()
     serializer_class = GameSerializer
@@ -547,104 +636,133 @@ class GameRetrieveUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
 # PLAYER API VIEWS
 # ---------------------------
 
-class PlayerListCreateView(generics.ListCreateAPIView):
+class PlayerListCreateView(GameVersionsMixin, generics.ListCreateAPIView):
     """GET all players or POST a new one."""
     queryset = Player.objects.all()
     serializer_class = PlayerSerializer
 
 
-class PlayerRetrieveUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
+class PlayerRetrieveUpdateDeleteView(GameVersionsMixin, generics.RetrieveUpdateDestroyAPIView):
     """GET, PUT, PATCH, DELETE a specific player."""
     queryset = Player.objects.all()
     serializer_class = PlayerSerializer
 
 
 class GameSimulationView(APIView):
-    """POST to trigger a full simulation and stream output over WebSocket."""
+    """POST to play bot-only games in memory and return a summary of the results."""
 
     permission_classes = [AllowAny]
-    MAX_DB_RETRIES = 3
-    RETRY_SLEEP_SECONDS = 0.15
-    TRANSIENT_VALUEERROR = "Save with update_fields did not affect any rows"
 
     def post(self, request, *args, **kwargs):
-        game_name = request.data.get("game_name", "default")
-        rounds = int(request.data.get("rounds", 20))
+        try:
+            games = int(request.data.get("games", 1))
+            rounds = int(request.data.get("rounds", 100))
+            players = int(request.data.get("players", MAX_PLAYERS))
+            seed = request.data.get("seed")
+            seed = None if seed is None else int(seed)
+        except (TypeError, ValueError):
+            return Response(
+                {"detail": "games, rounds, players and seed must be integers."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        summary = None
-        for attempt in range(self.MAX_DB_RETRIES):
-            try:
-                manager = GameManager(game_name=game_name)
-                summary = manager.run_game(max_rounds=rounds)
-                break
-            except OperationalError as exc:
-                if "locked" in str(exc).lower() and attempt < self.MAX_DB_RETRIES - 1:
-                    time.sleep(self.RETRY_SLEEP_SECONDS)
-                    continue
-                return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
-            except ValueError as exc:
-                if (
-                    self.TRANSIENT_VALUEERROR in str(exc)
-                    and attempt < self.MAX_DB_RETRIES - 1
-                ):
-                    time.sleep(self.RETRY_SLEEP_SECONDS)
-                    continue
-                return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
-            except Exception as exc:
-                return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
-
-        if summary is None:
+        max_games = getattr(settings, "GAME_SIMULATION_MAX_GAMES", 2000)
+        if not 1 <= games <= max_games or rounds < 1:
             return Response(
-                {"detail": "Simulation could not be completed."},
+                {"detail": f"games must be between 1 and {max_games}, and rounds at least 1."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+
+        options = {"player_count": players, "bots": request.data.get("bots", "deducer")}
+        try:
+            if games == 1:
+                summary = simulate_game(rounds, seed=seed, **options)
+            else:
+                summary = simulate_games(games, seed=seed, max_rounds=rounds, **options)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         return Response(summary, status=status.HTTP_200_OK)
 
 
-class GameResetView(APIView):
-    """POST to reset a game session back to its initial state."""
+class GameBatchSimulationView(APIView):
+    """
+    POST to play a batch of bot-only games across worker processes. The
+    response streams one JSON summary per line as shards finish; the last
+    line has ``"done": true``.
+    """
 
     permission_classes = [AllowAny]
-    MAX_DB_RETRIES = 3
-    RETRY_SLEEP_SECONDS = 0.15
-    TRANSIENT_VALUEERROR = GameSimulationView.TRANSIENT_VALUEERROR
 
     def post(self, request, *args, **kwargs):
-        game_name = request.data.get("game_name", "default")
+        try:
+            games = int(request.data.get("games", 1000))
+            rounds = int(request.data.get("rounds", 100))
+            players = int(request.data.get("players", MAX_PLAYERS))
+            seed = request.data.get("seed")
+            seed = None if seed is None else int(seed)
+        except (TypeError, ValueError):
+            return Response(
+                {"detail": "games, rounds, players and seed must be integers."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        manager = None
-        for attempt in range(self.MAX_DB_RETRIES):
-            try:
-                with transaction.atomic():
-                    # Clear occupancy before recreating players
-                    Hallway.objects.update(is_occupied=False)
-
-                    # Remove existing game state (solution will cascade via OneToOneField)
-                    Game.objects.filter(name=game_name).delete()
-
-                    manager = GameManager(game_name=game_name)
-                break
-            except OperationalError as exc:
-                if "locked" in str(exc).lower() and attempt < self.MAX_DB_RETRIES - 1:
-                    time.sleep(self.RETRY_SLEEP_SECONDS)
-                    continue
-                return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
-            except ValueError as exc:
-                if (
-                    self.TRANSIENT_VALUEERROR in str(exc)
-                    and attempt < self.MAX_DB_RETRIES - 1
-                ):
-                    time.sleep(self.RETRY_SLEEP_SECONDS)
-                    continue
-                return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
-            except Exception as exc:
-                return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
-
-        if manager is None:
+        max_games = getattr(settings, "GAME_SIMULATION_MAX_BATCH_GAMES", 10_000)
+        if games > max_games:
+            return Response(
+                {"detail": f"games must be at most {max_games}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            batch = iter_batch(
+                games,
+                seed=seed,
+                max_rounds=rounds,
+                player_count=players,
+                bots=request.data.get("bots", "deducer"),
+            )
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return StreamingHttpResponse(_stream_batch(batch), content_type="application/x-ndjson")
+
+
+async def _stream_batch(batch):
+    """
+    Send each shard summary as it arrives. Under ASGI a sync iterator would
+    be read to the end before the first byte goes out, so the batch is
+    advanced on a worker thread, one summary at a time.
+    """
+    advance = sync_to_async(next, thread_sensitive=False)
+    try:
+        while True:
+            summary = await advance(batch, None)
+            if summary is None:
+                return
+            yield json.dumps(summary) + "\n"
+    finally:
+        # Cancels the shards not started yet when the client goes away
+        await sync_to_async(batch.close, thread_sensitive=False)()
+
+
+class GameResetView(APIView):
+    """POST ``{"game_name": "lobby_<id>"}`` to restart a lobby's game with a new deal."""
+
+    permission_classes = [AllowAny]
+
+    def post(self, request, *args, **kwargs):
+        game_name = str(request.data.get("game_name", ""))
+        lobby_id = game_name.removeprefix("lobby_")
+        if not game_name.startswith("lobby_") or not lobby_id.isdigit():
             return Response(
-                {"detail": "Reset could not be completed."},
+                {"detail": "game_name must name a lobby's game (lobby_<id>)."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        try:
+            # On the single writer, no other write of this process can interleave
+            manager = WRITER.call(self._reset, int(lobby_id))
+        except Lobby.DoesNotExist:
+            return Response({"detail": "Lobby not found."}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         return Response(
             {
                 "status": "reset",
@@ -654,12 +772,31 @@ class GameResetView(APIView):
             status=status.HTTP_200_OK,
         )
 
+    @staticmethod
+    def _reset(lobby_id):
+        """Deal the lobby's game again, to the lobby players it was started with."""
+        with transaction.atomic():
+            lobby = Lobby.objects.get(id=lobby_id)
+            if not lobby.game_in_progress:
+                raise ValueError("The lobby has no game in progress.")
+            players = lobby.lobby_players.select_related("character_card").filter(
+                character_card__isnull=False
+            )
+            manager, _ = _launch_game(lobby.id, players)
+            return manager
+
 
 class GameStateView(APIView):
     """GET the latest persisted state for a game."""
 
     permission_classes = [AllowAny]
 
+    @method_decorator(
+        etag_condition(
+            "game",
+            lambda request: GAME_VERSIONS.get(request.GET.get("game_name", "default")),
+        )
+    )
     def get(self, request, *args, **kwargs):
         game_name = request.query_params.get("game_name", "default")
         try:
@@ -691,3 +828,11 @@ class GameStateView(APIView):
             },
             status=status.HTTP_200_OK,
         )
+
+
+@require_GET
+def game_metrics(request):
+    """GET the live-game latency histograms in the Prometheus text format."""
+    if not getattr(settings, "GAME_METRICS_ENABLED", True):
+        return HttpResponse(status=404)
+    return HttpResponse(render_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -16,7 +16,8 @@ export default function App() {
   const [result, setResult] = useState(null);
   const [error, setError] = useState("");
 
-  const resetGame = async (gameName = "default") => {
+  // Deal a lobby's running game again; the server names lobby games lobby_<id>
+  const resetGame = async (lobbyId) => {
     setIsResetting(true);
     setError("");
     clearMessages();
@@ -26,7 +27,7 @@ export default function App() {
         const response = await fetch(`${API_BASE}/api/games/reset/`, {
           method: "POST",
           headers: { "Content-Type": "application/json" },
-          body: JSON.stringify({ game_name: gameName }),
+          body: JSON.stringify({ game_name: `lobby_${lobbyId}` }),
         });
 
         if (!response.ok) {
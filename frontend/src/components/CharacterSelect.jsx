@@ -10,86 +10,49 @@ const CHARACTERS = [
     { id: 6, name: "Professor Plum" }
 ];
 
-const POLLING_INTERVAL = 1000; // Poll every 1 second
+const BOT_KINDS = ["deducer", "estimator", "random"];
 
-export default function CharacterSelect({ lobbyId, onCharacterSelected }) {
+export default function CharacterSelect({ lobbyId, lobby, onCharacterSelected }) {
     const [characters, setCharacters] = useState(CHARACTERS);
     const [selectedChar, setSelectedChar] = useState(null);
     const [error, setError] = useState(null);
     const [takenCharacters, setTakenCharacters] = useState([]);
     const [myCharacter, setMyCharacter] = useState(null);
+    const [bots, setBots] = useState({}); // character name -> { id, kind }
+    const [botKind, setBotKind] = useState(BOT_KINDS[0]);
 
     // Function to check if a character belongs to the current player
     const isMyCharacter = useCallback((characterName) => {
         return myCharacter === characterName;
     }, [myCharacter]);
 
-    // Poll for taken characters
-    const pollTakenCharacters = useCallback(async () => {
-        if (!lobbyId) return;
-
-        try {
-            const response = await fetch(`http://127.0.0.1:8000/api/lobbies/${lobbyId}/`);
-            const data = await response.json();
-            
-            // Extract taken character names from players
-            const taken = data.players
-                .filter(p => p.character_name)
-                .map(p => p.character_name);
-            
-            // Find my character if exists
-            const playerId = localStorage.getItem('playerId');
-            const myPlayerData = data.players.find(p => String(p.id) === String(playerId));
-            const myCurrentCharacter = myPlayerData ? myPlayerData.character_name : null;
-
-            // Only update state if there are changes
-            if (JSON.stringify(taken) !== JSON.stringify(takenCharacters)) {
-                setTakenCharacters(taken);
-            }
-            if (myCurrentCharacter !== myCharacter) {
-                setMyCharacter(myCurrentCharacter);
-                if (myCurrentCharacter) {
-                    const selectedCharacter = CHARACTERS.find(c => c.name === myCurrentCharacter);
-                    if (selectedCharacter) {
-                        setSelectedChar(selectedCharacter.id);
-                    }
-                    localStorage.setItem('playerCharacter', myCurrentCharacter);
-                } else {
-                    localStorage.removeItem('playerCharacter');
-                }
+    // Taken characters, bots and our own character, from the pushed lobby
+    useEffect(() => {
+        if (!lobby) return;
+        setTakenCharacters(lobby.players
+            .filter(p => p.character_name)
+            .map(p => p.character_name));
+
+        const botSeats = {};
+        lobby.players
+            .filter(p => p.bot_kind && p.character_name)
+            .forEach(p => { botSeats[p.character_name] = { id: p.id, kind: p.bot_kind }; });
+        setBots(botSeats);
+
+        const playerId = localStorage.getItem('playerId');
+        const myPlayerData = lobby.players.find(p => String(p.id) === String(playerId));
+        const myCurrentCharacter = myPlayerData ? myPlayerData.character_name : null;
+        setMyCharacter(myCurrentCharacter);
+        if (myCurrentCharacter) {
+            const selectedCharacter = CHARACTERS.find(c => c.name === myCurrentCharacter);
+            if (selectedCharacter) {
+                setSelectedChar(selectedCharacter.id);
             }
-        } catch (error) {
-            console.error('Error polling taken characters:', error);
-            setError('Failed to update character status');
+            localStorage.setItem('playerCharacter', myCurrentCharacter);
+        } else {
+            localStorage.removeItem('playerCharacter');
         }
-    }, [lobbyId, takenCharacters, myCharacter]);
-
-    // Set up polling interval
-    useEffect(() => {
-        // Initial fetch
-        pollTakenCharacters();
-
-        // Set up polling interval
-        const interval = setInterval(pollTakenCharacters, POLLING_INTERVAL);
-
-        // Cleanup interval on unmount or when lobbyId changes
-        return () => clearInterval(interval);
-    }, [lobbyId, pollTakenCharacters]);
-
-    const fetchTakenCharacters = async () => {
-        try {
-            const response = await fetch(`http://127.0.0.1:8000/api/lobbies/${lobbyId}/`);
-            const data = await response.json();
-            // Extract taken character names from players
-            const taken = data.players
-                .filter(p => p.character_name)
-                .map(p => p.character_name);
-            setTakenCharacters(taken);
-        } catch (error) {
-            console.error('Error fetching taken characters:', error);
-            setError('Failed to load taken characters');
-        }
-    };
+    }, [lobby]);
 
     const selectCharacter = async (character) => {
         try {
@@ -120,17 +83,47 @@ export default function CharacterSelect({ lobbyId, onCharacterSelected }) {
         }
     };
 
+    const updateBot = async (event, action, body) => {
+        // The card underneath would otherwise select the character
+        event.stopPropagation();
+        try {
+            const response = await fetch(`http://127.0.0.1:8000/api/lobbies/${lobbyId}/bots/${action}/`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify(body)
+            });
+            const data = await response.json();
+            if (!response.ok) {
+                throw new Error(data.error);
+            }
+            setError(null);
+        } catch (error) {
+            console.error(`Error trying to ${action} bot:`, error);
+            setError(error.message || `Failed to ${action} bot`);
+        }
+    };
 
     return (
         <div className="character-select">
             <h3>{myCharacter ? 'Your Character' : 'Select Your Character'}</h3>
             {error && <div className="error-message">{error}</div>}
+            <div className="bot-controls">
+                <label>
+                    Bot strategy{' '}
+                    <select value={botKind} onChange={(e) => setBotKind(e.target.value)}>
+                        {BOT_KINDS.map(kind => <option key={kind} value={kind}>{kind}</option>)}
+                    </select>
+                </label>
+            </div>
             <div className="character-grid">
                 {characters.map(char => {
                     const isTaken = takenCharacters.includes(char.name);
                     const isMyChar = isMyCharacter(char.name);
                     const isSelected = selectedChar === char.id;
                     const canSelect = !isTaken || isMyChar;
+                    const bot = bots[char.name];
                     return (
                         <div 
                             key={char.id} 
@@ -144,9 +137,25 @@ export default function CharacterSelect({ lobbyId, onCharacterSelected }) {
                             <div className="character-name">{char.name}</div>
                             {isTaken && (
                                 <div className="taken-overlay">
-                                    {isMyChar ? 'Your Character' : 'Taken'}
+                                    {isMyChar ? 'Your Character' : bot ? `Bot (${bot.kind})` : 'Taken'}
                                 </div>
                             )}
+                            {bot && (
+                                <button
+                                    className="bot-button"
+                                    onClick={(e) => updateBot(e, 'remove', { player_id: bot.id })}
+                                >
+                                    Remove bot
+                                </button>
+                            )}
+                            {!isTaken && (
+                                <button
+                                    className="bot-button"
+                                    onClick={(e) => updateBot(e, 'add', { character_name: char.name, bot_kind: botKind })}
+                                >
+                                    Add bot
+                                </button>
+                            )}
                         </div>
                     );
                 })}
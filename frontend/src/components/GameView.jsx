@@ -273,6 +273,18 @@ export default function GameView({
     }
     }, [players]);
 
+  // Subscribe this socket to our player's private state (hand, known cards, reveals)
+  const myPlayerId = myPlayer?.id;
+  useEffect(() => {
+    if (myPlayerId != null) {
+      sendMessage({
+        type: "identify",
+        player_id: myPlayerId,
+        token: localStorage.getItem("playerToken"),
+      });
+    }
+  }, [myPlayerId, sendMessage]);
+
   // Timeout for movement options request
   useEffect(() => {
     if (!isRequestingMoves) return;
@@ -362,6 +374,8 @@ export default function GameView({
   const hasSuggestedThisTurn = Boolean(gameState?.turn_state?.made_suggestion);
   const lastSuggestion = gameState?.last_suggestion ?? null;
   const lastSuggestionCard = lastSuggestion?.card ?? null;
+  // The shown card is only sent to the suggester and disprover; others just see that it was disproved
+  const lastSuggestionDisproved = Boolean(lastSuggestion?.disproved || lastSuggestionCard);
   const lastSuggestionResolved = lastSuggestion != null;
   const isDisproofInProgress = Boolean(disproofInfo);
   
@@ -398,7 +412,7 @@ export default function GameView({
       if (disproofInfo && latest.game_state.last_suggestion) {
         const lastSuggestion = latest.game_state.last_suggestion;
         // Check if this is a RESOLVED suggestion (has card or explicitly no one could disprove)
-        if (lastSuggestion.card && lastSuggestion.disprover) {
+        if ((lastSuggestion.card || lastSuggestion.disproved) && lastSuggestion.disprover) {
           // Disproof is complete - clear the state
           console.log("Disproof complete based on game state, clearing disproofInfo");
           setDisproofInfo(null);
@@ -1337,7 +1351,7 @@ export default function GameView({
 
         {showSuggestionBanner && lastSuggestionResolved && myPlayer && (
           <div className="suggestion-result-banner">
-            {lastSuggestionCard ? (
+            {lastSuggestionDisproved ? (
               // Someone disproved
               <>
                 {lastSuggestion?.suggester === myPlayer.name ? (
@@ -2,12 +2,11 @@
 import React, { useState, useEffect, useCallback, useRef } from 'react';
 import CharacterSelect from './CharacterSelect';
 import GameView from './GameView';
+import useLobbies from '../hooks/useLobbies';
 import '../styles/game.css';
 
-const POLLING_INTERVAL = 1000; // Poll every 1 second
-
 export default function LobbyView() {
-  const [lobbies, setLobbies] = useState([]);
+  const { lobbies } = useLobbies();
   const [newLobbyName, setNewLobbyName] = useState('');
   const [currentLobby, setCurrentLobby] = useState(null);
   const [error, setError] = useState(null);
@@ -28,44 +27,27 @@ export default function LobbyView() {
     }
   }, []);
   
-  // Polling function for current lobby
-  const pollCurrentLobby = useCallback(async () => {
-    if (!currentLobby) return;
-    try {
-      const response = await fetch(`http://127.0.0.1:8000/api/lobbies/${currentLobby.id}/`);
-      const data = await response.json();
-      
-      if (data.error) {
-        console.error('Error polling lobby:', data.error);
-        return;
-      }
-      
-      // Only update if there are actual changes
-      if (JSON.stringify(data) !== JSON.stringify(currentLobby)) {
-        setCurrentLobby(data);
-      }
-    } catch (error) {
-      console.error('Error polling current lobby:', error);
+  // Keep the current lobby in step with its pushed entry, and follow the
+  // host into the game when it starts
+  const lastGameInProgress = useRef(null);
+  useEffect(() => {
+    if (!currentLobby) {
+      lastGameInProgress.current = null;
+      return;
     }
-  }, [currentLobby]);
-
-  // Polling function for lobby list
-  const pollLobbies = useCallback(async () => {
-    if (currentLobby) return; // Don't poll lobby list if in a lobby
-    try {
-      const response = await fetch('http://127.0.0.1:8000/api/lobbies/');
-      const data = await response.json();
-      
-      // Only update if there are actual changes
-      if (JSON.stringify(data.lobbies) !== JSON.stringify(lobbies)) {
-        setLobbies(data.lobbies);
-      }
-    } catch (error) {
-      console.error('Error polling lobbies:', error);
+    const pushed = lobbies.find(lobby => lobby.id === currentLobby.id);
+    if (!pushed) return;
+    // During a game the game socket depends on currentLobby; leave it alone
+    if (!isGameStarted && JSON.stringify(pushed) !== JSON.stringify(currentLobby)) {
+      setCurrentLobby(pushed);
+    }
+    if (pushed.game_in_progress && lastGameInProgress.current === false && !isGameStarted) {
+      console.log('Game has started, transitioning to game view');
+      setIsGameStarted(true);
     }
-  }, [lobbies, currentLobby]);
+    lastGameInProgress.current = pushed.game_in_progress;
+  }, [lobbies, currentLobby, isGameStarted]);
 
-  // Set up polling intervals
   // Set up WebSocket connection
   useEffect(() => {
     if (!currentLobby || !isGameStarted) {
@@ -170,61 +152,6 @@ export default function LobbyView() {
     };
   }, [isGameStarted, currentLobby]); // Connect when game starts
 
-  // Listen for game start via polling
-  useEffect(() => {
-    if (!currentLobby || isGameStarted) return;
-
-    const checkGameStatus = async () => {
-      try {
-        const response = await fetch(`http://127.0.0.1:8000/api/lobbies/${currentLobby.id}/`);
-        const data = await response.json();
-        
-        // If game_in_progress changed to true, start the game
-        if (data.game_in_progress && !isGameStarted) {
-          console.log('Game has started, transitioning to game view');
-          setIsGameStarted(true);
-        }
-      } catch (error) {
-        console.error('Error checking game status:', error);
-      }
-    };
-
-    const interval = setInterval(checkGameStatus, 1000);
-    return () => clearInterval(interval);
-  }, [currentLobby, isGameStarted]);
-
-  // Handle polling for non-game state
-  useEffect(() => {
-    if (isGameStarted) return; // Don't poll when game is running
-
-    // Initial fetch
-    if (!currentLobby) {
-      fetchLobbies();
-    }
-
-    // Set up polling intervals for non-game state
-    const lobbyListInterval = setInterval(pollLobbies, POLLING_INTERVAL);
-    const currentLobbyInterval = setInterval(pollCurrentLobby, POLLING_INTERVAL);
-
-    // Cleanup intervals on unmount
-    return () => {
-      clearInterval(lobbyListInterval);
-      clearInterval(currentLobbyInterval);
-    };
-  }, [pollLobbies, pollCurrentLobby, currentLobby, isGameStarted]);
-
-  const fetchLobbies = useCallback(async () => {
-    try {
-      console.log('Fetching lobbies...');
-      const response = await fetch('http://127.0.0.1:8000/api/lobbies/');
-      const data = await response.json();
-      console.log('Received lobbies:', data.lobbies);
-      setLobbies(data.lobbies);
-    } catch (error) {
-      console.error('Error fetching lobbies:', error);
-    }
-  }, []);
-
   const createLobby = async () => {
     try {
       const playerId = localStorage.getItem('playerId');
@@ -284,7 +211,6 @@ export default function LobbyView() {
           lobby_id: data.id
         }));
       }
-      fetchLobbies();
     } catch (error) {
       console.error('Error creating lobby:', error);
       if (error.message.includes('Failed to fetch')) {
@@ -321,6 +247,7 @@ export default function LobbyView() {
         // Server created a new player for us
         console.log('Received new player ID:', data.new_player_id);
         localStorage.setItem('playerId', data.new_player_id);
+        localStorage.setItem('playerToken', data.token);
         localStorage.removeItem('playerCharacter');
         localStorage.removeItem('currentGamePlayerId');
         // Retry joining with new player ID
@@ -365,7 +292,6 @@ export default function LobbyView() {
         }
         setCurrentLobby(null);
         setPlayerLobbyInfo(null); // Clear player lobby info
-        fetchLobbies();
         return true;
       }
       console.error('Error leaving lobby:', data.error);
@@ -374,7 +300,7 @@ export default function LobbyView() {
       console.error('Error leaving lobby:', error);
       return false;
     }
-  }, [currentLobby, fetchLobbies, socket]);
+  }, [currentLobby, socket]);
 
   const createPlayer = async () => {
     try {
@@ -392,6 +318,7 @@ export default function LobbyView() {
       });
       const data = await response.json();
       localStorage.setItem('playerId', data.id);
+      localStorage.setItem('playerToken', data.token);
       localStorage.removeItem('playerCharacter');
       localStorage.removeItem('currentGamePlayerId');
     } catch (error) {
@@ -566,6 +493,7 @@ export default function LobbyView() {
           </div>
           <CharacterSelect 
             lobbyId={currentLobby.id}
+            lobby={currentLobby}
             onCharacterSelected={(characterData) => {
               // Update the current lobby with the new character selection
               setCurrentLobby(prevLobby => ({
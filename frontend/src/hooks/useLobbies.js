@@ -0,0 +1,83 @@
+import { useEffect, useState, useRef, useCallback } from "react";
+
+// Apply one lobby_updated / lobby_removed event to the list
+function applyLobbyEvent(lobbies, event) {
+  if (event.type === "lobby_removed") {
+    return lobbies.filter((lobby) => lobby.id !== event.lobby_id);
+  }
+  const index = lobbies.findIndex((lobby) => lobby.id === event.lobby.id);
+  if (index === -1) {
+    return [...lobbies, event.lobby];
+  }
+  const next = [...lobbies];
+  next[index] = event.lobby;
+  return next;
+}
+
+// The open lobbies, kept current by the server's ws/lobbies/ push channel
+export default function useLobbies() {
+  const [lobbies, setLobbies] = useState([]);
+  const [loaded, setLoaded] = useState(false);
+  const socketRef = useRef(null);
+  // Last directory version we hold; events must follow it without a gap
+  const versionRef = useRef(null);
+
+  useEffect(() => {
+    const protocol = window.location.protocol === "https:" ? "wss" : "ws";
+    const host = import.meta.env.VITE_WS_HOST || window.location.hostname;
+    const port = import.meta.env.VITE_WS_PORT || "8000";
+    const socket = new WebSocket(`${protocol}://${host}:${port}/ws/lobbies/`);
+    socketRef.current = socket;
+
+    socket.onmessage = (e) => {
+      const data = JSON.parse(e.data);
+      const held = versionRef.current;
+      if (data?.type === "lobbies") {
+        if (held != null && data.version < held) {
+          return; // Older than the events we already applied
+        }
+        versionRef.current = data.version;
+        setLobbies(data.lobbies || []);
+        setLoaded(true);
+      } else if (data?.type === "lobby_updated" || data?.type === "lobby_removed") {
+        if (held == null || data.version <= held) {
+          return; // Covered by the list we hold, or the list is still coming
+        }
+        if (data.version !== held + 1) {
+          // Missed a change: ask for the whole list instead of guessing
+          socket.send(JSON.stringify({ type: "get_lobbies" }));
+          return;
+        }
+        versionRef.current = data.version;
+        setLobbies((prev) => applyLobbyEvent(prev, data));
+      } else if (data?.type === "error") {
+        console.error("Lobby channel error:", data.message);
+      }
+    };
+
+    socket.onclose = () => {
+      console.log("❌ Lobby channel closed");
+    };
+
+    socket.onerror = (error) => {
+      console.error("Lobby channel error:", error);
+    };
+
+    return () => {
+      if (socket.readyState === WebSocket.OPEN || socket.readyState === WebSocket.CONNECTING) {
+        socket.close();
+      }
+      socketRef.current = null;
+      versionRef.current = null;
+    };
+  }, []);
+
+  // Ask for the whole list again
+  const refresh = useCallback(() => {
+    if (socketRef.current?.readyState === WebSocket.OPEN) {
+      socketRef.current.send(JSON.stringify({ type: "get_lobbies" }));
+    }
+  }, []);
+
+  return { lobbies, loaded, refresh };
+}
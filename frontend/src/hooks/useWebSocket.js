@@ -1,8 +1,46 @@
 import { useEffect, useState, useRef, useCallback } from "react";
 
+// Merge a game_state_delta's changes into the last full game state
+function applyStateDelta(state, changes) {
+  const { players_changed: playersChanged, ...rest } = changes;
+  const merged = { ...state, ...rest };
+  if (playersChanged) {
+    merged.players = (merged.players || []).map((player) =>
+      playersChanged[String(player.id)]
+        ? { ...player, ...playersChanged[String(player.id)] }
+        : player,
+    );
+  }
+  return merged;
+}
+
+// Fold this viewer's private state (hand, knowledge, shown card) into the public state
+function withPrivateState(state, playerId, privateState) {
+  if (!state || playerId == null || !privateState) {
+    return state;
+  }
+  const { last_suggestion_card: shownCard, ...playerFields } = privateState;
+  const merged = {
+    ...state,
+    players: (state.players || []).map((player) =>
+      String(player.id) === String(playerId) ? { ...player, ...playerFields } : player,
+    ),
+  };
+  if (merged.last_suggestion && shownCard) {
+    merged.last_suggestion = { ...merged.last_suggestion, card: shownCard };
+  }
+  return merged;
+}
+
 export default function useWebSocket(roomName = "default") {
   const [messages, setMessages] = useState([]);
   const socketRef = useRef(null);
+  // Last game state we hold and its server version, for applying deltas
+  const gameStateRef = useRef({ version: null, state: null });
+  // Game player this socket identified as (and the token proving it), and the private state sent to it
+  const playerIdRef = useRef(null);
+  const playerTokenRef = useRef(null);
+  const privateStateRef = useRef(null);
 
   useEffect(() => {
     if (!roomName) {
@@ -26,20 +64,74 @@ export default function useWebSocket(roomName = "default") {
       if (roomName === 'lobbies') {
         // Request initial lobby state
         socket.send(JSON.stringify({ type: 'get_lobbies' }));
+      } else if (playerIdRef.current != null) {
+        // Re-subscribe to our private state after a reconnect
+        socket.send(JSON.stringify({
+          type: "identify",
+          player_id: playerIdRef.current,
+          token: playerTokenRef.current,
+        }));
       }
     };
     
-    socket.onmessage = (e) => {
-      const data = JSON.parse(e.data);
+    // Turn one server message into what components see; null drops it
+    const normalize = (data) => {
       let normalized = data;
 
+      if (data?.type === "game_state" && data.game_state) {
+        gameStateRef.current = { version: data.version ?? null, state: data.game_state };
+        normalized = {
+          ...data,
+          game_state: withPrivateState(data.game_state, playerIdRef.current, privateStateRef.current),
+        };
+      } else if (data?.type === "private_state") {
+        privateStateRef.current = data.private;
+        const held = gameStateRef.current;
+        if (held.state == null) {
+          return null;
+        }
+        normalized = {
+          type: "game_state",
+          version: held.version,
+          game_state: withPrivateState(held.state, playerIdRef.current, data.private),
+        };
+      } else if (data?.type === "game_state_delta") {
+        const held = gameStateRef.current;
+        if (held.version != null && data.version <= held.version) {
+          return null; // Already covered by a newer snapshot
+        }
+        if (held.state == null || held.version == null || data.version !== held.version + 1) {
+          // Missed a version: ask for a full snapshot instead of guessing
+          socket.send(JSON.stringify({ type: "sync_state", version: held.version }));
+          return null;
+        }
+        const state = applyStateDelta(held.state, data.changes || {});
+        gameStateRef.current = { version: data.version, state };
+        normalized = {
+          type: "game_state",
+          version: data.version,
+          game_state: withPrivateState(state, playerIdRef.current, privateStateRef.current),
+        };
+      }
+
       if (typeof data === "string") {
         normalized = { type: "text", message: data };
       } else if (!data?.type && typeof data?.message === "string") {
         normalized = { type: "text", message: data.message };
       }
+      return normalized;
+    };
+
+    socket.onmessage = (e) => {
+      const data = JSON.parse(e.data);
+      // A batch carries the log messages of one action, in order
+      const frames = data?.type === "batch" ? data.messages || [] : [data];
+      const normalized = frames.map(normalize).filter((message) => message != null);
+      if (!normalized.length) {
+        return;
+      }
 
-      setMessages((prev) => [...prev, normalized]);
+      setMessages((prev) => [...prev, ...normalized]);
       console.log("Received WebSocket message:", normalized);
     };
     
@@ -63,6 +155,13 @@ export default function useWebSocket(roomName = "default") {
     if (socketRef.current?.readyState === WebSocket.OPEN) {
       // If msg is already a string, parse it first to ensure it's an object
       const msgObj = typeof msg === 'string' ? JSON.parse(msg) : msg;
+      if (msgObj?.type === "identify") {
+        if (String(playerIdRef.current) !== String(msgObj.player_id)) {
+          privateStateRef.current = null;
+        }
+        playerIdRef.current = msgObj.player_id;
+        playerTokenRef.current = msgObj.token;
+      }
       console.log('Sending WebSocket message:', msgObj);
       socketRef.current.send(JSON.stringify(msgObj));
     } else {